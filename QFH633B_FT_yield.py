@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import re
 from openpyxl import load_workbook
@@ -6,6 +7,7 @@ from openpyxl.chart.axis import ChartLines
 from openpyxl.drawing.line import LineProperties
 from openpyxl.drawing.colors import ColorChoice
 from openpyxl.chart.shapes import GraphicalProperties
+from ftyield.snapshots import add_snapshot_arguments, snapshot_from_args
 
 # 設定檔案名稱
 input_file = 'Sunplus_Yield_control_table.xlsx'
@@ -15,14 +17,21 @@ sheet_name = 'QFH633B LQFP 128L'
 # 指定要保留的欄位
 columns_to_keep = "B, C, D, F, G, S, T"
 
+# 加上 --debug-snapshots 才輸出 yield_trend_a..e 中間資料（預設 Parquet）
+parser = argparse.ArgumentParser(description=f"{sheet_name} FT yield trend")
+add_snapshot_arguments(parser)
+snapshot = snapshot_from_args(parser.parse_args(), ".")
+
 try:
     # **1️⃣ 讀取 Excel，篩選特定欄位，跳過第一列**
     df = pd.read_excel(input_file, sheet_name=sheet_name, usecols=columns_to_keep, skiprows=1)
-    df.to_excel('yield_trend_a.xlsx') 
+    if snapshot:
+        snapshot(df, "read")
 
     # **2️⃣ 新增 RT rate 欄位**
     df["RT rate"] = None  # 預設值
-    df.to_excel('yield_trend_b.xlsx') 
+    if snapshot:
+        snapshot(df, "rt_column")
 
 
     # **3️⃣ 解析 PGM Name，修改 FT 為 FT1、FT2...**
@@ -35,7 +44,8 @@ try:
         return station
 
     df["Station"] = df.apply(lambda row: modify_ft(row["Station"], row["PGM Name"]), axis=1)
-    df.to_excel('yield_trend_c.xlsx')
+    if snapshot:
+        snapshot(df, "station")
 
     # **4️⃣ 計算 RT rate**
     rt_rate = None
@@ -54,11 +64,13 @@ try:
             df.loc[rt_start_idx:idx, "RT rate"] = rt_rate
             rt_rate = None
 
-    df.to_excel('yield_trend_d.xlsx')        
+    if snapshot:
+        snapshot(df, "rt_rate")
 
     # **5️⃣ 刪除包含 NaN 的列**   
     df_cleaned = df.dropna()
-    df_cleaned.to_excel('yield_trend_e.xlsx')
+    if snapshot:
+        snapshot(df_cleaned, "cleaned")
 
     # **6️⃣ 分類 FT1, FT2, FT3 到不同的 Sheet**
     with pd.ExcelWriter(output_file, engine="openpyxl") as writer:
@@ -0,0 +1,117 @@
+"""比較 control table 的讀取方式：時間與記憶體高峰
+
+  python benchmarks/bench_readers.py
+  python benchmarks/bench_readers.py 鴻谷/Sunplus_Yield_control_table.xlsx --repeat 5
+
+每個 reader 以 parse_product_sheet 讀取檔案中所有分頁（與 pipeline 相同：先找表頭，
+再只讀取需要的欄位），先確認結果與 pd.ExcelFile 完全相同，再量測：
+
+- 時間：同一行程中重複讀取，取最快的一次
+- 記憶體高峰：在新的子行程中讀取一次，回報高峰 RSS（Linux 為 /proc 的 VmHWM，
+  其他系統為 ru_maxrss），以及扣除只 import 時的基準值
+"""
+
+from __future__ import annotations
+
+import argparse
+import os
+import resource
+import subprocess
+import sys
+import time
+
+import pandas as pd
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from ftyield.pipeline import parse_product_sheet  # noqa: E402
+from ftyield.readers import READERS, has_calamine, open_reader, select_reader  # noqa: E402
+
+DEFAULT_FILES = [
+    "Sunplus_Yield_control_table.xlsx",
+    "矽格北興-93k/Sunplus_Yield_control_table.xlsx",
+    "鴻谷/Sunplus_Yield_control_table.xlsx",
+    "矽格湖口-D10/Sunplus_Yield_control_table.xlsx",
+    "New product FT status W08.xlsx",
+]
+
+
+def read_all(path: str, reader: str) -> dict[str, object]:
+    frames = {}
+    with open_reader(path, reader) as book:
+        for name in book.sheet_names:
+            try:
+                frames[name] = parse_product_sheet(book, name)
+            except ValueError as e:  # 找不到表頭的分頁：各 reader 應該丟出相同的錯誤
+                frames[name] = type(e).__name__
+    return frames
+
+
+def best_time(path: str, reader: str, repeat: int) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        read_all(path, reader)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def peak_rss_mb(path: str, reader: str) -> float:
+    """在子行程中讀取一次，回傳高峰 RSS (MB)；reader 為空字串時只 import 不讀取。"""
+    out = subprocess.run([sys.executable, __file__, "--child", path, reader or "-"],
+                         capture_output=True, text=True, check=True, cwd=os.getcwd())
+    return float(out.stdout.strip())
+
+
+def check_same(path: str, reader: str, expected: dict) -> None:
+    for name, df in read_all(path, reader).items():
+        if isinstance(df, str) or isinstance(expected[name], str):
+            assert df == expected[name], (path, reader, name)
+        else:
+            pd.testing.assert_frame_equal(df, expected[name])
+
+
+def child(path: str, reader: str) -> None:
+    if reader != "-":
+        read_all(path, reader)
+    # Linux 的 ru_maxrss 會包含 fork 前父行程的用量，改讀這個行程自己的 VmHWM (KB)
+    try:
+        with open("/proc/self/status") as f:
+            hwm = next(line for line in f if line.startswith("VmHWM:"))
+        print(int(hwm.split()[1]) / 1024)
+    except (OSError, StopIteration):
+        usage = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        print(usage / 2 ** 20 if sys.platform == "darwin" else usage / 1024)
+
+
+def main(argv=None) -> int:
+    p = argparse.ArgumentParser(description="control table reader benchmark")
+    p.add_argument("files", nargs="*", default=DEFAULT_FILES)
+    p.add_argument("--reader", action="append", choices=READERS, default=None)
+    p.add_argument("--repeat", type=int, default=3)
+    p.add_argument("--child", nargs=2, help=argparse.SUPPRESS)
+    args = p.parse_args(argv)
+    if args.child:
+        child(*args.child)
+        return 0
+
+    readers = args.reader or [r for r in READERS if r != "calamine" or has_calamine()]
+    baseline = peak_rss_mb(args.files[0], "")
+    print(f"基準 RSS（只 import pandas / openpyxl）：{baseline:.0f} MB\n")
+    print("| 檔案 | 大小 (KB) | reader | 實際使用 | 時間 (ms) | 高峰 RSS (MB) | 增加 (MB) |")
+    print("|---|---:|---|---|---:|---:|---:|")
+    for path in args.files:
+        expected = read_all(path, "pandas")
+        size = os.path.getsize(path) / 1024
+        for reader in readers:
+            check_same(path, reader, expected)
+            seconds = best_time(path, reader, args.repeat)
+            rss = peak_rss_mb(path, reader)
+            print(f"| {path} | {size:.0f} | {reader} | {select_reader(path, reader)} "
+                  f"| {seconds * 1000:.0f} | {rss:.0f} | {rss - baseline:.1f} |")
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,42 @@
+"""FT yield trend 報表工具
+
+把各產品腳本共用的流程整理成套件：一次讀取 Sunplus_Yield_control_table.xlsx
+的所有產品分頁，逐一產生 *_FT_yield_trend.xlsx。站點與產品清單寫在 ftyield.toml。
+
+  python -m ftyield run --site 鴻谷       # 依設定檔處理一個站點
+  python -m ftyield report -s "QAL642E LFBGA 487B"
+"""
+
+from .pipeline import (
+    INPUT_FILE,
+    COLUMNS_TO_KEEP,
+    KEEP_COLUMNS,
+    TARGET_YIELD,
+    locate_header,
+    read_product_sheets,
+    modify_station,
+    compute_rt_rate,
+    prepare,
+    summary_stats,
+    write_report,
+    output_name,
+    run_product,
+)
+from .lots import LotTable
+
+__all__ = [
+    "INPUT_FILE",
+    "COLUMNS_TO_KEEP",
+    "KEEP_COLUMNS",
+    "TARGET_YIELD",
+    "locate_header",
+    "read_product_sheets",
+    "modify_station",
+    "compute_rt_rate",
+    "prepare",
+    "summary_stats",
+    "write_report",
+    "output_name",
+    "run_product",
+    "LotTable",
+]
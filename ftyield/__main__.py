@@ -0,0 +1,236 @@
+"""多產品 FT yield trend 報表 (CLI)
+
+run：依 ftyield.toml 處理各站點的所有產品，在同一個行程中共用已解析的 control table
+
+  python -m ftyield run                               # 所有站點
+  python -m ftyield run --site 鴻谷 --site 矽格北興
+  python -m ftyield run --jobs 4                      # 4 個行程平行產生報表
+  python -m ftyield run --merged                      # 每個站點直接輸出一個合併檔
+  python -m ftyield run --incremental                 # 只轉換上次執行後新增的 lot
+  python -m ftyield run --reader xml                  # 指定 control table 的讀取方式（預設 auto）
+  python -m ftyield run --product "QFH610B*"          # 以 glob 挑選分頁（"*" 為所有產品，不限設定檔）
+  python -m ftyield run --check-report yield_check.xlsx  # 與 bin 數量不符的 lot 寫成報告
+  python -m ftyield run --rollup week --rollup month  # 各 FT 分頁後面加上每週 / 每月彙總與趨勢圖
+  python -m ftyield run --no-cache                    # 不使用解析快取（預設 ~/.cache/ftyield）
+  python -m ftyield run --config other.toml --engine openpyxl
+
+report：直接指定 control table 與分頁
+
+  python -m ftyield report                            # 所有產品分頁
+  python -m ftyield report -i 鴻谷/Sunplus_Yield_control_table.xlsx -o 鴻谷
+  python -m ftyield report -s "QAL642C LFBGA 487B" -s "QAL642E LFBGA 487B"
+  python -m ftyield report --debug-snapshots --snapshot-xlsx  # 另存 yield_trend_a..e 快照
+
+list：列出各站點 control table 中的產品分頁（device、封裝），不載入儲存格
+
+  python -m ftyield list --site 鴻谷 --product "QAH648*"
+
+status：讀取資料夾中每週的 New product FT status Wxx.xlsx（只解析新增或修改過的週報）
+
+  python -m ftyield status                            # 目前資料夾
+  python -m ftyield status 週報 --jobs 4
+
+merge：把站點資料夾中的 *_yield_trend.xlsx 合併成一個 workbook（取代 merged-1.py，不需要 Excel）
+
+  python -m ftyield merge --site 鴻谷                  # → 鴻谷/鴻谷_yield_trend.xlsx
+  python -m ftyield merge a_yield_trend.xlsx b_yield_trend.xlsx -o merged_yield_trend.xlsx
+"""
+
+from __future__ import annotations
+
+import argparse
+import functools
+import os
+import sys
+import traceback
+from typing import Optional
+
+from .batch import run_sites
+from .cache import add_cache_arguments, cache_from_args
+from .config import CONFIG_FILE, load_config, select_sites
+from .discovery import discover_products, expand_site
+from .merge import merge_workbooks, site_trend_files
+from .pipeline import (DETAIL_COLUMNS, INPUT_FILE, KEEP_COLUMNS, TARGET_YIELD, read_product_sheets, output_name,
+                       run_product)
+from .readers import DEFAULT_READER, READERS
+from .rollup import ROLLUP_FREQS
+from .status import load_status_folder
+from .snapshots import add_snapshot_arguments, snapshot_from_args
+from .validate import write_check_report
+from .writer import DEFAULT_ENGINE, ENGINES
+
+
+def build_parser() -> argparse.ArgumentParser:
+    p = argparse.ArgumentParser(prog="ftyield", description="多產品 FT yield trend 報表")
+    sub = p.add_subparsers(dest="cmd", required=True)
+
+    p_run = sub.add_parser("run", help="依設定檔處理各站點的產品")
+    p_run.add_argument("--config", "-c", default=CONFIG_FILE, help=f"設定檔（預設 {CONFIG_FILE}）")
+    p_run.add_argument("--site", action="append", default=None,
+                       help="要處理的站點，可重複指定（預設全部）")
+    p_run.add_argument("--jobs", "-j", type=int, default=1,
+                       help="平行產生報表的行程數（預設 1，不開子行程）")
+    p_run.add_argument("--merged", action="store_true",
+                       help="每個站點的所有產品直接寫成 <站點>_yield_trend.xlsx，不輸出各產品的檔案")
+    p_run.add_argument("--incremental", action="store_const", const="append", default=None,
+                       help="只轉換上次執行後新增的 lot（狀態存在 <站點資料夾>/.ftyield_state）")
+    p_run.add_argument("--rebuild", dest="incremental", action="store_const", const="rebuild",
+                       help="完整重算並重設 --incremental 的狀態")
+    p_run.add_argument("--check-report", default=None,
+                       help="把 yield 與 bin 數量不符的 lot 寫成報告（.xlsx 或 .csv）")
+
+    p_list = sub.add_parser("list", help="列出各站點 control table 中的產品分頁")
+    p_list.add_argument("--config", "-c", default=CONFIG_FILE, help=f"設定檔（預設 {CONFIG_FILE}）")
+    p_list.add_argument("--site", action="append", default=None,
+                        help="要列出的站點，可重複指定（預設全部）")
+
+    for sp in (p_run, p_list):
+        sp.add_argument("--product", "-p", action="append", default=None,
+                        help="以 glob 挑選產品分頁（例如 \"QFH610B*\"，\"*\" 為全部），可重複指定；"
+                             "run 時取代設定檔中的產品清單")
+
+    p_report = sub.add_parser("report", help="處理單一 control table 的產品分頁")
+    p_report.add_argument("--input", "-i", default=INPUT_FILE, help="control table 檔案")
+    p_report.add_argument("--sheet", "-s", action="append", default=None,
+                          help="要處理的產品分頁，可重複指定（預設全部）")
+    p_report.add_argument("--output-dir", "-o", default=".", help="輸出資料夾")
+    p_report.add_argument("--target", type=float, default=TARGET_YIELD, help="標準線（預設 0.98）")
+
+    p_merge = sub.add_parser("merge", help="合併 *_yield_trend.xlsx 成站點 workbook")
+    p_merge.add_argument("files", nargs="*", help="要合併的檔案（與 --site 擇一）")
+    p_merge.add_argument("--output", "-o", default=None,
+                         help="輸出檔（--site 時預設為 <站點資料夾>/<站點>_yield_trend.xlsx）")
+    p_merge.add_argument("--config", "-c", default=CONFIG_FILE, help=f"設定檔（預設 {CONFIG_FILE}）")
+    p_merge.add_argument("--site", action="append", default=None,
+                         help="合併站點資料夾中的所有 *_yield_trend.xlsx，可重複指定")
+
+    p_status = sub.add_parser("status", help="讀取資料夾中每週的 New product FT status 週報")
+    p_status.add_argument("folder", nargs="?", default=".", help="週報所在的資料夾（預設目前資料夾）")
+    p_status.add_argument("--jobs", "-j", type=int, default=1,
+                          help="平行解析週報的行程數（預設 1，不開子行程）")
+    add_cache_arguments(p_status)
+    p_status.add_argument("--reader", choices=READERS, default=None,
+                          help=f"週報的讀取方式（預設 {DEFAULT_READER}）")
+
+    for sp in (p_run, p_report):
+        sp.add_argument("--engine", choices=ENGINES, default=DEFAULT_ENGINE,
+                        help=f"輸出 workbook 的方式（預設 {DEFAULT_ENGINE}）")
+        add_snapshot_arguments(sp)
+        add_cache_arguments(sp)
+        sp.add_argument("--reader", choices=READERS, default=None,
+                        help=f"control table 的讀取方式（預設依設定檔，沒有設定時 {DEFAULT_READER}）")
+        sp.add_argument("--rollup", action="append", choices=list(ROLLUP_FREQS), default=[],
+                        help="各 FT 分頁後面加上每週（ISO 週）/ 每月的彙總分頁與趨勢圖，可重複指定")
+
+    return p
+
+
+def cmd_run(args) -> int:
+    sites = select_sites(load_config(args.config), args.site)
+    if args.product:
+        sites = [expand_site(site, args.product) for site in sites]
+    results = run_sites(sites, args.engine, functools.partial(snapshot_from_args, args), args.jobs, args.merged,
+                        cache_from_args(args), args.incremental, args.reader, args.rollup)
+    failed = [r for r in results if not r.ok]
+    if args.check_report:
+        report = write_check_report([(r.site, r.sheet, r.discrepancies) for r in results
+                                     if r.discrepancies is not None], args.check_report)
+        print(f"\n✅ 驗算報告（{len(report)} 個不符的 lot）已儲存：{args.check_report}")
+    print(f"\n完成 {len(results) - len(failed)} / {len(results)} 個產品")
+    for r in failed:
+        print(f"❌ {r.site} / {r.sheet}: {r.error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+def cmd_report(args) -> int:
+    # 與 run 相同多讀 Tester、Tested Qty（週 / 月彙總以 Tested Qty 加權）
+    frames = read_product_sheets(args.input, args.sheet, cache_from_args(args), args.reader,
+                                 columns=KEEP_COLUMNS + DETAIL_COLUMNS)
+
+    os.makedirs(args.output_dir, exist_ok=True)
+    failed = 0
+    for sheet_name, df in frames.items():
+        output_file = os.path.join(args.output_dir, output_name(sheet_name))
+        snapshot_dir = os.path.join(args.output_dir, "debug_snapshots", os.path.splitext(output_name(sheet_name))[0])
+        try:
+            run_product(df, output_file, args.target, snapshot_from_args(args, snapshot_dir), args.engine,
+                        args.rollup)
+            print(f"✅ {output_file} 已成功儲存")
+        except Exception as e:
+            failed += 1
+            print(f"❌ {sheet_name} 發生錯誤: {e}", file=sys.stderr)
+            traceback.print_exc()
+
+    return 1 if failed else 0
+
+
+def cmd_list(args) -> int:
+    for site in select_sites(load_config(args.config), args.site):
+        configured = {p.sheet for p in site.products}
+        print(f"{site.name}（{site.input_path}）")
+        for product in discover_products(site.input_path, args.product):
+            mark = "*" if product.sheet in configured else " "
+            print(f" {mark} {product.device:<10} {product.variant:<16} {product.sheet}")
+    print("\n* = 已列在設定檔中")
+    return 0
+
+
+def cmd_status(args) -> int:
+    weeks = load_status_folder(args.folder, cache_from_args(args), args.jobs, args.reader)
+    if not weeks:
+        print(f"❌ {args.folder} 中沒有週報 (New product FT status Wxx.xlsx)", file=sys.stderr)
+        return 1
+    for week, status in weeks.items():
+        latest = status.trend["Week"].max() if len(status.trend) else "-"
+        print(f" {week}  明細 {len(status.lots):>5} 列 / {status.lots['Sheet'].nunique()} 分頁"
+              f"  週趨勢 {status.trend['Sheet'].nunique()} 分頁（最新 {latest}）  {os.path.basename(status.path)}")
+    return 0
+
+
+def cmd_merge(args) -> int:
+    if args.files:
+        if args.site or not args.output:
+            raise ValueError("指定檔案時請用 -o 指定輸出檔，且不能同時使用 --site")
+        jobs = [(args.files, args.output)]
+    elif args.site:
+        sites = select_sites(load_config(args.config), args.site)
+        if args.output and len(sites) > 1:
+            raise ValueError("合併多個站點時不能指定 -o")
+        jobs = []
+        for site in sites:
+            output_file = args.output or site.merged_path
+            # -o 指定其他路徑時，舊的站點合併檔也不是來源
+            jobs.append((site_trend_files(site.dir, output_file, site.merged_path), output_file))
+    else:
+        raise ValueError("請指定要合併的檔案或 --site")
+
+    for files, output_file in jobs:
+        merge_workbooks(files, output_file)
+        print(f"\n✅ 合併完成，儲存為：{output_file}")
+    return 0
+
+
+def main(argv: Optional[list[str]] = None) -> int:
+    argv = argv if argv is not None else sys.argv[1:]
+    args = build_parser().parse_args(argv)
+
+    try:
+        if args.cmd == "run":
+            return cmd_run(args)
+        if args.cmd == "merge":
+            return cmd_merge(args)
+        if args.cmd == "list":
+            return cmd_list(args)
+        if args.cmd == "status":
+            return cmd_status(args)
+        return cmd_report(args)
+    except FileNotFoundError as e:
+        print(f"❌ 找不到檔案，請檢查檔案名稱和路徑: {e.filename}", file=sys.stderr)
+        return 2
+    except ValueError as e:
+        print(f"❌ 發生錯誤: {e}", file=sys.stderr)
+        return 2
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,316 @@
+"""多站點、多產品批次執行
+
+在同一個 Python 行程中處理設定檔裡的所有產品：每個 control table 只開啟、
+解析一次（各站點內容相同的副本也只解析一次），pandas / openpyxl 也只載入一次，
+不必每個產品各跑一支腳本。
+--jobs N 時各產品的報表在 N 個子行程中平行產生。
+
+--incremental 時每個產品只轉換、驗算、統計上次執行後新增的 lot（見 incremental.py）。
+
+每個產品都以 bin 數量驗算分頁中的 yield（見 validate.py），不符的 lot 記在
+ProductResult.discrepancies；各 FT 分頁旁邊加上 fail bin 柏拉圖（見 pareto.py）。
+每個產品加上 Tester 分頁，站點所有產品的 Tester 再排成一張熱度圖（見 testers.py）：
+--merged 時放在合併檔最後，否則另存成 <站點>_tester_heatmap.xlsx。
+--rollup week / month 時各 FT 分頁後面加上每週 / 每月彙總分頁（見 rollup.py）。
+
+--merged 時每個站點的所有產品在同一次寫入中輸出成站點合併檔
+（例如 鴻谷/鴻谷_yield_trend.xlsx），不必先寫各產品的檔案再用 merge 重新讀取。
+"""
+
+from __future__ import annotations
+
+import os
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+
+from .cache import ParseCache, file_hash, open_workbook
+from .config import Product, Site
+from .incremental import STATE_DIR, HistoryStore, prepare_derived
+from .pareto import bin_counts, pareto_from_counts
+from .pipeline import (COUNT_COLUMNS, DETAIL_COLUMNS, KEEP_COLUMNS, lot_table, parse_product_sheet,
+                       prepare_cached, sheet_prefix, write_report, write_site_report)
+from .rollup import ROLLUP_FREQS, rollup_sheets, rollup_sums
+from .schema import memory_report
+from .testers import HEATMAP_SHEET, tester_heatmap, tester_sums, tester_table, write_tester_heatmap
+from .validate import check_yields, discrepancies
+
+# 報表欄位之外多讀 Tester 與 bin 數量，供 testers.tester_stats 與 validate.check_yields 使用
+READ_COLUMNS = tuple(dict.fromkeys(KEEP_COLUMNS + DETAIL_COLUMNS + COUNT_COLUMNS))
+
+
+@dataclass
+class ProductResult:
+    """一個產品的執行結果；error 為 None 代表成功。"""
+    site: str
+    sheet: str
+    output: str
+    error: Optional[str] = None
+    discrepancies: Optional[pd.DataFrame] = None
+    testers: Optional[pd.DataFrame] = None
+
+    @property
+    def ok(self) -> bool:
+        return self.error is None
+
+
+def read_sheets(path: str, sheets: Iterable[str], cache: Optional[ParseCache] = None,
+                reader: Optional[str] = None) -> dict[str, object]:
+    """開啟 control table 一次，讀取指定的產品分頁（有 cache 時優先讀快取）。
+
+    回傳 {分頁名稱: DataFrame 或 Exception}，讀取失敗的分頁以例外表示，
+    讓其他產品可以繼續處理；無法開啟檔案時每個分頁都是同一個例外。
+    """
+    sheets = list(dict.fromkeys(sheets))
+    frames = {}
+    try:
+        with open_workbook(path, cache, reader) as xls:
+            for sheet in sheets:
+                try:
+                    frames[sheet] = parse_product_sheet(xls, sheet, READ_COLUMNS)
+                except Exception as e:
+                    frames[sheet] = e
+    except Exception as e:
+        print(f"❌ 無法讀取 {path}: {e}")
+        frames = dict.fromkeys(sheets, e)
+    return frames
+
+
+def read_site_sheets(site: Site, cache: Optional[ParseCache] = None,
+                     reader: Optional[str] = None) -> dict[str, object]:
+    """讀取一個站點所有產品的分頁，見 read_sheets。"""
+    return read_sheets(site.input_path, [p.sheet for p in site.products], cache, reader)
+
+
+def read_all_sites(sites: list[Site], cache: Optional[ParseCache] = None,
+                   reader: Optional[str] = None, jobs: int = 1) -> list[tuple[Site, dict[str, object]]]:
+    """讀取所有站點的 control table，內容相同的檔案只解析一次。
+
+    以內容雜湊 (SHA-256) 把站點分組，同一份內容只開啟一次、讀取各站點需要的
+    分頁聯集，解析好的 DataFrame 由這些站點共用（prepare 會先 copy，不會互相影響）。
+    jobs > 1 時不同的檔案在子行程中平行解析。
+    """
+    groups: dict[str, list[Site]] = {}
+    for site in sites:
+        try:
+            key = file_hash(site.input_path)
+        except OSError:
+            key = site.input_path  # 讓 read_sheets 回報找不到檔案
+        groups.setdefault(key, []).append(site)
+    if len(groups) < len(sites):
+        print(f"[讀取] {len(sites)} 個站點共 {len(groups)} 份不同的 control table")
+
+    tasks = [(members[0].input_path, [p.sheet for s in members for p in s.products],
+              cache, reader or members[0].reader) for members in groups.values()]
+    if jobs <= 1 or len(tasks) <= 1:
+        parsed = [read_sheets(*task) for task in tasks]
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(tasks))) as pool:
+            futures = [pool.submit(read_sheets, *task) for task in tasks]
+            parsed = []
+            for (path, sheets, _, _), future in zip(tasks, futures):
+                try:
+                    parsed.append(future.result())
+                except Exception as e:  # 子行程異常結束（例如 BrokenProcessPool）
+                    parsed.append(dict.fromkeys(sheets, e))
+
+    shared = {id(site): frames for members, frames in zip(groups.values(), parsed) for site in members}
+    return [(site, {p.sheet: shared[id(site)][p.sheet] for p in site.products}) for site in sites]
+
+
+def _snapshot_dir(site: Site, product: Product) -> str:
+    return os.path.join(site.dir, "debug_snapshots", os.path.splitext(product.output)[0])
+
+
+def _partials(raw: pd.DataFrame, df_cleaned: pd.DataFrame, freqs: Iterable[str]) -> dict[str, pd.DataFrame]:
+    """可以分段計算再接起來的統計：驗算（每個 lot 一列）、bin 數量、Tester 與週 / 月合計。
+
+    --incremental 時與歷史一起保存，每次只計算新的 lot（見 incremental.prepare_derived）；
+    項目改變時要更新 incremental.STATE_VERSION。
+    """
+    lots = lot_table(raw)
+    return {"check": check_yields(raw, lots), "bins": bin_counts(raw, lots), "testers": tester_sums(df_cleaned),
+            **{f"rollup {freq}": rollup_sums(df_cleaned, freq) for freq in freqs}}
+
+
+def _analyse(site: Site, product: Product, df, snapshot_factory: Optional[Callable[[str], Callable]],
+             incremental: Optional[str], rollup: tuple[str, ...] = (),
+             cache: Optional[ParseCache] = None) -> tuple[pd.DataFrame, pd.DataFrame, dict, pd.DataFrame, dict]:
+    """步驟 2️⃣~5️⃣ 與驗算、柏拉圖、Tester、週 / 月彙總，回傳
+    (df_cleaned, 驗算差異, pareto_sheets, tester_stats, rollup_sheets)。
+
+    incremental 為 "append" 時只處理新增的 lot，"rebuild" 時完整重算並重設狀態；
+    沒有 incremental 時 prepare 的結果存在 cache 中（見 pipeline.prepare_cached）。
+    印出 apply_schema 前後同一批列的記憶體用量（增量時只有這次轉換的列，讀快取時不印）。
+    """
+    if isinstance(df, Exception):
+        raise df
+    snapshot = snapshot_factory(_snapshot_dir(site, product)) if snapshot_factory else None
+
+    def report(untyped: pd.DataFrame, typed: pd.DataFrame) -> None:
+        if len(untyped):
+            print(f"[記憶體] {site.name} / {product.sheet}：{memory_report(untyped, typed)}"
+                  f"（{len(untyped)} 列，轉換型態前 → 後）")
+
+    if incremental is None:
+        df_cleaned = prepare_cached(df, cache, snapshot, report)
+        parts = _partials(df, df_cleaned, rollup)
+    else:
+        store = HistoryStore(os.path.join(site.dir, STATE_DIR))
+        key = f"{os.path.basename(site.input_path)}::{product.sheet}"
+        # 所有週期都保存，下次換了 --rollup 也不必重算
+        df_cleaned, parts = prepare_derived(df, store, key, lambda raw, cleaned: _partials(raw, cleaned, ROLLUP_FREQS),
+                                            snapshot, incremental == "rebuild", report)
+    return (df_cleaned, _check(site, product, parts["check"].reset_index(drop=True)),
+            pareto_from_counts(parts["bins"]), tester_table(parts["testers"]),
+            rollup_sheets(df_cleaned, rollup, {freq: parts[f"rollup {freq}"] for freq in rollup}))
+
+
+def _check(site: Site, product: Product, check: pd.DataFrame) -> pd.DataFrame:
+    """印出 validate.check_yields 結果中不符的 lot 數，回傳差異。"""
+    issues = discrepancies(check)
+    if len(issues):
+        print(f"[驗算] {site.name} / {product.sheet}：{len(issues)} / {len(check)} 個 lot 與 bin 數量不符")
+    return issues
+
+
+def _run_job(site: Site, product: Product, df, engine: Optional[str],
+             snapshot_factory: Optional[Callable[[str], Callable]],
+             incremental: Optional[str] = None, rollup: tuple[str, ...] = (),
+             cache: Optional[ParseCache] = None) -> ProductResult:
+    """處理一個產品（可在子行程中執行）；df 為讀取時的例外時直接回報錯誤。"""
+    output_file = site.output_path(product)
+    try:
+        df_cleaned, issues, pareto, testers, rollups = _analyse(site, product, df, snapshot_factory,
+                                                                incremental, rollup, cache)
+        write_report(df_cleaned, output_file, product.target, engine, pareto, testers, rollups)
+    except Exception as e:
+        print(f"❌ {site.name} / {product.sheet} 發生錯誤: {e}")
+        traceback.print_exc()
+        return ProductResult(site.name, product.sheet, output_file, str(e))
+    print(f"✅ {output_file} 已成功儲存")
+    return ProductResult(site.name, product.sheet, output_file, discrepancies=issues, testers=testers)
+
+
+def _run_site_merged(site: Site, frames: dict[str, object], engine: Optional[str],
+                     snapshot_factory: Optional[Callable[[str], Callable]],
+                     incremental: Optional[str] = None,
+                     rollup: tuple[str, ...] = (),
+                     cache: Optional[ParseCache] = None) -> list[ProductResult]:
+    """處理站點的所有產品並寫成一個合併檔（可在子行程中執行）。
+
+    失敗的產品不寫入合併檔，其他產品照常輸出；每個產品的結果 output 都是合併檔路徑。
+    """
+    output_file = site.merged_path
+    prepared, errors, issues, testers = [], {}, {}, {}
+    for product in site.products:
+        try:
+            df_cleaned, issues[product.sheet], pareto, testers[product.sheet], rollups = _analyse(
+                site, product, frames[product.sheet], snapshot_factory, incremental, rollup, cache)
+            prepared.append((product, df_cleaned, pareto, testers[product.sheet], rollups))
+        except Exception as e:
+            print(f"❌ {site.name} / {product.sheet} 發生錯誤: {e}")
+            traceback.print_exc()
+            errors[product.sheet] = str(e)
+
+    if prepared:
+        try:
+            heatmap = tester_heatmap({sheet_prefix(p.output): testers[p.sheet] for p, *_ in prepared})
+            write_site_report([(sheet_prefix(p.output), df_cleaned, p.target, *details)
+                               for p, df_cleaned, *details in prepared], output_file, engine,
+                              {HEATMAP_SHEET: heatmap} if len(heatmap) else None)
+            print(f"✅ {output_file} 已成功儲存")
+        except Exception as e:
+            print(f"❌ {site.name} 合併檔輸出失敗: {e}")
+            traceback.print_exc()
+            errors.update((p.sheet, str(e)) for p, *_ in prepared)
+    return [ProductResult(site.name, p.sheet, output_file, errors.get(p.sheet), issues.get(p.sheet),
+                          testers.get(p.sheet)) for p in site.products]
+
+
+def run_sites(sites: Iterable[Site], engine: Optional[str] = None,
+              snapshot_factory: Optional[Callable[[str], Callable]] = None,
+              jobs: int = 1, merged: bool = False,
+              cache: Optional[ParseCache] = None,
+              incremental: Optional[str] = None,
+              reader: Optional[str] = None,
+              rollup: Iterable[str] = ()) -> list[ProductResult]:
+    """處理每個站點的所有產品，回傳每個產品的結果（順序與設定檔相同）。
+
+    control table 由 read_all_sites 讀取（內容相同的檔案只解析一次，jobs > 1 時
+    不同的檔案平行解析）；jobs > 1 時把各產品已篩選好的 DataFrame 交給
+    ProcessPoolExecutor 平行產生報表（圖表與 workbook 序列化都是 CPU 密集），
+    子行程不會重新讀取 xlsx。
+
+    snapshot_factory(目錄) 回傳 snapshot callback（見 snapshots.snapshot_from_args），
+    為 None 時不輸出中間資料；jobs > 1 時它必須可以 pickle。
+
+    merged=True 時每個站點只輸出一個合併檔（Site.merged_path），平行的單位是站點。
+    cache 為 cache.ParseCache 時，內容沒變的 control table 直接讀快取，prepare 的結果也一併快取。
+    incremental 為 "append" 時只轉換新增的 lot（狀態存在 <站點資料夾>/.ftyield_state），
+    "rebuild" 時完整重算並重設狀態。reader 選擇 control table 的讀取方式（見 readers.py），
+    None 時使用各站點設定的 reader。rollup 為 rollup.ROLLUP_FREQS 的鍵（"week"、"month"）。
+    """
+    site_frames = read_all_sites(list(sites), cache, reader, jobs)
+    rollup = tuple(rollup)
+
+    if merged:
+        return _run_merged(site_frames, engine, snapshot_factory, jobs, incremental, rollup, cache)
+
+    tasks = [(site, product, frames[product.sheet]) for site, frames in site_frames for product in site.products]
+
+    if jobs <= 1 or len(tasks) <= 1:
+        results = [_run_job(site, product, df, engine, snapshot_factory, incremental, rollup, cache)
+                   for site, product, df in tasks]
+        _write_heatmaps([site for site, _ in site_frames], results, engine)
+        return results
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_run_job, site, product, df, engine, snapshot_factory, incremental, rollup, cache)
+                   for site, product, df in tasks]
+        results = []
+        for (site, product, _), future in zip(tasks, futures):
+            try:
+                results.append(future.result())
+            except Exception as e:  # 子行程異常結束（例如 BrokenProcessPool）
+                results.append(ProductResult(site.name, product.sheet, site.output_path(product), str(e)))
+    _write_heatmaps([site for site, _ in site_frames], results, engine)
+    return results
+
+
+def _write_heatmaps(sites: list[Site], results: list[ProductResult], engine: Optional[str]) -> None:
+    """沒有 --merged 時，每個站點把成功產品的 Tester 統計寫成 Site.tester_heatmap_path。"""
+    for site in sites:
+        tables = {sheet_prefix(r.output): r.testers for r in results
+                  if r.site == site.name and r.ok and r.testers is not None and len(r.testers)}
+        if not tables:
+            continue
+        try:
+            write_tester_heatmap(tables, site.tester_heatmap_path, engine)
+            print(f"✅ {site.tester_heatmap_path} 已成功儲存")
+        except Exception as e:
+            print(f"❌ {site.name} Tester 熱度圖輸出失敗: {e}")
+
+
+def _run_merged(site_frames: list, engine: Optional[str],
+                snapshot_factory: Optional[Callable[[str], Callable]], jobs: int,
+                incremental: Optional[str], rollup: tuple[str, ...] = (),
+                cache: Optional[ParseCache] = None) -> list[ProductResult]:
+    if jobs <= 1 or len(site_frames) <= 1:
+        return [r for site, frames in site_frames
+                for r in _run_site_merged(site, frames, engine, snapshot_factory, incremental, rollup, cache)]
+
+    with ProcessPoolExecutor(max_workers=jobs) as pool:
+        futures = [pool.submit(_run_site_merged, site, frames, engine, snapshot_factory, incremental, rollup,
+                               cache)
+                   for site, frames in site_frames]
+        results = []
+        for (site, _), future in zip(site_frames, futures):
+            try:
+                results.extend(future.result())
+            except Exception as e:  # 子行程異常結束（例如 BrokenProcessPool）
+                results.extend(ProductResult(site.name, p.sheet, site.merged_path, str(e)) for p in site.products)
+    return results
@@ -0,0 +1,249 @@
+"""control table 解析快取
+
+三個站點資料夾各有一份 Sunplus_Yield_control_table.xlsx，每次執行都要重新
+pd.read_excel。這裡以 workbook 的內容雜湊 (SHA-256) + 分頁名稱 + 讀取參數為鍵，
+把選好欄位、轉換型態後的產品分頁（parse_product_sheet 的結果，見 schema.sheet_schema）
+存成 Parquet；檔案內容沒變時直接讀快取，完全不開啟 xlsx。prepare 的結果也以
+分頁內容的雜湊 (frame_hash) 為鍵存成 Parquet（見 pipeline.prepare_cached）。
+
+- 分頁清單、找不到表頭的分頁（例如 工作表1）也一併快取，讀取所有分頁時同樣不必開啟 workbook
+- 只存 Parquet：無法存成 Parquet 的 DataFrame（或沒有安裝 pyarrow）印出警告、不寫入快取
+- 快取總大小超過上限時，依最後使用時間刪除最舊的項目 (LRU)
+"""
+
+from __future__ import annotations
+
+import contextlib
+import hashlib
+import json
+import os
+from typing import Callable, Optional
+
+import pandas as pd
+
+from .readers import open_reader
+
+CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "ftyield")
+CACHE_MAX_MB = 512
+# 2：只存 Parquet，快取內容改為 sheet_schema 轉換後的產品分頁與 prepare 的結果
+CACHE_VERSION = "2"
+
+_HASH_CHUNK = 1 << 20
+# 寫到一半的暫存檔（<項目>.<pid>.tmp），evict 不會動到
+TMP_SUFFIX = ".tmp"
+
+
+def file_hash(path: str) -> str:
+    """workbook 內容的 SHA-256（與檔名、修改時間無關）。"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def frame_hash(df: pd.DataFrame) -> str:
+    """DataFrame 內容（欄名、型態、各列的值）的 SHA-256。"""
+    digest = hashlib.sha256(repr([(str(c), str(t)) for c, t in df.dtypes.items()]).encode("utf-8"))
+    digest.update(pd.util.hash_pandas_object(df, index=True).to_numpy().tobytes())
+    return digest.hexdigest()
+
+
+class ParseCache:
+    """以內容雜湊為鍵的 DataFrame 快取目錄，超過 max_bytes 時以 LRU 清除。"""
+
+    def __init__(self, directory: str = CACHE_DIR, max_bytes: int = CACHE_MAX_MB << 20):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        os.makedirs(directory, exist_ok=True)
+
+    def _key(self, content_hash: str, *parts) -> str:
+        text = "\0".join([CACHE_VERSION, content_hash, *map(str, parts)])
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _find(self, key: str) -> Optional[str]:
+        for ext in (".parquet", ".json"):
+            path = os.path.join(self.directory, key + ext)
+            try:
+                os.utime(path)  # 更新最後使用時間，供 LRU 判斷
+            except FileNotFoundError:  # 不存在，或剛被其他行程清掉
+                continue
+            return path
+        return None
+
+    def get_frame(self, content_hash: str, sheet_name: str, options: str) -> Optional[pd.DataFrame]:
+        path = self._find(self._key(content_hash, sheet_name, options))
+        if path is None:
+            return None
+        if not path.endswith(".parquet"):
+            return None
+        try:
+            return pd.read_parquet(path)
+        except Exception as e:  # 損壞的快取視為沒有命中
+            print(f"[快取] 無法讀取 {path}，重新解析: {e}")
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(path)
+            return None
+
+    def put_frame(self, content_hash: str, sheet_name: str, options: str, df: pd.DataFrame) -> Optional[str]:
+        """存成 Parquet，回傳檔案路徑；無法存成 Parquet 時印出警告、不寫入快取並回傳 None。"""
+        path = os.path.join(self.directory, self._key(content_hash, sheet_name, options) + ".parquet")
+        # --jobs 的子行程可能同時寫同一個項目，暫存檔名加上 pid
+        tmp = f"{path}.{os.getpid()}{TMP_SUFFIX}"
+        try:
+            df.to_parquet(tmp)
+        except Exception as e:  # 混合型態的欄位、沒有安裝 pyarrow…
+            with contextlib.suppress(FileNotFoundError):
+                os.remove(tmp)
+            print(f"[快取] {sheet_name} 無法存成 Parquet，不寫入快取: {e}")
+            return None
+        os.replace(tmp, path)
+        self.evict()
+        return path
+
+    def get_error(self, content_hash: str, sheet_name: str, options: str) -> Optional[str]:
+        """put_error 記下的錯誤訊息；沒有記錄時為 None。"""
+        path = self._find(self._key(content_hash, sheet_name, options, "error"))
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)["error"]
+        except FileNotFoundError:  # 剛被其他行程清掉
+            return None
+
+    def put_error(self, content_hash: str, sheet_name: str, options: str, message: str) -> None:
+        path = os.path.join(self.directory, self._key(content_hash, sheet_name, options, "error") + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"error": message}, f, ensure_ascii=False)
+
+    def get_sheet_names(self, content_hash: str) -> Optional[list[str]]:
+        path = self._find(self._key(content_hash, "sheet_names"))
+        if path is None:
+            return None
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except FileNotFoundError:  # 剛被其他行程清掉
+            return None
+
+    def put_sheet_names(self, content_hash: str, names: list[str]) -> None:
+        path = os.path.join(self.directory, self._key(content_hash, "sheet_names") + ".json")
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump(list(names), f, ensure_ascii=False)
+
+    def _entries(self) -> list[tuple[str, os.stat_result]]:
+        """快取項目與其 stat；略過其他行程寫到一半的暫存檔與剛被刪除的檔案。"""
+        entries = []
+        for entry in os.scandir(self.directory):
+            if entry.name.endswith(TMP_SUFFIX):
+                continue
+            try:
+                if entry.is_file():
+                    entries.append((entry.path, entry.stat()))
+            except FileNotFoundError:
+                continue
+        return entries
+
+    def size(self) -> int:
+        return sum(stat.st_size for _, stat in self._entries())
+
+    def evict(self) -> list[str]:
+        """刪除最久沒用到的項目直到總大小不超過 max_bytes，回傳刪除的檔案。
+
+        多個行程同時清除時，已被其他行程刪除的檔案直接略過。
+        """
+        entries = sorted(self._entries(), key=lambda e: e[1].st_mtime)
+        total = sum(stat.st_size for _, stat in entries)
+        removed = []
+        for path, stat in entries:
+            if total <= self.max_bytes:
+                break
+            total -= stat.st_size
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                continue
+            removed.append(path)
+        return removed
+
+
+class CachedWorkbook:
+    """與 pd.ExcelFile 相同用法（sheet_names、parse、with），命中快取時不開啟 workbook。"""
+
+    def __init__(self, path: str, cache: ParseCache, reader: Optional[str] = None):
+        self.path = path
+        self.cache = cache
+        self.reader = reader
+        self.content_hash = file_hash(path)
+        self._xls = None
+
+    def _open(self) -> pd.ExcelFile:
+        if self._xls is None:
+            self._xls = open_reader(self.path, self.reader)
+        return self._xls
+
+    @property
+    def sheet_names(self) -> list[str]:
+        names = self.cache.get_sheet_names(self.content_hash)
+        if names is None:
+            names = self._open().sheet_names
+            self.cache.put_sheet_names(self.content_hash, names)
+        return names
+
+    def parse(self, sheet_name: str, **kwargs) -> pd.DataFrame:
+        """直接讀取（不經過快取）；需要快取的結果用 frame。"""
+        return self._open().parse(sheet_name, **kwargs)
+
+    def frame(self, sheet_name: str, options: str, build: Callable[[], pd.DataFrame]) -> pd.DataFrame:
+        """sheet_name + options 的快取結果；沒有命中時呼叫 build() 並存起來。
+
+        build 丟出的 ValueError（例如找不到表頭）也記在快取，下次直接丟出相同的錯誤。
+        """
+        df = self.cache.get_frame(self.content_hash, sheet_name, options)
+        if df is not None:
+            return df
+        error = self.cache.get_error(self.content_hash, sheet_name, options)
+        if error is not None:
+            raise ValueError(error)
+        try:
+            df = build()
+        except ValueError as e:
+            self.cache.put_error(self.content_hash, sheet_name, options, str(e))
+            raise
+        self.cache.put_frame(self.content_hash, sheet_name, options, df)
+        return df
+
+    def close(self) -> None:
+        if self._xls is not None:
+            self._xls.close()
+            self._xls = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def open_workbook(path: str, cache: Optional[ParseCache] = None, reader: Optional[str] = None):
+    """cache 為 None 時直接以 reader 開啟（見 readers.py），否則回傳經過快取的 CachedWorkbook。
+
+    各 reader 的結果相同，所以快取鍵不包含 reader。
+    """
+    return open_reader(path, reader) if cache is None else CachedWorkbook(path, cache, reader)
+
+
+def add_cache_arguments(parser) -> None:
+    """在 argparse parser 上加入快取相關選項。"""
+    parser.add_argument("--no-cache", action="store_true", help="不使用解析快取，每次重新讀取 xlsx")
+    parser.add_argument("--cache-dir", default=CACHE_DIR, help=f"快取資料夾（預設 {CACHE_DIR}）")
+    parser.add_argument("--cache-max-mb", type=int, default=CACHE_MAX_MB,
+                        help=f"快取大小上限 MB，超過時刪除最久沒用到的項目（預設 {CACHE_MAX_MB}）")
+
+
+def cache_from_args(args) -> Optional[ParseCache]:
+    """依命令列選項建立 ParseCache；--no-cache 時回傳 None。"""
+    if args.no_cache:
+        return None
+    return ParseCache(args.cache_dir, args.cache_max_mb << 20)
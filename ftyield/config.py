@@ -0,0 +1,115 @@
+"""站點 / 產品設定檔
+
+取代每個產品各複製一份的腳本：ftyield.toml 列出每個站點的資料夾、control
+table 與要輸出的產品分頁，例如
+
+  [sites."鴻谷"]
+  dir = "鴻谷"
+  products = [
+    { sheet = "QAH648B 64MCM(QFN)", output = "QAH648B_QFN64_yield_trend.xlsx" },
+  ]
+
+路徑以設定檔所在的資料夾為基準；target 可以寫在 [defaults]、站點或產品上，
+reader（control table 的讀取方式，見 readers.py）可以寫在 [defaults] 或站點上。
+"""
+
+from __future__ import annotations
+
+import os
+from dataclasses import dataclass, field
+from typing import Optional
+
+try:
+    import tomllib
+except ImportError:  # pragma: no cover - Python < 3.11
+    import tomli as tomllib
+
+from .pipeline import INPUT_FILE, TARGET_YIELD, output_name
+from .readers import DEFAULT_READER, READERS
+
+CONFIG_FILE = "ftyield.toml"
+
+
+@dataclass(frozen=True)
+class Product:
+    """一個產品分頁與它的輸出檔。"""
+    sheet: str
+    output: str
+    target: float = TARGET_YIELD
+
+
+@dataclass(frozen=True)
+class Site:
+    """一個站點：資料夾、control table 與產品清單。"""
+    name: str
+    dir: str
+    input: str
+    products: tuple[Product, ...] = field(default_factory=tuple)
+    reader: str = DEFAULT_READER
+    target: float = TARGET_YIELD
+
+    @property
+    def input_path(self) -> str:
+        return os.path.join(self.dir, self.input)
+
+    def output_path(self, product: Product) -> str:
+        return os.path.join(self.dir, product.output)
+
+    @property
+    def merged_path(self) -> str:
+        """站點合併檔（與 merged-1.py 的成品同名，例如 鴻谷/鴻谷_yield_trend.xlsx）。"""
+        return os.path.join(self.dir, f"{self.name}_yield_trend.xlsx")
+
+    @property
+    def tester_heatmap_path(self) -> str:
+        """沒有 --merged 時站點的 Tester 熱度圖（例如 鴻谷/鴻谷_tester_heatmap.xlsx）。"""
+        return os.path.join(self.dir, f"{self.name}_tester_heatmap.xlsx")
+
+
+def parse_config(data: dict, base_dir: str = ".") -> dict[str, Site]:
+    """把 TOML 解析後的 dict 轉成 {站點名稱: Site}。"""
+    defaults = data.get("defaults", {})
+    sites = {}
+    for name, entry in data.get("sites", {}).items():
+        target = entry.get("target", defaults.get("target", TARGET_YIELD))
+        products = []
+        for item in entry.get("products", []):
+            if "sheet" not in item:
+                raise ValueError(f"站點 {name} 的產品設定缺少 sheet: {item}")
+            products.append(Product(
+                sheet=item["sheet"],
+                output=item.get("output", output_name(item["sheet"])),
+                target=item.get("target", target),
+            ))
+        reader = entry.get("reader", defaults.get("reader", DEFAULT_READER))
+        if reader not in READERS:
+            raise ValueError(f"站點 {name} 的 reader 必須是 {READERS} 之一: {reader}")
+        sites[name] = Site(
+            name=name,
+            dir=os.path.join(base_dir, entry.get("dir", name)),
+            input=entry.get("input", defaults.get("input", INPUT_FILE)),
+            products=tuple(products),
+            reader=reader,
+            target=target,
+        )
+    return sites
+
+
+def load_config(path: str = CONFIG_FILE) -> dict[str, Site]:
+    """讀取 ftyield.toml。"""
+    with open(path, "rb") as f:
+        data = tomllib.load(f)
+    return parse_config(data, os.path.dirname(os.path.abspath(path)))
+
+
+def select_sites(sites: dict[str, Site], names: Optional[list[str]] = None) -> list[Site]:
+    """依名稱挑選站點；名稱也可以是資料夾名稱（例如 矽格北興-93k）。names 為空時回傳全部。"""
+    if not names:
+        return list(sites.values())
+    selected = []
+    for name in names:
+        matches = [s for s in sites.values() if name in (s.name, os.path.basename(s.dir))]
+        if not matches:
+            raise ValueError(f"設定檔中沒有站點: {name}（可用：{', '.join(sites)}）")
+        selected.extend(m for m in matches if m not in selected)
+    return selected
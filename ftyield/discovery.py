@@ -0,0 +1,105 @@
+"""找出 control table 中的所有產品分頁
+
+以前每個產品要複製一支腳本、手動填 sheet_name；這裡直接從 xl/workbook.xml
+列出分頁（不載入任何儲存格），略過 工作表1 這類暫存分頁，並把分頁名稱拆成
+device 與封裝：
+
+  QAL642E LFBGA 487B      → QAL642E、LFBGA487
+  QAH648B 64MCM(QFN)      → QAH648B、QFN64
+  QUI658C 128MCM(LQFP)    → QUI658C、LQFP128
+  QFH649A E-PAD LQFP 128L → QFH649A、E-PAD-LQFP128
+
+run --product "QFH610B*" 以 glob 挑選要處理的分頁，--product "*" 處理所有產品。
+"""
+
+from __future__ import annotations
+
+import dataclasses
+import fnmatch
+import re
+import zipfile
+from dataclasses import dataclass
+from typing import Iterable, Optional
+from xml.etree.ElementTree import fromstring
+
+from .config import Product, Site
+from .pipeline import output_name
+from .readers import MAIN_NS, open_reader
+
+# Excel 新增分頁的預設名稱（中文版 工作表1、英文版 Sheet1）
+SCRATCH_SHEET = re.compile(r"^(工作表|Sheet)\s*\d*$", re.IGNORECASE)
+
+_MCM = re.compile(r"^(\d+)MCM\(([A-Z][A-Z-]*)\)?$")          # 64MCM(QFN)、128MCM(EP
+_PINS_FIRST = re.compile(r"^(\d+)([A-Z][A-Z-]*)$")             # 128LQFP
+_PINS_LAST = re.compile(r"^([A-Z][A-Z -]*?)\s+(\d+)[A-Z]?(?:_\w+)?$")  # LFBGA 487B、QFN 88L、LQFP 128L_AUTO
+
+
+@dataclass(frozen=True)
+class ProductSheet:
+    """一個產品分頁：device 代碼與封裝（無法辨識的封裝 package_type / pins 為 None）。"""
+    sheet: str
+    device: str
+    package: str
+    package_type: Optional[str] = None
+    pins: Optional[int] = None
+
+    @property
+    def variant(self) -> str:
+        """封裝簡稱，例如 QFN64、LFBGA487；無法辨識時為原本的封裝文字。"""
+        if self.package_type is None:
+            return self.package
+        return f"{self.package_type}{self.pins}"
+
+
+def parse_sheet_name(sheet: str) -> ProductSheet:
+    """把分頁名稱拆成 device 與封裝（見模組說明）。"""
+    device, _, package = sheet.strip().partition(" ")
+    package = package.strip()
+    text = package.upper()
+    for pattern, pins_group, type_group in ((_MCM, 1, 2), (_PINS_FIRST, 1, 2), (_PINS_LAST, 2, 1)):
+        m = pattern.match(text)
+        if m:
+            package_type = "-".join(m.group(type_group).split())
+            return ProductSheet(sheet, device, package, package_type, int(m.group(pins_group)))
+    return ProductSheet(sheet, device, package)
+
+
+def list_sheets(path: str) -> list[str]:
+    """依 workbook 中的順序列出分頁名稱。
+
+    xlsx 只讀 xl/workbook.xml，不載入任何工作表；舊版 .xls 交給 readers.open_reader。
+    """
+    if zipfile.is_zipfile(path):
+        with zipfile.ZipFile(path) as zf:
+            workbook = fromstring(zf.read("xl/workbook.xml"))
+        return [sheet.get("name") for sheet in workbook.iter(MAIN_NS + "sheet")]
+    with open_reader(path) as book:
+        return list(book.sheet_names)
+
+
+def is_scratch_sheet(sheet: str) -> bool:
+    return bool(SCRATCH_SHEET.match(sheet.strip()))
+
+
+def match_sheets(sheets: Iterable[str], patterns: Optional[Iterable[str]] = None) -> list[str]:
+    """略過暫存分頁，再依 glob（例如 "QFH610B*"）挑選；patterns 為空時回傳全部產品分頁。"""
+    patterns = list(patterns or ())
+    return [s for s in sheets if not is_scratch_sheet(s)
+            and (not patterns or any(fnmatch.fnmatchcase(s, p) for p in patterns))]
+
+
+def discover_products(path: str, patterns: Optional[Iterable[str]] = None) -> list[ProductSheet]:
+    """control table 中符合 patterns 的產品分頁索引。"""
+    return [parse_sheet_name(s) for s in match_sheets(list_sheets(path), patterns)]
+
+
+def expand_site(site: Site, patterns: Iterable[str]) -> Site:
+    """以 control table 中符合 patterns 的分頁取代站點的產品清單。
+
+    設定檔中已經列出的產品沿用它的輸出檔名與 target，新發現的產品輸出
+    <分頁名稱>_FT_yield_trend.xlsx，target 為站點的預設值。
+    """
+    configured = {p.sheet: p for p in site.products}
+    products = tuple(configured.get(sheet) or Product(sheet, output_name(sheet), site.target)
+                     for sheet in match_sheets(list_sheets(site.input_path), patterns))
+    return dataclasses.replace(site, products=products)
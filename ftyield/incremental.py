@@ -0,0 +1,167 @@
+"""增量處理：只轉換新加在 control table 底部的 lot
+
+control table 是每天往下追加的紀錄，但每次執行都要對全部歷史重新做
+Station 改名、RT rate 與 dropna。這裡為每個產品分頁保存：
+
+- 已處理到的列數（high-water mark，停在最後一個有 Total 收尾的 lot 之後）
+- 該列之前所有原始資料的雜湊，用來確認舊資料沒有被修改
+- 清理後的歷史資料 (df_cleaned)
+- 可以分段計算再合併的統計（derive 的結果，例如驗算、bin 數量、Tester 與週 / 月合計）
+
+下次執行只對 high-water mark 之後的列做 prepare 與 derive，再接到歷史資料後面；
+尚未出現 Total 的 lot 不會寫進歷史，下次會重新處理。分頁被插入、刪除或
+修改過（列數變少、雜湊不符、欄位不同）時自動改回完整重算。
+
+輸出報表（FT 分頁、Summary、圖表）仍然依完整歷史產生。
+"""
+
+from __future__ import annotations
+
+import hashlib
+import json
+import os
+from typing import Callable, Optional
+
+import numpy as np
+import pandas as pd
+
+from .lots import LotTable
+from .pipeline import prepare
+from .schema import apply_schema, id_text
+
+STATE_DIR = ".ftyield_state"
+# 2：歷史資料改存 schema.apply_schema 轉換後的型態
+# 3：歷史資料多了 pipeline.DETAIL_COLUMNS（Tester、Tested Qty）
+# 4：雜湊涵蓋 high-water mark 之前的所有列，並保存 derive 的結果
+# 5：Tester 合計改以 Tested Qty 加權（schema.lot_weights）
+STATE_VERSION = 5
+
+
+def high_water_mark(raw: pd.DataFrame) -> int:
+    """最後一個有 Total 收尾的 lot 之後的列數位置（沒有完整的 lot 時為 0）。"""
+    return LotTable.from_stations(raw["Station"]).high_water_mark()
+
+
+def row_hashes(raw: pd.DataFrame) -> np.ndarray:
+    """每一列原始資料的 64 位元雜湊（不含 index）。"""
+    return pd.util.hash_pandas_object(raw, index=False).to_numpy()
+
+
+def raw_signature(raw: pd.DataFrame, rows: int, hashes: Optional[np.ndarray] = None) -> str:
+    """前 rows 列原始資料的雜湊（含欄位名稱）；hashes 為 row_hashes(raw) 時不必重算。"""
+    if hashes is None:
+        hashes = row_hashes(raw.iloc[:rows])
+    digest = hashlib.sha256(json.dumps([str(c) for c in raw.columns], ensure_ascii=False).encode("utf-8"))
+    digest.update(str(rows).encode("ascii"))
+    digest.update(hashes[:rows].tobytes())
+    return digest.hexdigest()
+
+
+class HistoryStore:
+    """每個產品分頁一組 <key>.json（high-water mark）與 <key>.pkl（清理後的歷史與 derive 的結果）。"""
+
+    def __init__(self, directory: str = STATE_DIR):
+        self.directory = directory
+
+    def _base(self, key: str) -> str:
+        return os.path.join(self.directory, hashlib.sha256(key.encode("utf-8")).hexdigest()[:32])
+
+    def load(self, key: str) -> tuple[Optional[dict], Optional[pd.DataFrame], dict[str, pd.DataFrame]]:
+        base = self._base(key)
+        try:
+            with open(base + ".json", encoding="utf-8") as f:
+                meta = json.load(f)
+            history, derived = pd.read_pickle(base + ".pkl")
+        except (OSError, ValueError, EOFError) as e:
+            if not isinstance(e, FileNotFoundError):
+                print(f"[增量] 無法讀取 {base}，改為完整重算: {e}")
+            return None, None, {}
+        if meta.get("version") != STATE_VERSION or meta.get("key") != key:
+            return None, None, {}
+        return meta, history, derived
+
+    def save(self, key: str, meta: dict, history: pd.DataFrame,
+             derived: Optional[dict[str, pd.DataFrame]] = None) -> None:
+        os.makedirs(self.directory, exist_ok=True)
+        base = self._base(key)
+        # 先寫歷史再寫 high-water mark，中斷時下次只會重算
+        pd.to_pickle((history, derived or {}), base + ".pkl.tmp", compression=None)
+        os.replace(base + ".pkl.tmp", base + ".pkl")
+        with open(base + ".json.tmp", "w", encoding="utf-8") as f:
+            json.dump({"version": STATE_VERSION, "key": key, **meta}, f, ensure_ascii=False, indent=2)
+        os.replace(base + ".json.tmp", base + ".json")
+
+
+def _describe(df_cleaned: pd.DataFrame) -> dict:
+    if df_cleaned.empty:
+        return {"last_lot": None, "last_date": None}
+    # 逐欄取值：iloc[-1] 整列會把 Int64 的 Lot# 轉成 float；只有數字的 Lot# 欄本身也可能是 float
+    return {"last_lot": id_text(df_cleaned["Lot#"].iloc[-1]), "last_date": str(df_cleaned["Date"].iloc[-1])}
+
+
+def _concat(parts: list[dict[str, pd.DataFrame]]) -> dict[str, pd.DataFrame]:
+    """把各段 derive 的結果依名稱接起來（略過空表，避免改變欄位型態）。"""
+    names = dict.fromkeys(name for part in parts for name in part)
+    return {name: pd.concat([p[name] for p in parts if name in p and len(p[name])]
+                            or [p[name] for p in parts if name in p][:1])
+            for name in names}
+
+
+def prepare_derived(raw: pd.DataFrame, store: HistoryStore, key: str,
+                    derive: Callable[[pd.DataFrame, pd.DataFrame], dict[str, pd.DataFrame]],
+                    snapshot: Optional[Callable[[pd.DataFrame, str], object]] = None,
+                    full: bool = False,
+                    on_schema: Optional[Callable[[pd.DataFrame, pd.DataFrame], object]] = None,
+                    ) -> tuple[pd.DataFrame, dict[str, pd.DataFrame]]:
+    """見 prepare_incremental；另外回傳 derive(原始分頁區段, 清理後的區段) 在完整歷史上的結果。
+
+    derive 回傳 {名稱: DataFrame}，只對上次 high-water mark 之後的列呼叫（已收尾與未收尾的
+    lot 各一次，沒有列時不呼叫），兩段的結果依序接在保存的結果後面，所以每個 DataFrame
+    必須能分段計算再 concat（例如每個 lot 一列，或之後再 groupby 加總的合計）。
+    derive 回傳的名稱或內容改變時要更新 STATE_VERSION。
+    """
+    raw = raw.reset_index(drop=True)
+    meta, history, derived = (None, None, {}) if full else store.load(key)
+    hashes = row_hashes(raw)
+    start = 0
+    if meta is not None:
+        rows = meta["rows"]
+        if rows <= len(raw) and meta["signature"] == raw_signature(raw, rows, hashes):
+            start = rows
+            print(f"[增量] {key}：從第 {start} 列開始（上次 Lot# {meta['last_lot']}，Date {meta['last_date']}）")
+        else:
+            print(f"[增量] {key}：舊資料有變動，改為完整重算")
+
+    tail = raw.iloc[start:]
+    new_rows = prepare(tail, snapshot, on_schema)
+    # start 之前都是收尾的 lot，新的區段從 FT 列開始
+    hwm = start + high_water_mark(tail)
+    # 完整重算時至少呼叫一次，讓結果有 derive 的所有名稱
+    closed = derive(raw.iloc[start:hwm], new_rows[new_rows.index < hwm]) if hwm > start or not start else {}
+    open_lots = derive(raw.iloc[hwm:], new_rows[new_rows.index >= hwm]) if hwm < len(raw) else {}
+
+    if start == 0:
+        df_cleaned, derived = new_rows, closed
+    else:
+        # 兩段的 category 不同時 concat 會變回 object，再套用一次型態
+        df_cleaned = apply_schema(pd.concat([history, new_rows])) if len(new_rows) else history
+        derived = _concat([derived, closed])
+
+    if hwm > start or start == 0:
+        kept = df_cleaned[df_cleaned.index < hwm]
+        store.save(key, {"rows": hwm, "signature": raw_signature(raw, hwm, hashes), **_describe(kept)},
+                   kept, derived)
+    return df_cleaned, _concat([derived, open_lots])
+
+
+def prepare_incremental(raw: pd.DataFrame, store: HistoryStore, key: str,
+                        snapshot: Optional[Callable[[pd.DataFrame, str], object]] = None,
+                        full: bool = False,
+                        on_schema: Optional[Callable[[pd.DataFrame, pd.DataFrame], object]] = None) -> pd.DataFrame:
+    """與 prepare(raw) 結果相同，但只轉換上次 high-water mark 之後的列。
+
+    key 用來區分產品分頁（例如 "<control table 路徑>::<分頁名稱>"）；
+    full=True 時忽略保存的狀態，完整重算一次並重設 high-water mark。
+    on_schema 見 pipeline.prepare（只看到這次轉換的列）。
+    """
+    return prepare_derived(raw, store, key, lambda segment, cleaned: {}, snapshot, full, on_schema)[0]
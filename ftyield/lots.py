@@ -0,0 +1,133 @@
+"""lot 層級的欄式資料模型
+
+control table 中每個 lot 在每個 FT 站別是一段連續的列：
+
+  FT1     ← 首測
+  R1…Rn   ← 重測
+  Total   ← 收尾（之後到下一個 FT 之前的列不屬於這個 lot）
+
+LotTable 對一個分頁只掃描一次 Station 欄，建立每個 lot×站別一筆的陣列：
+FT 列、Total 列、區段結尾的列索引，以及 CSR 形式的重測列
+(retest_offsets / retest_rows / retest_no)。之後 RT rate、重測分析、
+high-water mark 等都直接以 lot 編號索引（O(1)），不必再重新掃描各列。
+
+陣列都是 int32 / int8，10 萬個 lot（約 40 萬列）只需要幾 MB。
+"""
+
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+
+@dataclass(frozen=True)
+class LotTable:
+    """每個 lot×站別一筆，所有欄位都是長度相同的 NumPy 陣列（列索引為分頁中的位置）。"""
+    ft_row: np.ndarray          # int32，FT 列
+    end_row: np.ndarray         # int32，區段結尾（不含）：Total 的下一列，沒有 Total 時為下一個 FT
+    total_row: np.ndarray       # int32，第一個 Total 列；沒有 Total 收尾時為 -1
+    retest_offsets: np.ndarray  # int32，長度 n + 1，第 i 個 lot 的重測為 retest_rows[offsets[i]:offsets[i + 1]]
+    retest_rows: np.ndarray     # int32，R1…Rn 列
+    retest_no: np.ndarray       # int8，R 後面的編號
+    station: pd.Categorical     # FT1、FT2…
+    n_rows: int
+
+    @classmethod
+    def from_stations(cls, station: pd.Series) -> "LotTable":
+        """由 Station 欄（modify_station 之後）建立；第一個 FT 之前的列不屬於任何 lot。"""
+        station = pd.Series(station).astype(str).reset_index(drop=True)
+        n_rows = len(station)
+        is_ft = station.str.startswith("FT").to_numpy(dtype=bool)
+        is_total = (station == "Total").to_numpy(dtype=bool)
+        r_no = station.str.extract(r"^R(\d+)", expand=False).astype(float).to_numpy()
+
+        ft_row = np.flatnonzero(is_ft).astype(np.int32)
+        lot_of_row = np.cumsum(is_ft, dtype=np.int32) - 1  # -1：第一個 FT 之前
+        next_ft = np.append(ft_row[1:], np.int32(n_rows))
+
+        totals = np.flatnonzero(is_total & (lot_of_row >= 0))
+        total_row = np.full(len(ft_row), -1, dtype=np.int32)
+        lots_closed, first = np.unique(lot_of_row[totals], return_index=True)
+        total_row[lots_closed] = totals[first]
+        end_row = np.where(total_row >= 0, total_row + 1, next_ft).astype(np.int32)
+
+        retests = np.flatnonzero(~np.isnan(r_no) & (lot_of_row >= 0))
+        retests = retests[retests < end_row[lot_of_row[retests]]]
+        counts = np.bincount(lot_of_row[retests], minlength=len(ft_row))
+        offsets = np.zeros(len(ft_row) + 1, dtype=np.int32)
+        np.cumsum(counts, out=offsets[1:])
+
+        return cls(ft_row, end_row, total_row, offsets, retests.astype(np.int32),
+                   r_no[retests].astype(np.int8), pd.Categorical(station.to_numpy()[ft_row]), n_rows)
+
+    def __len__(self) -> int:
+        return len(self.ft_row)
+
+    @property
+    def closed(self) -> np.ndarray:
+        """有 Total 收尾的 lot。"""
+        return self.total_row >= 0
+
+    @property
+    def retest_count(self) -> np.ndarray:
+        return np.diff(self.retest_offsets)
+
+    def rows(self, lot: int) -> slice:
+        """第 lot 個 lot 的區段（FT 列到 Total 列）。"""
+        return slice(int(self.ft_row[lot]), int(self.end_row[lot]))
+
+    def retests(self, lot: int) -> np.ndarray:
+        return self.retest_rows[self.retest_offsets[lot]:self.retest_offsets[lot + 1]]
+
+    def rt_rate(self) -> np.ndarray:
+        """每個 lot 最大的 R 編號（沒有重測為 0）。"""
+        rt = np.zeros(len(self), dtype=np.int8)
+        has_retest = self.retest_count > 0
+        if has_retest.any():
+            rt[has_retest] = np.maximum.reduceat(self.retest_no, self.retest_offsets[:-1][has_retest])
+        return rt
+
+    def row_lot(self) -> np.ndarray:
+        """每一列所屬的 lot 編號，不屬於任何 lot 區段的列為 -1。"""
+        lengths = self.end_row - self.ft_row
+        lot = np.repeat(np.arange(len(self), dtype=np.int32), lengths)
+        starts = np.repeat(self.ft_row - np.cumsum(lengths) + lengths, lengths)
+        result = np.full(self.n_rows, -1, dtype=np.int32)
+        result[starts + np.arange(len(lot))] = lot
+        return result
+
+    def broadcast(self, values, closed_only: bool = True) -> pd.arrays.IntegerArray:
+        """把每個 lot 一個的值寫回區段內的每一列（Int64）；closed_only 時沒有 Total 的 lot 為空值。"""
+        lot = self.row_lot()
+        keep = lot >= 0
+        if closed_only:
+            keep &= self.closed[np.maximum(lot, 0)]
+        data = np.zeros(self.n_rows, dtype=np.int64)
+        data[keep] = np.asarray(values, dtype=np.int64)[lot[keep]]
+        return pd.arrays.IntegerArray(data, ~keep)
+
+    def high_water_mark(self) -> int:
+        """最後一個有 Total 收尾的 lot 之後的列數位置（沒有完整的 lot 時為 0）。"""
+        closed = self.total_row[self.closed]
+        return int(closed.max()) + 1 if len(closed) else 0
+
+    def to_frame(self, df: Optional[pd.DataFrame] = None) -> pd.DataFrame:
+        """每個 lot×站別一列；傳入原始分頁時附上 FT 列的欄位（Lot#、Date…）。"""
+        lots = pd.DataFrame({
+            "Station": self.station,
+            "FT row": self.ft_row,
+            "Total row": pd.arrays.IntegerArray(self.total_row.copy(), ~self.closed),
+            "Retests": self.retest_count.astype(np.int16),
+            "RT rate": self.rt_rate(),
+        })
+        if df is not None:
+            ft = df.iloc[self.ft_row].drop(columns=["Station"], errors="ignore").reset_index(drop=True)
+            lots = pd.concat([ft, lots], axis=1)
+        return lots
+
+    def memory_bytes(self) -> int:
+        arrays = (self.ft_row, self.end_row, self.total_row, self.retest_offsets, self.retest_rows, self.retest_no)
+        return sum(a.nbytes for a in arrays) + self.station.codes.nbytes
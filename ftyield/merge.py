@@ -0,0 +1,492 @@
+"""合併多個 *_yield_trend.xlsx 成站點 workbook（不需要 Excel）
+
+取代 merged-1.py：原本透過 xlwings 開一個隱藏的 Excel，再用 COM
+(sheet.api.Copy) 複製工作表，只能在 Windows 上執行。這裡直接處理 xlsx 的 zip
+內容：
+
+- 工作表 XML 逐段串流改寫後寫入新檔，不把整個 workbook 載入記憶體
+- 共用字串 (sharedStrings) 改成 inline string，樣式索引（含條件式格式的 dxfId）
+  改對應到合併後的 styles.xml
+- 已定義的名稱（列印範圍等）一併複製，公式中的工作表名稱改成新名稱
+- drawing / chart 等關聯檔一併複製，圖表公式中的工作表名稱改成新名稱，組合圖維持原樣
+- 新工作表名稱為「檔名前綴_原名稱」並截斷到 31 個字元（與 merged-1.py 相同）
+"""
+
+from __future__ import annotations
+
+import io
+import os
+import posixpath
+import re
+import zipfile
+from glob import glob
+from typing import Iterable, Optional
+from xml.etree import ElementTree as ET
+from xml.sax.saxutils import escape, quoteattr, unescape
+
+MAIN_NS = "http://schemas.openxmlformats.org/spreadsheetml/2006/main"
+REL_NS = "http://schemas.openxmlformats.org/package/2006/relationships"
+DOC_REL_NS = "http://schemas.openxmlformats.org/officeDocument/2006/relationships"
+CT_NS = "http://schemas.openxmlformats.org/package/2006/content-types"
+
+RT_WORKSHEET = DOC_REL_NS + "/worksheet"
+RT_STYLES = DOC_REL_NS + "/styles"
+RT_THEME = DOC_REL_NS + "/theme"
+RT_SHARED_STRINGS = DOC_REL_NS + "/sharedStrings"
+RT_OFFICE_DOCUMENT = DOC_REL_NS + "/officeDocument"
+
+CT_WORKBOOK = "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"
+CT_WORKSHEET = "application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"
+CT_STYLES = "application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"
+CT_THEME = "application/vnd.openxmlformats-officedocument.theme+xml"
+
+SUFFIX = "_yield_trend.xlsx"
+MAX_SHEET_NAME = 31
+CHUNK_SIZE = 1 << 20
+
+_CELL_RE = re.compile(r"<c\b([^>]*?)(/>|>(.*?)</c>)", re.S)
+_ROW_STYLE_RE = re.compile(r'(<row\b[^>]*?\bs=")(\d+)(")')
+_COL_STYLE_RE = re.compile(r'(<col\b[^>]*?\bstyle=")(\d+)(")')
+_STYLE_ATTR_RE = re.compile(r'\bs="(\d+)"')
+_DXF_RE = re.compile(r'(<cfRule\b[^>]*?\bdxfId=")(\d+)(")')
+_TYPE_S_RE = re.compile(r'\s*\bt="s"')
+_VALUE_RE = re.compile(r"<v>(\d+)</v>")
+_FORMULA_RE = re.compile(r"(<(?:\w+:)?f>)(.*?)(</(?:\w+:)?f>)", re.S)
+_SHEET_REF_RE = re.compile(r"'((?:[^']|'')+)'!|([^\s'!,():;=&<>]+)!")
+
+
+def _q(tag: str, ns: str = MAIN_NS) -> str:
+    return f"{{{ns}}}{tag}"
+
+
+def merged_sheet_name(prefix: str, sheet: str) -> str:
+    """新工作表名稱：檔名前綴_原名稱，限制在 Excel 的工作表名上限 31 字元。"""
+    return f"{prefix}_{sheet}"[:MAX_SHEET_NAME]
+
+
+def file_prefix(path: str) -> str:
+    """QAL642C_FT_yield_trend.xlsx → QAL642C_FT"""
+    name = os.path.basename(path)
+    return name[:-len(SUFFIX)] if name.endswith(SUFFIX) else os.path.splitext(name)[0]
+
+
+def _rels_path(part: str) -> str:
+    return posixpath.join(posixpath.dirname(part), "_rels", posixpath.basename(part) + ".rels")
+
+
+def _resolve(base_part: str, target: str) -> str:
+    if target.startswith("/"):
+        return target[1:]
+    return posixpath.normpath(posixpath.join(posixpath.dirname(base_part), target))
+
+
+def _read_rels(zf: zipfile.ZipFile, part: str) -> list[dict]:
+    path = _rels_path(part)
+    if path not in zf.namelist():
+        return []
+    root = ET.fromstring(zf.read(path))
+    return [dict(rel.attrib) for rel in root.iter(_q("Relationship", REL_NS))]
+
+
+def _rels_xml(rels: Iterable[dict]) -> str:
+    items = "".join(
+        "<Relationship " + " ".join(f"{k}={quoteattr(v)}" for k, v in rel.items()) + "/>"
+        for rel in rels
+    )
+    return f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<Relationships xmlns="{REL_NS}">{items}</Relationships>'
+
+
+class _ContentTypes:
+    """來源檔的 [Content_Types].xml：依 part 名稱查內容類型。"""
+
+    def __init__(self, zf: zipfile.ZipFile):
+        root = ET.fromstring(zf.read("[Content_Types].xml"))
+        self.defaults = {e.get("Extension").lower(): e.get("ContentType") for e in root.iter(_q("Default", CT_NS))}
+        self.overrides = {e.get("PartName").lstrip("/"): e.get("ContentType") for e in root.iter(_q("Override", CT_NS))}
+
+    def get(self, part: str) -> Optional[str]:
+        return self.overrides.get(part) or self.defaults.get(posixpath.splitext(part)[1][1:].lower())
+
+
+def _shared_strings(zf: zipfile.ZipFile, workbook_part: str, rels: list[dict]) -> list[str]:
+    """以 iterparse 讀取共用字串（rich text 只保留文字）。"""
+    for rel in rels:
+        if rel.get("Type") == RT_SHARED_STRINGS:
+            path = _resolve(workbook_part, rel["Target"])
+            break
+    else:
+        return []
+    strings = []
+    with zf.open(path) as f:
+        for _, elem in ET.iterparse(f):
+            if elem.tag == _q("si"):
+                strings.append("".join(t.text or "" for t in elem.iter(_q("t"))))
+                elem.clear()
+    return strings
+
+
+class _StyleMerger:
+    """合併各來源的 styles.xml：字型、填滿、框線、數值格式、cellStyleXfs、cellXfs 與
+    條件式格式的 dxfs 依序附加並去重，具名樣式 (cellStyles) 以名稱去重（先加入的為準）。
+
+    調色盤 (colors) 與 theme 一樣使用第一個來源的；之後的來源調色盤不同，或有自訂
+    表格樣式 (tableStyles) 時不合併，並印出提示。
+    """
+
+    LISTS = ("fonts", "fills", "borders")
+
+    def __init__(self):
+        self.items = {name: [] for name in (*self.LISTS, "cellStyleXfs", "dxfs")}
+        self.keys = {name: {} for name in self.items}
+        self.num_fmts = {}      # formatCode → 新 id
+        self.xfs = []
+        self.xf_keys = {}
+        self.cell_styles = {}   # 名稱 → cellStyle
+        self.colors = None
+
+    def _add(self, name: str, elem) -> int:
+        key = ET.tostring(elem)
+        if key not in self.keys[name]:
+            self.keys[name][key] = len(self.items[name])
+            self.items[name].append(elem)
+        return self.keys[name][key]
+
+    @staticmethod
+    def _children(root, tag: str) -> list:
+        container = root.find(_q(tag))
+        return list(container) if container is not None else []
+
+    def add(self, styles_xml: Optional[bytes], source: str = "") -> tuple[dict[int, int], dict[int, int]]:
+        """加入一個來源的 styles.xml，回傳 ({舊 cellXfs 索引: 新索引}, {舊 dxfId: 新 dxfId})。"""
+        if styles_xml is None:
+            return {}, {}
+        root = ET.fromstring(styles_xml)
+        if self._children(root, "tableStyles"):
+            print(f"[略過樣式] {source} 的 tableStyles 不會放進合併檔")
+        colors = root.find(_q("colors"))
+        if self.colors is None:
+            self.colors = colors
+        elif colors is not None and ET.tostring(colors) != ET.tostring(self.colors):
+            print(f"[略過樣式] {source} 的 colors 與第一個檔案不同，合併檔使用第一個檔案的調色盤")
+        maps = {name: [self._add(name, child) for child in self._children(root, name)] for name in self.LISTS}
+
+        fmt_map = {}
+        for fmt in self._children(root, "numFmts"):
+            code = fmt.get("formatCode")
+            if code not in self.num_fmts:
+                self.num_fmts[code] = 164 + len(self.num_fmts)
+            fmt_map[fmt.get("numFmtId")] = str(self.num_fmts[code])
+
+        def remap(xf):
+            for attr, name in (("fontId", "fonts"), ("fillId", "fills"), ("borderId", "borders")):
+                old = int(xf.get(attr, 0))
+                xf.set(attr, str(maps[name][old] if old < len(maps[name]) else 0))
+            if xf.get("numFmtId") in fmt_map:
+                xf.set("numFmtId", fmt_map[xf.get("numFmtId")])
+            return xf
+
+        # 同名的具名樣式對應到先加入的那一個；其餘不去重，內容相同的具名樣式才不會合成一個
+        styles = self._children(root, "cellStyles")
+        style_names = {}
+        for style in styles:
+            style_names.setdefault(int(style.get("xfId", 0)), style.get("name"))
+        style_map = []
+        for i, xf in enumerate(self._children(root, "cellStyleXfs")):
+            existing = self.cell_styles.get(style_names.get(i))
+            if existing is not None:
+                style_map.append(int(existing.get("xfId")))
+            else:
+                style_map.append(len(self.items["cellStyleXfs"]))
+                self.items["cellStyleXfs"].append(remap(xf))
+        for style in styles:
+            if style.get("name") not in self.cell_styles:
+                old = int(style.get("xfId", 0))
+                style.set("xfId", str(style_map[old] if old < len(style_map) else 0))
+                self.cell_styles[style.get("name")] = style
+
+        xf_map = {}
+        for i, xf in enumerate(self._children(root, "cellXfs")):
+            remap(xf)
+            old = int(xf.get("xfId", 0))
+            xf.set("xfId", str(style_map[old] if old < len(style_map) else 0))
+            key = ET.tostring(xf)
+            if key not in self.xf_keys:
+                self.xf_keys[key] = len(self.xfs)
+                self.xfs.append(xf)
+            xf_map[i] = self.xf_keys[key]
+        # dxf 內含完整的字型 / 填滿 / 數值格式，不需要重新對應
+        dxf_map = {i: self._add("dxfs", dxf) for i, dxf in enumerate(self._children(root, "dxfs"))}
+        return xf_map, dxf_map
+
+    def to_xml(self) -> str:
+        ET.register_namespace("", MAIN_NS)
+        def block(tag, elems, default, minimum=1):
+            body = "".join(ET.tostring(e, encoding="unicode").replace(f' xmlns="{MAIN_NS}"', "")
+                           for e in elems) or default
+            return f'<{tag} count="{max(len(elems), minimum)}">{body}</{tag}>'
+
+        num_fmts = "".join(f'<numFmt numFmtId="{i}" formatCode={quoteattr(code)}/>'
+                           for code, i in self.num_fmts.items())
+        fills = self.items["fills"] or []
+        return (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n<styleSheet xmlns="{MAIN_NS}">'
+            f'<numFmts count="{len(self.num_fmts)}">{num_fmts}</numFmts>'
+            + block("fonts", self.items["fonts"], '<font><sz val="11"/><name val="Calibri"/></font>')
+            + (block("fills", fills, "") if fills else
+               '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+               '<fill><patternFill patternType="gray125"/></fill></fills>')
+            + block("borders", self.items["borders"], "<border><left/><right/><top/><bottom/><diagonal/></border>")
+            + block("cellStyleXfs", self.items["cellStyleXfs"], '<xf numFmtId="0" fontId="0" fillId="0" borderId="0"/>')
+            + block("cellXfs", self.xfs, '<xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>')
+            + block("cellStyles", list(self.cell_styles.values()), '<cellStyle name="Normal" xfId="0" builtinId="0"/>')
+            + block("dxfs", self.items["dxfs"], "", minimum=0)
+            + ("" if self.colors is None else
+               ET.tostring(self.colors, encoding="unicode").replace(f' xmlns="{MAIN_NS}"', ""))
+            + "</styleSheet>"
+        )
+
+
+def _inline_string(text: str) -> str:
+    space = ' xml:space="preserve"' if text != text.strip() else ""
+    return f"<is><t{space}>{escape(text)}</t></is>"
+
+
+def _rewrite_cells(xml: str, strings: list[str], xf_map: dict[int, int],
+                   dxf_map: Optional[dict[int, int]] = None) -> str:
+    """改寫一段工作表 XML：樣式與條件式格式的 dxfId 重新對應、共用字串改成 inline string。"""
+    def style(m):
+        return f's="{xf_map.get(int(m.group(1)), 0)}"'
+
+    def cell(m):
+        attrs, inner = m.group(1), m.group(3)
+        attrs = _STYLE_ATTR_RE.sub(style, attrs)
+        if inner is not None and _TYPE_S_RE.search(attrs):
+            v = _VALUE_RE.search(inner)
+            if v is not None:
+                attrs = _TYPE_S_RE.sub("", attrs) + ' t="inlineStr"'
+                return f"<c{attrs}>{_inline_string(strings[int(v.group(1))])}</c>"
+        return f"<c{attrs}{m.group(2)}"
+
+    xml = _CELL_RE.sub(cell, xml)
+    if dxf_map:
+        xml = _DXF_RE.sub(lambda m: f"{m.group(1)}{dxf_map.get(int(m.group(2)), 0)}{m.group(3)}", xml)
+    xml = _ROW_STYLE_RE.sub(lambda m: f"{m.group(1)}{xf_map.get(int(m.group(2)), 0)}{m.group(3)}", xml)
+    return _COL_STYLE_RE.sub(lambda m: f"{m.group(1)}{xf_map.get(int(m.group(2)), 0)}{m.group(3)}", xml)
+
+
+def _rename_refs(formula: str, names: dict[str, str]) -> str:
+    """一段已跳脫的 XML 公式文字中的 'FT1'!$A$2 改成新的工作表名稱。"""
+    def ref(m):
+        old = m.group(1).replace("''", "'") if m.group(1) is not None else m.group(2)
+        new = names.get(unescape(old))
+        if new is None:
+            return m.group(0)
+        return "'" + escape(new).replace("'", "''") + "'!"
+
+    return _SHEET_REF_RE.sub(ref, formula)
+
+
+def _rename_sheet_refs(xml: str, names: dict[str, str]) -> str:
+    """圖表公式 (<c:f>) 中的 'FT1'!$A$2 改成新的工作表名稱。"""
+    return _FORMULA_RE.sub(lambda m: m.group(1) + _rename_refs(m.group(2), names) + m.group(3), xml)
+
+
+class WorkbookMerger:
+    """逐一加入來源 workbook 的工作表，最後寫出 workbook.xml、styles.xml 等共用部分。"""
+
+    def __init__(self, output_file: str):
+        self.out = zipfile.ZipFile(output_file, "w", zipfile.ZIP_DEFLATED)
+        self.styles = _StyleMerger()
+        self.sheets = []            # (名稱, part)
+        self.overrides = {}         # part → content type
+        self.defaults = {"rels": "application/vnd.openxmlformats-package.relationships+xml",
+                         "xml": "application/xml"}
+        self.counters = {}
+        self.theme = None
+        self.defined_names = []     # (屬性, 已跳脫的公式)
+
+    def _new_part(self, part: str) -> str:
+        folder, name = posixpath.split(part)
+        stem, ext = posixpath.splitext(name)
+        stem = stem.rstrip("0123456789") or stem
+        key = (folder, stem, ext)
+        self.counters[key] = self.counters.get(key, 0) + 1
+        return posixpath.join(folder, f"{stem}{self.counters[key]}{ext}")
+
+    def _copy_related(self, zf, types: _ContentTypes, part: str, new_part: str, names: dict[str, str]) -> None:
+        """複製 part 的關聯檔（drawing → chart …），重新命名並改寫 .rels。"""
+        rels = _read_rels(zf, part)
+        if not rels:
+            return
+        for rel in rels:
+            if rel.get("TargetMode") == "External":
+                continue
+            src = _resolve(part, rel["Target"])
+            if src not in zf.namelist():
+                continue
+            dst = self._new_part(src)
+            data = zf.read(src)
+            if src.endswith(".xml") and (b"<f>" in data or b":f>" in data):
+                data = _rename_sheet_refs(data.decode("utf-8"), names).encode("utf-8")
+            self.out.writestr(dst, data)
+            content_type = types.get(src)
+            if content_type and content_type != self.defaults.get(posixpath.splitext(src)[1][1:].lower()):
+                self.overrides[dst] = content_type
+            ext = posixpath.splitext(src)[1][1:].lower()
+            if ext not in self.defaults and types.defaults.get(ext):
+                self.defaults[ext] = types.defaults[ext]
+            rel["Target"] = "/" + dst
+            self._copy_related(zf, types, src, dst, names)
+        self.out.writestr(_rels_path(new_part), _rels_xml(rels))
+
+    def add_workbook(self, path: str, prefix: Optional[str] = None) -> list[str]:
+        """加入一個 workbook 的所有工作表，回傳新的工作表名稱。"""
+        prefix = file_prefix(path) if prefix is None else prefix
+        with zipfile.ZipFile(path) as zf:
+            types = _ContentTypes(zf)
+            root_rels = _read_rels(zf, "")
+            workbook_part = next(_resolve("", r["Target"]) for r in root_rels if r["Type"] == RT_OFFICE_DOCUMENT)
+            wb_rels = _read_rels(zf, workbook_part)
+            rel_by_id = {r["Id"]: r for r in wb_rels}
+
+            strings = _shared_strings(zf, workbook_part, wb_rels)
+            styles_rel = next((r for r in wb_rels if r["Type"] == RT_STYLES), None)
+            xf_map, dxf_map = self.styles.add(
+                zf.read(_resolve(workbook_part, styles_rel["Target"])) if styles_rel else None, path)
+            theme_rel = next((r for r in wb_rels if r["Type"] == RT_THEME), None)
+            if self.theme is None and theme_rel is not None:
+                self.theme = zf.read(_resolve(workbook_part, theme_rel["Target"]))
+
+            wb_root = ET.fromstring(zf.read(workbook_part))
+            wb_pr = wb_root.find(_q("workbookPr"))
+            if wb_pr is not None and wb_pr.get("date1904") in ("1", "true"):
+                print(f"[注意] {path} 使用 1904 日期系統，合併檔為 1900 日期系統，日期會差 4 年")
+            sheets = [(s.get("name"), rel_by_id[s.get(_q("id", DOC_REL_NS))])
+                      for s in wb_root.iter(_q("sheet"))]
+            names = {name: merged_sheet_name(prefix, name) for name, _ in sheets}
+            added, positions = [], {}
+            for i, (name, rel) in enumerate(sheets):
+                if rel["Type"] != RT_WORKSHEET:
+                    print(f"[略過分頁] {path} / {name}，不是一般工作表")
+                    continue
+                new_name = names[name]
+                if new_name in [n for n, _ in self.sheets]:
+                    raise ValueError(f"合併後的工作表名稱重複: {new_name}")
+                src = _resolve(workbook_part, rel["Target"])
+                dst = self._new_part("xl/worksheets/sheet.xml")
+                self._copy_sheet(zf, src, dst, strings, xf_map, dxf_map, first=not self.sheets)
+                self._copy_related(zf, types, src, dst, names)
+                positions[i] = len(self.sheets)
+                self.sheets.append((new_name, dst))
+                added.append(new_name)
+                print(f"  ➜ 加入工作表：{new_name}")
+            self._add_defined_names(path, wb_root, names, positions)
+        return added
+
+    def _add_defined_names(self, path: str, wb_root, names: dict[str, str], positions: dict[int, int]) -> None:
+        """複製已定義的名稱（列印範圍、篩選範圍等）：公式中的工作表改成新名稱，
+        localSheetId 改成新的位置；重複的全域名稱或屬於略過分頁的名稱不複製並印出提示。"""
+        global_names = {attrs["name"] for attrs, _ in self.defined_names if "localSheetId" not in attrs}
+        for elem in wb_root.iter(_q("definedName")):
+            attrs = dict(elem.attrib)
+            if "localSheetId" in attrs:
+                local = positions.get(int(attrs["localSheetId"]))
+                if local is None:
+                    print(f"[略過名稱] {path} / {attrs['name']}，所屬的分頁沒有合併")
+                    continue
+                attrs["localSheetId"] = str(local)
+            elif attrs["name"] in global_names:
+                print(f"[略過名稱] {path} / {attrs['name']}，與先加入的全域名稱重複")
+                continue
+            self.defined_names.append((attrs, _rename_refs(escape(elem.text or ""), names)))
+
+    def _copy_sheet(self, zf, src: str, dst: str, strings: list[str], xf_map: dict[int, int],
+                    dxf_map: dict[int, int], first: bool) -> None:
+        """逐段讀取工作表 XML（以 </row> 為界）改寫後直接寫入輸出檔。"""
+        with zf.open(src) as raw, self.out.open(dst, "w", force_zip64=True) as out:
+            reader = io.TextIOWrapper(raw, encoding="utf-8")
+            buffer = ""
+            while True:
+                chunk = reader.read(CHUNK_SIZE)
+                buffer += chunk
+                cut = buffer.rfind("</row>") + len("</row>") if chunk else len(buffer)
+                if cut >= len("</row>") or not chunk:
+                    head, buffer = buffer[:cut], buffer[cut:]
+                    if not first:
+                        head = head.replace('tabSelected="1"', 'tabSelected="0"')
+                    out.write(_rewrite_cells(head, strings, xf_map, dxf_map).encode("utf-8"))
+                if not chunk:
+                    break
+        self.overrides[dst] = CT_WORKSHEET
+
+    def close(self) -> None:
+        """寫出 workbook.xml、styles.xml、theme、[Content_Types].xml 並關閉檔案。"""
+        if not self.sheets:
+            raise ValueError("沒有任何工作表可以合併")
+        sheets_xml = "".join(
+            f'<sheet name={quoteattr(name)} sheetId="{i}" r:id="rId{i}"/>'
+            for i, (name, _) in enumerate(self.sheets, start=1)
+        )
+        names_xml = "".join(
+            "<definedName " + " ".join(f"{k}={quoteattr(v)}" for k, v in attrs.items()) + f">{formula}</definedName>"
+            for attrs, formula in self.defined_names
+        )
+        self.out.writestr("xl/workbook.xml", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<workbook xmlns="{MAIN_NS}" xmlns:r="{DOC_REL_NS}">'
+            f'<bookViews><workbookView activeTab="0"/></bookViews>'
+            f'<sheets>{sheets_xml}</sheets>'
+            + (f"<definedNames>{names_xml}</definedNames>" if names_xml else "")
+            + "</workbook>"
+        ))
+        wb_rels = [{"Id": f"rId{i}", "Type": RT_WORKSHEET, "Target": "/" + part}
+                   for i, (_, part) in enumerate(self.sheets, start=1)]
+        n = len(wb_rels)
+        wb_rels.append({"Id": f"rId{n + 1}", "Type": RT_STYLES, "Target": "/xl/styles.xml"})
+        self.out.writestr("xl/styles.xml", self.styles.to_xml())
+        self.overrides["xl/workbook.xml"] = CT_WORKBOOK
+        self.overrides["xl/styles.xml"] = CT_STYLES
+        if self.theme is not None:
+            wb_rels.append({"Id": f"rId{n + 2}", "Type": RT_THEME, "Target": "/xl/theme/theme1.xml"})
+            self.out.writestr("xl/theme/theme1.xml", self.theme)
+            self.overrides["xl/theme/theme1.xml"] = CT_THEME
+        self.out.writestr("xl/_rels/workbook.xml.rels", _rels_xml(wb_rels))
+        self.out.writestr("_rels/.rels", _rels_xml([
+            {"Id": "rId1", "Type": RT_OFFICE_DOCUMENT, "Target": "xl/workbook.xml"},
+        ]))
+
+        defaults = "".join(f'<Default Extension="{ext}" ContentType="{ct}"/>' for ext, ct in self.defaults.items())
+        overrides = "".join(f'<Override PartName="/{part}" ContentType="{ct}"/>' for part, ct in self.overrides.items())
+        self.out.writestr("[Content_Types].xml", (
+            f'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            f'<Types xmlns="{CT_NS}">{defaults}{overrides}</Types>'
+        ))
+        self.out.close()
+
+
+def merge_workbooks(files: Iterable[str], output_file: str) -> list[str]:
+    """把 files 的所有工作表合併成 output_file，回傳合併後的工作表名稱。"""
+    merger = WorkbookMerger(output_file)
+    added = []
+    try:
+        for path in files:
+            print(f"📥 處理檔案：{path}")
+            added.extend(merger.add_workbook(path))
+        merger.close()
+    except BaseException:
+        merger.out.close()
+        os.remove(output_file)
+        raise
+    return added
+
+
+def site_trend_files(directory: str, output_file: str, *excluded: str) -> list[str]:
+    """站點資料夾中所有待合併的 *_yield_trend.xlsx。
+
+    排除合併輸出檔本身與 excluded（例如 -o 指定其他路徑時，原本的站點合併檔 Site.merged_path）。
+    """
+    skip = {os.path.normcase(os.path.abspath(f)) for f in (output_file, *excluded)}
+    return sorted(
+        f for f in glob(os.path.join(directory, "*" + SUFFIX))
+        if os.path.normcase(os.path.abspath(f)) not in skip and not os.path.basename(f).startswith("~$")
+    )
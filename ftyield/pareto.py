@@ -0,0 +1,75 @@
+"""fail bin 柏拉圖 (Pareto)
+
+哪些 fail bin 造成 yield loss：取每個有 Total 收尾的 lot 在 Total 列的
+Bin2~Bin6、Loss、Damage（重測後仍然 fail 的數量，Bin1 為良品），依
+FT 站別 × ISO 週 (2024W08) 以一次 groupby 加總。
+
+每個 FT 站別輸出一個「FT1_Pareto」分頁，放在 FT1 分頁旁邊：
+
+  Bin | Fail Qty | Yield loss | Cum % | 2024W06 | 2024W07 | 2024W08 …
+
+依 Fail Qty 由大到小排序，Yield loss 為佔該站 Tested Qty 的比例、Cum % 為
+累計佔全部 fail 的比例，右側為各週的數量；writer 依此畫出柱狀圖 + 累計折線圖。
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import pandas as pd
+
+from .lots import LotTable
+from .pipeline import lot_table
+from .schema import iso_week, numbers, parse_dates
+from .writer import PARETO_COLUMNS
+
+FAIL_BINS = ("Bin2", "Bin3", "Bin4", "Bin5", "Bin6", "Loss", "Damage")
+
+
+def bin_counts(raw: pd.DataFrame, lots: Optional[LotTable] = None) -> pd.DataFrame:
+    """各 FT 站別 × ISO 週的 fail bin 數量與 Tested Qty（index 為 Station、Week）。
+
+    raw 為包含 COUNT_COLUMNS 的原始分頁；沒有 Total 收尾的 lot 不計入，
+    沒有日期的 lot 歸在 Week "未知"。
+    """
+    raw = raw.reset_index(drop=True)
+    if lots is None:
+        lots = lot_table(raw)
+    closed = lots.closed
+    ft, total = lots.ft_row[closed], lots.total_row[closed]
+    dates = parse_dates(raw["Date"].iloc[ft].reset_index(drop=True))
+    frame = pd.DataFrame({
+        "Station": lots.station[closed],
+        "Week": iso_week(dates).fillna("未知"),
+        "Tested Qty": numbers(raw, "Tested Qty")[ft],
+        **{col: numbers(raw, col)[total] for col in FAIL_BINS},
+    })
+    return frame.groupby(["Station", "Week"], observed=True).sum().astype("int64")
+
+
+def pareto_table(counts: pd.DataFrame) -> pd.DataFrame:
+    """一個站別的 bin_counts（index 為 Week）→ 依 Fail Qty 排序的柏拉圖表格。"""
+    weekly = counts[list(FAIL_BINS)].T
+    fail = weekly.sum(axis=1).sort_values(ascending=False, kind="stable")
+    tested, total_fail = counts["Tested Qty"].sum(), fail.sum()
+    table = pd.DataFrame(dict(zip(PARETO_COLUMNS, (
+        fail.index,
+        fail.to_numpy(),
+        (fail / tested).to_numpy() if tested else float("nan"),
+        (fail.cumsum() / total_fail).to_numpy() if total_fail else float("nan"),
+    ))))
+    weeks = weekly.loc[fail.index].reset_index(drop=True)
+    weeks.columns = [str(w) for w in weeks.columns]
+    return pd.concat([table, weeks], axis=1)
+
+
+def pareto_from_counts(counts: pd.DataFrame) -> dict[str, pd.DataFrame]:
+    """bin_counts（可以是多段資料的 bin_counts 接在一起）→ {FT 站別: 柏拉圖表格}。"""
+    counts = counts.groupby(level=["Station", "Week"], observed=True).sum()
+    return {str(station): pareto_table(group.droplevel("Station"))
+            for station, group in counts.groupby(level="Station", observed=True)}
+
+
+def pareto_sheets(raw: pd.DataFrame, lots: Optional[LotTable] = None) -> dict[str, pd.DataFrame]:
+    """{FT 站別: 柏拉圖表格}，供 pipeline.report_sheets 放在各 FT 分頁旁邊。"""
+    return pareto_from_counts(bin_counts(raw, lots))
@@ -0,0 +1,323 @@
+"""FT yield trend 處理流程
+
+把 yield-tc.py 的步驟拆成可重複呼叫的函式，讓多個產品分頁可以共用同一份
+已解析的 control table：
+
+  1️⃣ read_product_sheets：一次開啟 workbook，讀取所有產品分頁（依表頭名稱選取欄位）
+  3️⃣ modify_station：FT → FT1、FT2、FT3
+  4️⃣ compute_rt_rate：以 LotTable（見 lots.py）計算每個 lot 的 RT rate
+  5️⃣ prepare：刪除包含 NaN 的列，再轉成固定的欄位型態（見 schema.py）
+  6️⃣~9️⃣ write_report：輸出 FT 分頁、Summary、Tester、欄寬與趨勢圖
+  write_site_report：多個產品一次寫成站點合併檔（QAL642C_FT1、QAL642C_Summary…）
+"""
+
+from __future__ import annotations
+
+import os
+import re
+from typing import Callable, Iterable, Optional
+
+import pandas as pd
+
+from .cache import CachedWorkbook, ParseCache, frame_hash, open_workbook
+from .lots import LotTable
+from .rollup import rollup_sheets
+from .schema import apply_schema, export_frame, sheet_schema, to_float64
+from .testers import tester_stats
+from .writer import write_workbook
+
+# 預設設定（與各產品腳本相同）
+INPUT_FILE = "Sunplus_Yield_control_table.xlsx"
+# 舊版以固定欄位字母讀取（B, C, D, F, G, S, T + skiprows=1），現在只留給 benchmark 比較
+COLUMNS_TO_KEEP = "B, C, D, F, G, S, T"
+# 依表頭名稱選取的欄位（輸出順序依分頁中的位置）；REQUIRED_COLUMNS 必須全部找到
+KEEP_COLUMNS = ("Lot#", "Lot_Size/Qty", "Date", "PGM Name", "Station", "First Pass Yield", "Overall Yield")
+REQUIRED_COLUMNS = ("Lot#", "PGM Name", "Station", "First Pass Yield", "Overall Yield")
+# 驗算 yield 用的 bin 數量欄位（H~P，見 validate.py）；報表仍只輸出 KEEP_COLUMNS
+COUNT_COLUMNS = ("Bin1", "Bin2", "Bin3", "Bin4", "Bin5", "Bin6", "Loss", "Damage", "Tested Qty")
+# 保留在 df_cleaned 中供分析用、但不寫進 FT 分頁的欄位（Tester 見 testers.py、
+# Tested Qty 見 rollup.py）；可以是空值
+DETAIL_COLUMNS = ("Tester", "Tested Qty")
+# 表頭只在分頁開頭這幾列內尋找
+HEADER_SCAN_ROWS = 10
+TARGET_YIELD = 0.98
+# prepare_cached 的快取項目名稱（prepare 的步驟改變時 cache.CACHE_VERSION 要一起更新）
+PREPARED_KEY = "prepared"
+PARETO_SUFFIX = "_Pareto"
+
+
+def _label(value) -> Optional[str]:
+    """表頭儲存格正規化：去掉前後與重複的空白；非字串回傳 None。"""
+    return " ".join(value.split()) if isinstance(value, str) else None
+
+
+def locate_header(xls: pd.ExcelFile, sheet_name: str, scan_rows: int = HEADER_SCAN_ROWS,
+                  columns: Iterable[str] = KEEP_COLUMNS,
+                  required: Iterable[str] = REQUIRED_COLUMNS) -> tuple[int, dict[str, int]]:
+    """只讀取分頁前 scan_rows 列，找出第一個包含 required 所有欄位的表頭列。
+
+    回傳 (表頭列索引, {欄名: 欄位索引})，只包含 columns 中找到的欄位；
+    同名欄位取最左邊的一欄。找不到表頭時丟出 ValueError。
+    預設為 control table 的欄位，其他格式的分頁（見 status.py）可以傳入自己的欄名。
+    """
+    columns, required = set(columns), list(required)
+    head = xls.parse(sheet_name, header=None, nrows=scan_rows)
+    for row_number, row in enumerate(head.to_numpy(dtype=object).tolist()):
+        positions = {}
+        for col, value in zip(head.columns, row):
+            label = _label(value)
+            if label in columns:
+                positions.setdefault(label, int(col))
+        if all(c in positions for c in required):
+            return row_number, positions
+    raise ValueError(f"{sheet_name} 前 {scan_rows} 列找不到表頭，缺少欄位: {required}")
+
+
+def parse_product_sheet(xls: pd.ExcelFile, sheet_name: str,
+                        columns: Iterable[str] = KEEP_COLUMNS) -> pd.DataFrame:
+    """從已開啟的 workbook（pd.ExcelFile 或 cache.CachedWorkbook）讀取一個產品分頁。
+
+    先以 locate_header 找到表頭列與需要的欄位，再只讀取這些欄位（usecols 交給 reader，
+    不需要的欄位不會被解析），表頭上方的標題列不論幾列都會跳過，最後以
+    schema.sheet_schema 讓每欄只有一種型態。columns 可以多加 COUNT_COLUMNS 等欄位，
+    分頁中沒有的欄位略過。缺少必要欄位時丟出 ValueError。
+    CachedWorkbook 時整個結果（包含找不到表頭的錯誤）存在快取中。
+    """
+    columns = tuple(columns)
+    if isinstance(xls, CachedWorkbook):
+        return xls.frame(sheet_name, f"product_sheet {columns} {HEADER_SCAN_ROWS}",
+                         lambda: _read_product_sheet(xls, sheet_name, columns))
+    return _read_product_sheet(xls, sheet_name, columns)
+
+
+def _read_product_sheet(xls, sheet_name: str, columns: tuple[str, ...]) -> pd.DataFrame:
+    header_row, positions = locate_header(xls, sheet_name, columns=columns)
+    columns = sorted(positions, key=positions.get)
+    df = xls.parse(sheet_name, usecols=[positions[c] for c in columns], skiprows=header_row)
+    df.columns = columns
+    return sheet_schema(df)
+
+
+def read_product_sheets(input_file: str = INPUT_FILE,
+                        sheet_names: Optional[Iterable[str]] = None,
+                        cache: Optional[ParseCache] = None,
+                        reader: Optional[str] = None,
+                        columns: Iterable[str] = KEEP_COLUMNS) -> dict[str, pd.DataFrame]:
+    """開啟 workbook 一次，讀取多個產品分頁。
+
+    sheet_names 為 None 時讀取所有分頁，無法讀取或缺少必要欄位的分頁（例如 工作表1）
+    會被略過；指定 sheet_names 時則直接丟出錯誤。
+    回傳 {分頁名稱: DataFrame}，順序與 workbook 相同。
+    傳入 cache 時，內容沒變的 workbook 直接從快取讀取，不會開啟 xlsx；
+    reader 選擇讀取方式（見 readers.py），預設 pd.ExcelFile；columns 見 parse_product_sheet。
+    """
+    frames = {}
+    with open_workbook(input_file, cache, reader) as xls:
+        names = xls.sheet_names if sheet_names is None else list(sheet_names)
+        for name in names:
+            try:
+                frames[name] = parse_product_sheet(xls, name, columns)
+            except ValueError as e:
+                if sheet_names is not None:
+                    raise
+                print(f"[略過分頁] {name}，{e}")
+    return frames
+
+
+def modify_station(df: pd.DataFrame) -> pd.DataFrame:
+    """如果 Station 是 FT，則從 PGM Name 中提取 f 後的數字，變成 FT1、FT2...
+
+    只對 Station == "FT" 的列做一次 str.extract，取 PGM Name 中第一個 f<數字>，
+    例如 2ak654f1b1_xc011 → FT1；找不到時維持 FT。
+    """
+    is_ft = df["Station"] == "FT"
+    ft_no = df.loc[is_ft, "PGM Name"].astype(str).str.extract(r"f(\d+)", expand=False).dropna()
+    df.loc[ft_no.index, "Station"] = "FT" + ft_no
+    return df
+
+
+def lot_table(raw: pd.DataFrame) -> LotTable:
+    """原始分頁（尚未改 Station 名稱）的 LotTable；列索引為 raw 中的位置。"""
+    return LotTable.from_stations(modify_station(raw[["Station", "PGM Name"]].copy())["Station"])
+
+
+def compute_rt_rate(df: pd.DataFrame, lots: Optional[LotTable] = None) -> pd.DataFrame:
+    """計算 RT rate：FT 列到 Total 列之間最大的 R 編號，寫回整個 lot 區段。
+
+    lot 結構由 LotTable（見 lots.py）提供，沒有傳入時由 Station 欄建立；
+    沒有 Total 收尾的 lot 維持空值。
+    """
+    if lots is None:
+        lots = LotTable.from_stations(df["Station"])
+    df["RT rate"] = lots.broadcast(lots.rt_rate())
+    return df
+
+
+def prepare(df: pd.DataFrame,
+            snapshot: Optional[Callable[[pd.DataFrame, str], object]] = None,
+            on_schema: Optional[Callable[[pd.DataFrame, pd.DataFrame], object]] = None) -> pd.DataFrame:
+    """步驟 2️⃣~5️⃣：新增 RT rate、修改 Station 名稱、計算 RT rate、刪除 NaN 列，
+    最後以 schema.apply_schema 轉成 datetime / category / float32 / Int8。
+
+    snapshot 為 None 時不輸出任何中間資料；除錯時傳入
+    snapshots.snapshot_writer(...)，會在每個步驟後呼叫 snapshot(df, step)。
+    on_schema(轉換前, 轉換後) 在 apply_schema 前後各是同一批列時呼叫（例如比較記憶體用量）。
+    """
+    def dump(frame, step):
+        if snapshot is not None:
+            snapshot(frame, step)
+
+    # 其他欄位（例如 COUNT_COLUMNS）只供驗算使用，不進入報表
+    df = df[[c for c in df.columns if c in KEEP_COLUMNS or c in DETAIL_COLUMNS]].copy()
+    dump(df, "read")
+    df["RT rate"] = None
+    dump(df, "rt_column")
+    df = modify_station(df)
+    dump(df, "station")
+    df = compute_rt_rate(df)
+    dump(df, "rt_rate")
+    untyped = df.dropna(subset=[c for c in df.columns if c not in DETAIL_COLUMNS])
+    df_cleaned = apply_schema(untyped)
+    if on_schema is not None:
+        on_schema(untyped, df_cleaned)
+    dump(df_cleaned, "cleaned")
+    return df_cleaned
+
+
+def prepare_cached(df: pd.DataFrame, cache: Optional[ParseCache] = None,
+                   snapshot: Optional[Callable[[pd.DataFrame, str], object]] = None,
+                   on_schema: Optional[Callable[[pd.DataFrame, pd.DataFrame], object]] = None) -> pd.DataFrame:
+    """與 prepare(df, snapshot, on_schema) 相同；cache 為 ParseCache 時以 df 的內容雜湊為鍵，
+    把清理、轉換型態後的結果存成 Parquet，內容沒變時直接讀取（不會呼叫 on_schema）。
+
+    有 snapshot 時需要每個步驟的中間資料，不使用快取。
+    """
+    if cache is None or snapshot is not None:
+        return prepare(df, snapshot, on_schema)
+    digest, options = frame_hash(df), repr(KEEP_COLUMNS + DETAIL_COLUMNS)
+    df_cleaned = cache.get_frame(digest, PREPARED_KEY, options)
+    if df_cleaned is None:
+        df_cleaned = prepare(df, on_schema=on_schema)
+        cache.put_frame(digest, PREPARED_KEY, options, df_cleaned)
+    return df_cleaned
+
+
+def ft_groups(df_cleaned: pd.DataFrame) -> list[str]:
+    """回傳要輸出成分頁的 FT 站別（FT1、FT2...），依出現順序。"""
+    return [g for g in df_cleaned["Station"].unique() if str(g).startswith("FT")]
+
+
+def summary_stats(df_cleaned: pd.DataFrame) -> pd.DataFrame:
+    """各 FT 站別 Overall Yield 的統計摘要。"""
+    stats = []
+    for ft_group in ft_groups(df_cleaned):
+        overall = to_float64(df_cleaned.loc[df_cleaned["Station"] == ft_group, "Overall Yield"])
+        stats.append({
+            "Station": ft_group,
+            "平均": overall.mean(),
+            "標準差": overall.std(),
+            "最大值": overall.max(),
+            "最小值": overall.min(),
+        })
+    return pd.DataFrame(stats)
+
+
+def report_sheets(df_cleaned: pd.DataFrame,
+                  pareto: Optional[dict[str, pd.DataFrame]] = None,
+                  testers: Optional[pd.DataFrame] = None,
+                  rollups: Optional[dict[str, dict[str, pd.DataFrame]]] = None) -> dict[str, pd.DataFrame]:
+    """步驟 6️⃣：分類 FT1, FT2, FT3 到不同 Sheet，並加上 Summary。
+
+    rollups 為 rollup.rollup_sheets 的結果時，各 FT 分頁後面接著每週 / 每月彙總（FT1_Week、FT1_Month），
+    pareto 為 pareto.pareto_sheets 的結果時，再接著它的柏拉圖分頁（FT1_Pareto）。
+    df_cleaned 有 Tester 欄時在 Summary 後面加上 Tester 分頁；testers 為已算好的
+    testers.tester_stats 結果（None 時在這裡計算）。
+    """
+    sheets = {}
+    for ft_group in ft_groups(df_cleaned):
+        ft_rows = df_cleaned[df_cleaned["Station"] == ft_group]
+        sheets[ft_group] = export_frame(ft_rows.drop(columns=list(DETAIL_COLUMNS), errors="ignore"))
+        for label, table in (rollups or {}).get(ft_group, {}).items():
+            sheets[f"{ft_group}_{label}"] = table
+        if pareto and ft_group in pareto:
+            sheets[f"{ft_group}{PARETO_SUFFIX}"] = pareto[ft_group]
+    sheets["Summary"] = summary_stats(df_cleaned)
+    if "Tester" in df_cleaned.columns:
+        sheets["Tester"] = tester_stats(df_cleaned) if testers is None else testers
+    return sheets
+
+
+def max_rt_rate(df_cleaned: pd.DataFrame):
+    """步驟 8️⃣：同一產品各 FT 分頁共用的 RT rate 最大值（統一 Y 軸高度）。"""
+    value = df_cleaned["RT rate"].dropna().max()
+    return value if pd.isna(value) else int(value)
+
+
+def write_report(df_cleaned: pd.DataFrame, output_file: str, target: float = TARGET_YIELD,
+                 engine: Optional[str] = None, pareto: Optional[dict[str, pd.DataFrame]] = None,
+                 testers: Optional[pd.DataFrame] = None,
+                 rollups: Optional[dict[str, dict[str, pd.DataFrame]]] = None) -> None:
+    """步驟 6️⃣~9️⃣：輸出 FT 分頁與 Summary，調整欄寬並加入趨勢圖。
+
+    engine 可選 "openpyxl"（寫完再用 load_workbook 重開補圖）或 "xlsxwriter"
+    （一次串流寫完資料、欄寬、標準線與圖表）；預設有安裝 XlsxWriter 時用後者。
+    pareto、testers、rollups 見 report_sheets。
+    """
+    write_workbook(output_file, report_sheets(df_cleaned, pareto, testers, rollups), max_rt_rate(df_cleaned),
+                   target, engine)
+
+
+def output_name(sheet_name: str) -> str:
+    """由分頁名稱產生輸出檔名，例如 'QAL642E LFBGA 487B' → 'QAL642E_LFBGA_487B_FT_yield_trend.xlsx'。"""
+    stem = re.sub(r"[^\w]+", "_", sheet_name).strip("_")
+    return f"{stem}_FT_yield_trend.xlsx"
+
+
+def sheet_prefix(output_file: str) -> str:
+    """站點合併檔中的分頁前綴：QAL642C_FT_yield_trend.xlsx → QAL642C、
+    QAH648B_QFN64_yield_trend.xlsx → QAH648B_QFN64。"""
+    stem = os.path.basename(output_file)
+    stem = re.sub(r"(_FT)?_yield_trend\.xlsx$", "", stem)
+    return os.path.splitext(stem)[0]
+
+
+def write_site_report(products: list[tuple[str, pd.DataFrame, float]], output_file: str,
+                      engine: Optional[str] = None,
+                      extra: Optional[dict[str, pd.DataFrame]] = None) -> list[str]:
+    """把多個產品的 FT 分頁與 Summary 在同一次寫入中輸出成站點合併檔。
+
+    products 為 [(分頁前綴, df_cleaned, target)]，後面可以再接 report_sheets 的
+    pareto、testers、rollups；分頁名稱為「前綴_FT1」、「前綴_Summary」（截斷到 31 字元）；
+    RT rate 軸高度與標準線依各產品設定。extra 為不加前綴、放在最後的站點分頁
+    （例如 Tester 熱度圖）。回傳寫入的分頁名稱。
+    """
+    sheets, max_rt, targets = {}, {}, {}
+    for prefix, df_cleaned, target, *details in products:
+        product_max = max_rt_rate(df_cleaned)
+        for name, frame in report_sheets(df_cleaned, *details).items():
+            sheet_name = f"{prefix}_{name}"[:31]
+            if sheet_name in sheets:
+                raise ValueError(f"合併檔的分頁名稱重複: {sheet_name}")
+            sheets[sheet_name] = frame
+            max_rt[sheet_name] = product_max
+            targets[sheet_name] = target
+    if not sheets:
+        raise ValueError("沒有任何產品可以輸出")
+    for name, frame in (extra or {}).items():
+        if name in sheets:
+            raise ValueError(f"合併檔的分頁名稱重複: {name}")
+        sheets[name] = frame
+    write_workbook(output_file, sheets, max_rt, targets, engine)
+    return list(sheets)
+
+
+def run_product(df: pd.DataFrame, output_file: str, target: float = TARGET_YIELD,
+                snapshot: Optional[Callable[[pd.DataFrame, str], object]] = None,
+                engine: Optional[str] = None, rollup: Iterable[str] = ()) -> pd.DataFrame:
+    """對一個已讀入的產品分頁執行完整流程，回傳清理後的資料。
+
+    rollup 為 rollup.ROLLUP_FREQS 的鍵（"week"、"month"），另外輸出每週 / 每月彙總分頁。
+    """
+    df_cleaned = prepare(df, snapshot)
+    write_report(df_cleaned, output_file, target, engine, rollups=rollup_sheets(df_cleaned, rollup))
+    return df_cleaned
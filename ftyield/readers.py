@@ -0,0 +1,361 @@
+"""control table 讀取方式
+
+pd.read_excel(usecols="B, C, D, F, G, S, T") 會先把分頁的每一格都轉換成
+Python 值，最後才在 TextParser 裡丟掉不需要的欄位。這裡的 reader 只轉換需要的
+欄位，再交給 pandas 同一個 TextParser 推斷型態，結果與 pd.read_excel 相同：
+
+- "pandas"：pd.ExcelFile（原本的做法）
+- "openpyxl"：openpyxl read_only + iter_rows(values_only=True)，邊讀邊挑欄位
+- "xml"：直接開 zip，sharedStrings 只載入一次，iterparse 工作表 XML，
+  只解碼需要欄位的儲存格，讀完一列就清掉（不經過 openpyxl 的 Cell 物件）
+- "calamine"：pd.ExcelFile(engine="calamine")，Rust 實作，需要安裝 python-calamine
+- "auto"（預設）：有 calamine 時用 calamine；否則 .xls 用 pandas (xlrd)，
+  xlsx 小於 AUTO_STREAM_BYTES 用 pandas，較大的檔案用 xml
+
+每個 reader 都提供與 pd.ExcelFile 相同的 sheet_names、parse(sheet_name, usecols=,
+skiprows=, header=, nrows=)、close() 與 with 用法；指定 nrows 時讀到需要的列數就停止，
+pipeline.locate_header 以此只掃描分頁開頭幾列找表頭。
+"""
+
+from __future__ import annotations
+
+import importlib.util
+import itertools
+import math
+import os
+import posixpath
+import zipfile
+from typing import Iterable, Iterator, Optional, Sequence, Union
+from xml.etree.ElementTree import fromstring, iterparse
+
+import pandas as pd
+from openpyxl.styles.numbers import BUILTIN_FORMATS, is_date_format, is_timedelta_format
+from openpyxl.utils.datetime import CALENDAR_MAC_1904, CALENDAR_WINDOWS_1900, from_excel, from_ISO8601
+from pandas.io.parsers import TextParser
+
+READERS = ("auto", "pandas", "openpyxl", "xml", "calamine")
+DEFAULT_READER = "auto"
+# auto 模式下，沒有 calamine 時超過這個大小的 xlsx 改用 xml 串流讀取
+AUTO_STREAM_BYTES = 64 * 1024
+
+# openpyxl values_only 模式下錯誤值 (#DIV/0! …) 以字串回傳；pd.read_excel 會把它們當成 NaN
+ERROR_CODES = frozenset(("#NULL!", "#DIV/0!", "#VALUE!", "#REF!", "#NAME?", "#NUM!", "#N/A"))
+
+
+def column_index(letter: str) -> int:
+    """Excel 欄位字母轉成 0 起算的索引：A → 0、T → 19、AA → 26。"""
+    index = 0
+    for ch in letter.strip().upper():
+        if not "A" <= ch <= "Z":
+            raise ValueError(f"無效的欄位: {letter}")
+        index = index * 26 + ord(ch) - ord("A") + 1
+    return index - 1
+
+
+def parse_usecols(usecols: Union[str, Sequence[int], None]) -> Optional[list[int]]:
+    """"B, C, D, F, G, S, T" 或 "A:C, F" 轉成排序後的欄位索引；None 代表全部欄位。"""
+    if usecols is None:
+        return None
+    if not isinstance(usecols, str):
+        return sorted(int(i) for i in usecols)
+    indices = set()
+    for part in usecols.split(","):
+        if ":" in part:
+            first, last = part.split(":")
+            indices.update(range(column_index(first), column_index(last) + 1))
+        else:
+            indices.add(column_index(part))
+    return sorted(indices)
+
+
+def _convert(value):
+    """與 pandas openpyxl reader 的 _convert_cell 相同：空格 → ""、錯誤 → NaN、整數值的 float → int。"""
+    if value is None:
+        return ""
+    if isinstance(value, float):
+        return int(value) if value.is_integer() else value
+    if isinstance(value, str) and value in ERROR_CODES:
+        return math.nan
+    return value
+
+
+def rows_to_frame(rows: Iterable[Sequence], usecols=None, skiprows: int = 0,
+                  header: Optional[int] = 0, nrows: Optional[int] = None) -> pd.DataFrame:
+    """逐列只轉換需要的欄位，再交給 pandas 的 TextParser 推斷型態，結果與 pd.read_excel 相同。
+
+    rows 為原始儲存格值（空格為 None）。與 pandas 相同的細節：
+    - 結尾的空白列刪除，判斷看整列（含沒有選取的欄位）
+    - 表頭列保留整列，讓重複名稱 (x.1) 與 Unnamed: N 的編號依原本的欄位位置
+    - 選取的欄位超出分頁寬度時丟出 ParserError
+    header 只支援 0（skiprows 之後的第一列）或 None（沒有表頭，欄名為欄位索引）；
+    nrows 指定時與 pandas 相同只讀取 skiprows + 1 + nrows 列。
+    """
+    if header not in (0, None):
+        raise ValueError(f"header 只支援 0 或 None: {header!r}")
+    columns = parse_usecols(usecols)
+    if nrows is not None:
+        rows = itertools.islice(rows, skiprows + 1 + nrows)
+    # 沒有表頭時每一列都當成表頭區整列轉換（只用在掃描開頭幾列）
+    full_rows = math.inf if header is None else skiprows
+    head, body = [], []
+    width = 0
+    last_row_with_data = -1
+    for row_number, row in enumerate(rows):
+        # 整列最後一個非空格的位置 = pandas 去掉結尾空格後的寬度
+        row_width = next((i + 1 for i in range(len(row) - 1, -1, -1)
+                          if row[i] is not None and row[i] != ""), 0)
+        if row_width:
+            last_row_with_data = row_number
+            width = max(width, row_width)
+        if row_number <= full_rows or columns is None:
+            head.append([_convert(v) for v in row[:row_width]])
+        else:
+            n = len(row)
+            body.append([_convert(row[i]) if i < n else "" for i in columns])
+
+    total = last_row_with_data + 1
+    if total == 0:
+        return pd.DataFrame()
+    if columns is not None and columns and columns[-1] >= width:
+        raise pd.errors.ParserError(
+            f"Defining usecols with out-of-bounds indices is not allowed. {[i for i in columns if i >= width]}")
+
+    head = [r + [""] * (width - len(r)) for r in head[:total]]
+    if columns is None or header is None:
+        return TextParser(head, header=header, skiprows=skiprows, usecols=columns,
+                          skip_blank_lines=False).read(nrows)
+    names = TextParser(head[skiprows:skiprows + 1], header=0, usecols=columns).read().columns
+    body = body[:max(total - len(head), 0)]
+    return TextParser(body, header=None, names=list(names), skip_blank_lines=False).read() \
+        if body else pd.DataFrame(columns=names)
+
+
+class OpenpyxlStreamWorkbook:
+    """openpyxl read_only 模式逐列串流讀取，只轉換 usecols 指定的欄位。"""
+
+    def __init__(self, path: str):
+        from openpyxl import load_workbook
+
+        self.path = path
+        self.book = load_workbook(path, read_only=True, data_only=True, keep_links=False)
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return [ws.title for ws in self.book.worksheets]
+
+    def parse(self, sheet_name: str, usecols=None, skiprows: int = 0,
+              header: Optional[int] = 0, nrows: Optional[int] = None) -> pd.DataFrame:
+        if sheet_name not in self.sheet_names:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        ws = self.book[sheet_name]
+        ws.reset_dimensions()
+        return rows_to_frame(ws.iter_rows(values_only=True), usecols, skiprows, header, nrows)
+
+    def close(self) -> None:
+        self.book.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+MAIN_NS = "{http://schemas.openxmlformats.org/spreadsheetml/2006/main}"
+REL_NS = "{http://schemas.openxmlformats.org/package/2006/relationships}"
+DOC_REL_ID = "{http://schemas.openxmlformats.org/officeDocument/2006/relationships}id"
+WORKSHEET_REL = "http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"
+
+_ROW, _CELL, _VALUE, _INLINE = MAIN_NS + "row", MAIN_NS + "c", MAIN_NS + "v", MAIN_NS + "is"
+_T, _R = MAIN_NS + "t", MAIN_NS + "r"
+# 沒有選取的欄位只需要知道「有值」，用來判斷空白列，不必解碼
+_PRESENT = object()
+
+
+def _rich_text(node) -> str:
+    """<si> / <is> 的純文字：<t> 與 <r><t>，不含注音 <rPh>（與 openpyxl 相同）。"""
+    parts = [node.findtext(_T) or ""]
+    parts.extend(r.findtext(_T) or "" for r in node.iterfind(_R))
+    return "".join(parts)
+
+
+class XmlStreamWorkbook:
+    """直接解析 xlsx 的 XML：workbook.xml 找分頁、styles.xml 找日期格式，工作表以 iterparse 串流。
+
+    儲存格的值與 openpyxl (data_only) 相同：數字沒有小數點時為 int、日期格式的數字轉 datetime、
+    公式取快取值、布林、錯誤值字串。
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.zip = zipfile.ZipFile(path)
+        workbook = fromstring(self.zip.read("xl/workbook.xml"))
+        rels = fromstring(self.zip.read("xl/_rels/workbook.xml.rels"))
+        targets = {rel.get("Id"): rel.get("Target") for rel in rels.iter(REL_NS + "Relationship")
+                   if rel.get("Type") == WORKSHEET_REL}
+        self._parts = {}
+        for sheet in workbook.iter(MAIN_NS + "sheet"):
+            target = targets.get(sheet.get(DOC_REL_ID))
+            if target is not None:
+                part = target[1:] if target.startswith("/") else posixpath.normpath(posixpath.join("xl", target))
+                self._parts[sheet.get("name")] = part
+        pr = workbook.find(MAIN_NS + "workbookPr")
+        date1904 = pr is not None and pr.get("date1904") in ("1", "true")
+        self.epoch = CALENDAR_MAC_1904 if date1904 else CALENDAR_WINDOWS_1900
+        self.date_styles, self.timedelta_styles = self._read_styles()
+        self._strings = None
+
+    @property
+    def sheet_names(self) -> list[str]:
+        return list(self._parts)
+
+    def _read_styles(self) -> tuple[set, set]:
+        if "xl/styles.xml" not in self.zip.namelist():
+            return set(), set()
+        root = fromstring(self.zip.read("xl/styles.xml"))
+        custom = {int(f.get("numFmtId")): f.get("formatCode") for f in root.iter(MAIN_NS + "numFmt")}
+        dates, timedeltas = set(), set()
+        cell_xfs = root.find(MAIN_NS + "cellXfs")
+        for idx, xf in enumerate(cell_xfs if cell_xfs is not None else []):
+            fmt_id = int(xf.get("numFmtId", 0))
+            fmt = custom.get(fmt_id, BUILTIN_FORMATS.get(fmt_id))
+            if fmt is not None and is_date_format(fmt):
+                dates.add(idx)
+            if fmt is not None and is_timedelta_format(fmt):
+                timedeltas.add(idx)
+        return dates, timedeltas
+
+    @property
+    def shared_strings(self) -> list[str]:
+        """sharedStrings.xml 只在第一次需要時載入一次。"""
+        if self._strings is None:
+            self._strings = []
+            if "xl/sharedStrings.xml" in self.zip.namelist():
+                with self.zip.open("xl/sharedStrings.xml") as f:
+                    for _, node in iterparse(f):
+                        if node.tag == MAIN_NS + "si":
+                            self._strings.append(_rich_text(node).replace("x005F_", ""))
+                            node.clear()
+        return self._strings
+
+    def _value(self, cell):
+        data_type = cell.get("t", "n")
+        if data_type == "inlineStr":
+            node = cell.find(_INLINE)
+            return _rich_text(node) if node is not None else None
+        value = cell.findtext(_VALUE) or None
+        if value is None:
+            return None
+        if data_type == "n":
+            number = float(value) if "." in value or "E" in value or "e" in value else int(value)
+            style = int(cell.get("s", 0))
+            if style in self.date_styles:
+                try:
+                    return from_excel(number, self.epoch, timedelta=style in self.timedelta_styles)
+                except (OverflowError, ValueError):
+                    return "#VALUE!"
+            return number
+        if data_type == "s":
+            return self.shared_strings[int(value)]
+        if data_type == "b":
+            return bool(int(value))
+        if data_type == "d":
+            return from_ISO8601(value)
+        return value  # str（公式結果）、e（錯誤值）
+
+    def iter_rows(self, sheet_name: str, columns: Optional[list[int]] = None,
+                  full_rows: int = 0) -> Iterator[list]:
+        """逐列回傳儲存格值（空格為 None），缺少的列補空列。
+
+        columns 不是 None 時，前 full_rows 列之後只解碼 columns 中的欄位，
+        其他有值的儲存格以佔位物件表示。
+        """
+        wanted = None if columns is None else set(columns)
+        columns_seen = {}
+        counter = 0
+        with self.zip.open(self._parts[sheet_name]) as f:
+            for _, elem in iterparse(f):
+                if elem.tag != _ROW:
+                    continue
+                r = elem.get("r")
+                row_number = int(r) if r else counter + 1
+                while counter + 1 < row_number:
+                    counter += 1
+                    yield []
+                counter = row_number
+                decode_all = wanted is None or counter <= full_rows
+
+                values = []
+                col = -1
+                for cell in elem.iter(_CELL):
+                    ref = cell.get("r")
+                    if ref:
+                        letters = ref.rstrip("0123456789")
+                        col = columns_seen.get(letters)
+                        if col is None:
+                            col = columns_seen[letters] = column_index(letters)
+                    else:
+                        col += 1
+                    if col >= len(values):
+                        values.extend([None] * (col + 1 - len(values)))
+                    if decode_all or col in wanted:
+                        values[col] = self._value(cell)
+                    elif cell.find(_VALUE) is not None or cell.find(_INLINE) is not None:
+                        values[col] = _PRESENT
+                elem.clear()
+                yield values
+
+    def parse(self, sheet_name: str, usecols=None, skiprows: int = 0,
+              header: Optional[int] = 0, nrows: Optional[int] = None) -> pd.DataFrame:
+        if sheet_name not in self._parts:
+            raise ValueError(f"Worksheet named '{sheet_name}' not found")
+        columns = None if header is None else parse_usecols(usecols)
+        rows = self.iter_rows(sheet_name, columns, skiprows + 1)
+        return rows_to_frame(rows, usecols, skiprows, header, nrows)
+
+    def close(self) -> None:
+        self.zip.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+def has_calamine() -> bool:
+    return importlib.util.find_spec("python_calamine") is not None
+
+
+def select_reader(path: str, reader: Optional[str] = None) -> str:
+    """決定實際使用的 reader：auto 依是否安裝 calamine 與檔案大小選擇。
+
+    舊版 .xls（例如 矽格湖口-D10 的 control table）不是 zip 檔，
+    openpyxl / xml 無法讀取，改用 pandas (xlrd)。
+    """
+    reader = reader or DEFAULT_READER
+    if reader not in READERS:
+        raise ValueError(f"reader 必須是 {READERS} 之一: {reader}")
+    if reader == "calamine" and not has_calamine():
+        raise ValueError("reader='calamine' 需要先安裝 python-calamine")
+    if reader == "auto":
+        if has_calamine():
+            return "calamine"
+        if not zipfile.is_zipfile(path) or os.path.getsize(path) < AUTO_STREAM_BYTES:
+            return "pandas"
+        return "xml"
+    if reader in ("openpyxl", "xml") and not zipfile.is_zipfile(path):
+        return "pandas"
+    return reader
+
+
+def open_reader(path: str, reader: Optional[str] = None):
+    """依 reader 名稱開啟 workbook，回傳與 pd.ExcelFile 相同用法的物件。"""
+    reader = select_reader(path, reader)
+    if reader == "pandas":
+        return pd.ExcelFile(path)
+    if reader == "calamine":
+        return pd.ExcelFile(path, engine="calamine")
+    if reader == "xml":
+        return XmlStreamWorkbook(path)
+    return OpenpyxlStreamWorkbook(path)
@@ -0,0 +1,89 @@
+"""每週 / 每月的 yield 彙總
+
+FT 分頁每個 Lot# 一個點，lot 多了以後圖表又擠又慢。這裡把清理後的資料
+(df_cleaned) 依 Date 分到 ISO 週（週一~週日，標示為週報用的 2024W08）或月份
+（2024-02），所有 FT 站別以一次 groupby 計算每個區間的：
+
+  Week | Lots | Tested Qty | First Pass Yield | Overall Yield | RT rate
+
+Yield 以 schema.lot_weights 加權（Tested Qty，空白時改用 Lot_Size/Qty，與 Tester 分頁相同；
+區間內數量合計為 0 時 yield 為空白），RT rate 為區間內的最大值。沒有 lot 的區間不輸出；Date 無法解析的 lot 不計入。
+pipeline.report_sheets 把結果放在各 FT 分頁後面（FT1_Week、FT1_Month），
+表格的欄位順序與 FT 分頁相同，writer 以第一欄當 X 軸畫同樣的趨勢圖。
+"""
+
+from __future__ import annotations
+
+from typing import Iterable, Optional
+
+import pandas as pd
+
+from .schema import iso_week, lot_weights, to_float64, weighted_ratio
+
+# --rollup 的選項 → (pandas period 頻率, 分頁名稱後綴與第一欄欄名)
+ROLLUP_FREQS = {"week": ("W-SUN", "Week"), "month": ("M", "Month")}
+_AGGREGATES = {"Lots": "sum", "Tested Qty": "sum", "_first_pass": "sum", "_overall": "sum", "RT rate": "max"}
+
+
+def _label(periods: pd.PeriodIndex, label: str) -> pd.Index:
+    if label == "Week":
+        return pd.Index(iso_week(pd.Series(periods.start_time)))
+    return pd.Index(periods.strftime("%Y-%m"))
+
+
+def rollup_sums(df_cleaned: pd.DataFrame, freq: str) -> pd.DataFrame:
+    """各 FT 站別 × 區間的 lot 數、Tested Qty、加權 yield 合計與最大 RT rate（index 為 Station、Period）。
+
+    分成好幾段計算的結果接在一起後仍可交給 rollup_from_sums（增量處理時只計算新的 lot）。
+    """
+    period_freq = ROLLUP_FREQS[freq][0]
+    qty = lot_weights(df_cleaned)
+    frame = pd.DataFrame({
+        "Station": df_cleaned["Station"].astype(str),
+        "Period": df_cleaned["Date"].dt.to_period(period_freq),
+        "Lots": 1,
+        "Tested Qty": qty,
+        "_first_pass": to_float64(df_cleaned["First Pass Yield"]) * qty,
+        "_overall": to_float64(df_cleaned["Overall Yield"]) * qty,
+        "RT rate": df_cleaned["RT rate"].astype(float),
+    })
+    return frame.groupby(["Station", "Period"], sort=True).agg(_AGGREGATES)
+
+
+def rollup_from_sums(sums: pd.DataFrame, freq: str) -> dict[str, pd.DataFrame]:
+    """rollup_sums → {FT 站別: 每個區間一列的彙總}。"""
+    label = ROLLUP_FREQS[freq][1]
+    grouped = sums.groupby(level=["Station", "Period"], sort=True).agg(_AGGREGATES)
+    tables = {}
+    for station, group in grouped.groupby(level="Station", sort=False):
+        group = group.droplevel("Station")
+        qty = group["Tested Qty"].to_numpy()
+        tables[station] = pd.DataFrame({
+            label: _label(pd.PeriodIndex(group.index), label),
+            "Lots": group["Lots"].to_numpy().astype("int64"),
+            "Tested Qty": qty.astype("int64"),
+            "First Pass Yield": weighted_ratio(group["_first_pass"], qty),
+            "Overall Yield": weighted_ratio(group["_overall"], qty),
+            "RT rate": group["RT rate"].astype("Int64").to_numpy(),
+        })
+    return tables
+
+
+def rollup_table(df_cleaned: pd.DataFrame, freq: str) -> dict[str, pd.DataFrame]:
+    """{FT 站別: 每個區間一列的彙總}；freq 為 ROLLUP_FREQS 的鍵。"""
+    return rollup_from_sums(rollup_sums(df_cleaned, freq), freq)
+
+
+def rollup_sheets(df_cleaned: pd.DataFrame, freqs: Iterable[str],
+                  sums: Optional[dict[str, pd.DataFrame]] = None) -> dict[str, dict[str, pd.DataFrame]]:
+    """{FT 站別: {"Week": 表格, "Month": 表格}}，供 pipeline.report_sheets 放在各 FT 分頁後面。
+
+    sums 為 {freq: rollup_sums 結果} 時直接由它彙總，不再讀 df_cleaned。
+    """
+    sheets: dict[str, dict[str, pd.DataFrame]] = {}
+    for freq in freqs:
+        label = ROLLUP_FREQS[freq][1]
+        tables = rollup_table(df_cleaned, freq) if sums is None else rollup_from_sums(sums[freq], freq)
+        for station, table in tables.items():
+            sheets.setdefault(station, {})[label] = table
+    return sheets
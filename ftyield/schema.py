@@ -0,0 +1,165 @@
+"""清理後資料的欄位型態
+
+control table 讀進來時 Date 是 "2024.08.31" 字串（鴻谷 已經是日期）、
+Station / PGM Name 是大量重複的字串，Yield 欄因為重複的表頭列而是 object。
+prepare 最後以 apply_schema 一次轉換：
+
+- Date：單一格式 (DATE_FORMAT) 向量化 to_datetime，已經是日期的欄位不動
+- Device、Tester、PGM Name、Station：category
+- First Pass Yield、Overall Yield：float32；RT rate：Int8；Lot_Size/Qty：整數
+- Tested Qty：數值（無法轉換的值為 NaN）
+
+float32 寫進 Excel 會變成 0.98259997…，輸出前以 export_frame 轉回 float64
+（經過最短的十進位表示，0.9826 還原成 0.9826）。
+
+更早一步，parse_product_sheet 讀進來的原始分頁先經過 sheet_schema：重複的表頭列
+改成空值、每欄只留一種型態，解析快取才能存成 Parquet（見 cache.py）。
+"""
+
+from __future__ import annotations
+
+import numpy as np
+import pandas as pd
+
+DATE_FORMAT = "%Y.%m.%d"
+CATEGORY_COLUMNS = ("Device", "Tester", "PGM Name", "Station")
+YIELD_COLUMNS = ("First Pass Yield", "Overall Yield")
+
+
+def parse_dates(values: pd.Series) -> pd.Series:
+    """Date 欄轉成 datetime64；無法解析的值為 NaT 並印出筆數。"""
+    if pd.api.types.is_datetime64_any_dtype(values):
+        return values
+    text = values.astype(str).str.strip()
+    dates = pd.to_datetime(text, format=DATE_FORMAT, errors="coerce")
+    # 同一欄中混有 Excel 日期儲存格時，str() 後是 "2024-08-31 00:00:00"
+    is_iso = dates.isna() & text.str.match(r"\d{4}-\d{2}-\d{2}")
+    if is_iso.any():
+        dates[is_iso] = pd.to_datetime(text[is_iso], format="ISO8601", errors="coerce")
+    bad = dates.isna() & values.notna()
+    if bad.any():
+        print(f"[型別] {int(bad.sum())} 筆 Date 無法解析（例如 {values[bad].iloc[0]!r}），以空值處理")
+    return dates
+
+
+def id_text(value) -> str:
+    """Lot# 等代號轉成文字；Excel 存成浮點數的整數不帶 .0（5900006.0 → "5900006"）。"""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return value if isinstance(value, str) else str(value)
+
+
+def sheet_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """原始分頁每欄轉成單一型態（列數與順序不變，lot 結構依列的位置）；可重複呼叫。
+
+    - 與欄名相同的儲存格（分頁中重複出現的表頭列）改成空值
+    - 只剩數字的欄轉成數值（只有整數時為 Int64）、只剩日期的欄轉成 datetime64
+    - 數字與文字混合的欄（例如 Lot# 的 5700019 與 6200005-）把數字轉成文字
+    """
+    columns = {}
+    for col in df.columns:
+        values = df[col]
+        if not (values.dtype == object or pd.api.types.is_string_dtype(values)):
+            columns[col] = values
+            continue
+        cells = values.to_numpy(dtype=object, na_value=None)
+        label = str(col)
+        is_label = np.fromiter((isinstance(v, str) and v.strip() == label for v in cells), bool, len(cells))
+        if is_label.any():
+            cells = cells.copy()
+            cells[is_label] = None
+        kind = pd.api.types.infer_dtype(cells, skipna=True)
+        if kind == "integer":
+            values = pd.array(cells, dtype="Int64")  # 有空值的整數欄（Lot#、Bin1…）維持整數
+        elif kind in ("floating", "mixed-integer-float", "decimal", "boolean"):
+            values = pd.to_numeric(pd.Series(cells, dtype=object)).to_numpy()
+        elif kind in ("datetime", "datetime64", "date"):
+            values = pd.to_datetime(pd.Series(cells, dtype=object)).to_numpy()
+        elif kind in ("string", "empty"):
+            values = pd.array(cells, dtype="str") if kind == "string" else cells
+        else:
+            values = pd.array([v if v is None else id_text(v) for v in cells], dtype="str")
+        columns[col] = values
+    return pd.DataFrame(columns, index=df.index)
+
+
+def iso_week(dates: pd.Series) -> pd.Series:
+    """日期所在的 ISO 週，與週報相同的 "2024W08" 格式；NaT 為空值。"""
+    iso = dates.dt.isocalendar()
+    labels = iso["year"].astype(str) + "W" + iso["week"].astype(str).str.zfill(2)
+    return labels.where(dates.notna())
+
+
+def numbers(df: pd.DataFrame, col: str) -> np.ndarray:
+    """數量欄轉成 float64 陣列；重複的表頭列、文字或缺少的欄位為 NaN。"""
+    if col not in df.columns:
+        return np.full(len(df), np.nan)
+    return pd.to_numeric(df[col], errors="coerce").to_numpy(dtype=float, na_value=np.nan)
+
+
+def _quantity(df: pd.DataFrame, column: str) -> pd.Series:
+    if column not in df.columns:
+        return pd.Series(np.nan, index=df.index)
+    return pd.to_numeric(df[column], errors="coerce").astype(float)
+
+
+def lot_weights(df_cleaned: pd.DataFrame) -> pd.Series:
+    """加權 yield 用的每個 lot 數量：Tested Qty；空白或沒有該欄時用 Lot_Size/Qty，
+    兩者都沒有為 NaN（不計入加權）。Tester 分頁與週 / 月彙總共用，兩邊的數字才對得起來。"""
+    return _quantity(df_cleaned, "Tested Qty").fillna(_quantity(df_cleaned, "Lot_Size/Qty"))
+
+
+def weighted_ratio(weighted, qty) -> np.ndarray:
+    """加權合計 / 數量合計；數量為 0 時為 NaN。"""
+    weighted, qty = np.asarray(weighted, dtype=float), np.asarray(qty, dtype=float)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        return np.where(qty > 0, weighted / qty, np.nan)
+
+
+def apply_schema(df: pd.DataFrame) -> pd.DataFrame:
+    """把清理後的資料轉成固定型態（見模組說明），只轉換存在的欄位；可重複呼叫。"""
+    df = df.copy()
+    if "Date" in df.columns:
+        df["Date"] = parse_dates(df["Date"])
+    if "Lot_Size/Qty" in df.columns:
+        try:
+            df["Lot_Size/Qty"] = pd.to_numeric(df["Lot_Size/Qty"], downcast="integer")
+        except (ValueError, TypeError):
+            pass  # 有文字的數量欄維持原樣
+    if "Tested Qty" in df.columns:
+        df["Tested Qty"] = pd.to_numeric(df["Tested Qty"], errors="coerce")
+    for col in YIELD_COLUMNS:
+        if col in df.columns:
+            df[col] = pd.to_numeric(df[col]).astype("float32")
+    if "RT rate" in df.columns:
+        df["RT rate"] = df["RT rate"].astype("Int8")
+    for col in CATEGORY_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype("category")
+    return df
+
+
+def to_float64(values: pd.Series) -> pd.Series:
+    """float32 轉回 float64，經過最短十進位表示，避免 0.9826 變成 0.982599973678589。"""
+    if values.dtype != "float32":
+        return values
+    return values.astype(str).astype("float64")
+
+
+def export_frame(df: pd.DataFrame) -> pd.DataFrame:
+    """輸出到 Excel 前把 float32 欄轉回 float64（其他欄不動）。"""
+    float32 = [col for col in df.columns if df[col].dtype == "float32"]
+    if not float32:
+        return df
+    return df.assign(**{col: to_float64(df[col]) for col in float32})
+
+
+def memory_mb(df: pd.DataFrame) -> float:
+    return df.memory_usage(deep=True).sum() / (1 << 20)
+
+
+def memory_report(before: pd.DataFrame, after: pd.DataFrame) -> str:
+    """例如 "0.52 MB → 0.09 MB (-83%)"。"""
+    old, new = memory_mb(before), memory_mb(after)
+    change = f" ({(new - old) / old:+.0%})" if old else ""
+    return f"{old:.2f} MB → {new:.2f} MB{change}"
@@ -0,0 +1,81 @@
+"""除錯用的中間資料快照
+
+以前每次執行都會輸出 yield_trend_a.xlsx ~ yield_trend_e.xlsx 五個完整的
+workbook；現在只有加上 --debug-snapshots 時才輸出，並改用 Parquet / Feather
+這類欄式格式，需要用 Excel 檢查時再加上 --snapshot-xlsx。
+
+Parquet / Feather 需要 pyarrow，沒有安裝時改存成 pandas pickle。
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Callable, Optional
+
+import pandas as pd
+
+SNAPSHOT_FORMATS = ("parquet", "feather")
+
+# 與舊腳本相同的快照名稱
+SNAPSHOT_NAMES = {
+    "read": "yield_trend_a",
+    "rt_column": "yield_trend_b",
+    "station": "yield_trend_c",
+    "rt_rate": "yield_trend_d",
+    "cleaned": "yield_trend_e",
+}
+
+
+def write_snapshot(df: pd.DataFrame, name: str, directory: str = ".",
+                   fmt: str = "parquet", xlsx: bool = False) -> str:
+    """把 df 存成 directory/name.<fmt>，回傳實際寫入的檔案路徑。"""
+    if fmt not in SNAPSHOT_FORMATS:
+        raise ValueError(f"snapshot 格式必須是 {SNAPSHOT_FORMATS} 之一: {fmt}")
+    os.makedirs(directory, exist_ok=True)
+    base = os.path.join(directory, name)
+
+    # 欄式格式不接受混合型態的 object 欄位（例如重複出現的表頭列），先轉成字串
+    out = df.reset_index(drop=True)
+    for col in out.columns[out.dtypes == object]:
+        out[col] = out[col].map(lambda v: v if v is None or isinstance(v, str) else str(v))
+
+    try:
+        path = f"{base}.{fmt}"
+        if fmt == "parquet":
+            out.to_parquet(path, index=False)
+        else:
+            out.to_feather(path)
+    except ImportError:
+        path = f"{base}.pkl"
+        print(f"[snapshot] 未安裝 pyarrow，改存成 {path}")
+        df.to_pickle(path)
+
+    if xlsx:
+        df.to_excel(f"{base}.xlsx")
+    return path
+
+
+def snapshot_writer(directory: str, fmt: str = "parquet",
+                    xlsx: bool = False) -> Callable[[pd.DataFrame, str], str]:
+    """回傳 prepare(..., snapshot=) 可用的 callback：step 名稱 → yield_trend_a..e。"""
+    def snapshot(df: pd.DataFrame, step: str) -> str:
+        return write_snapshot(df, SNAPSHOT_NAMES.get(step, step), directory, fmt, xlsx)
+
+    return snapshot
+
+
+def add_snapshot_arguments(parser) -> None:
+    """在 argparse parser 上加入 --debug-snapshots 相關選項。"""
+    parser.add_argument("--debug-snapshots", action="store_true",
+                        help="輸出 yield_trend_a..e 中間資料快照（預設不輸出）")
+    parser.add_argument("--snapshot-format", choices=SNAPSHOT_FORMATS, default="parquet",
+                        help="快照格式（預設 parquet）")
+    parser.add_argument("--snapshot-xlsx", action="store_true",
+                        help="快照同時輸出 xlsx")
+
+
+def snapshot_from_args(args, directory: str) -> Optional[Callable[[pd.DataFrame, str], str]]:
+    """依命令列選項建立 snapshot callback；未開啟 --debug-snapshots 時回傳 None。"""
+    if not args.debug_snapshots:
+        return None
+    return snapshot_writer(directory, args.snapshot_format, args.snapshot_xlsx)
@@ -0,0 +1,182 @@
+"""每週 New product FT status workbook
+
+New product FT status W08.xlsx 這類週報每週一份，有兩種分頁：
+
+- 明細分頁（Q649_c、Q648-88、Q642FTx、Q642FT1_c…）：表頭與 control table 相同，
+  以 parse_product_sheet + prepare 讀取，型態與 control table 的清理結果相同
+- 週趨勢分頁（Q649、Q648-88p、Q642-FT1…）：上方是圖表，下方是
+  Weekly / First yield / Final yield / <20% RT count / Qty 表格，
+  轉成 Week、Date（該 ISO 週的星期一）、First Pass Yield、Overall Yield、RT count、Qty
+
+兩種資料各合併成一個 DataFrame（多一個 Sheet 欄），即 StatusWeek.lots / .trend。
+
+load_status_folder 讀取資料夾中所有 W01…W52 週報：每份週報的結果以檔案內容雜湊
+存進解析快取（見 cache.py），內容沒變的週報直接讀快取，新增 W09 時只解析 W09；
+需要解析的週報以 jobs 個子行程平行處理。
+"""
+
+from __future__ import annotations
+
+import fnmatch
+import os
+import re
+import traceback
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+import pandas as pd
+
+from .cache import ParseCache, file_hash
+from .pipeline import locate_header, parse_product_sheet, prepare
+from .readers import open_reader
+from .schema import apply_schema, sheet_schema
+
+STATUS_GLOB = "New product FT status W*.xls*"
+# 檔名中的週次，例如 "New product FT status W08.xlsx" → W08
+WEEK_PATTERN = re.compile(r"W(\d{1,2})(?!\d)", re.IGNORECASE)
+
+# 週趨勢表格的表頭 → 欄名；表格在圖表下方，所以要掃描較多列
+TREND_COLUMNS = {
+    "Weekly": "Week",
+    "First yield": "First Pass Yield",
+    "Final yield": "Overall Yield",
+    "<20% RT count": "RT count",
+    "Qty": "Qty",
+}
+TREND_SCAN_ROWS = 40
+# 快取中的項目名稱；週報的解析方式改變時更新 STATUS_CACHE_OPTIONS
+STATUS_CACHE_OPTIONS = "status-1"
+LOTS_KEY, TREND_KEY = "<status lots>", "<status trend>"
+
+
+@dataclass
+class StatusWeek:
+    """一份週報：明細 lot 資料與各產品的週趨勢（兩者都有 Sheet 欄）。"""
+    week: str
+    path: str
+    lots: pd.DataFrame
+    trend: pd.DataFrame
+
+
+def week_label(path: str) -> str:
+    """檔名中最後一個 Wxx，補成兩位數（W8 → W08）；找不到時丟出 ValueError。"""
+    matches = WEEK_PATTERN.findall(os.path.splitext(os.path.basename(path))[0])
+    if not matches:
+        raise ValueError(f"{os.path.basename(path)} 的檔名中找不到週次 (Wxx)")
+    return f"W{int(matches[-1]):02d}"
+
+
+def parse_trend_sheet(xls: pd.ExcelFile, sheet_name: str) -> pd.DataFrame:
+    """讀取週趨勢分頁的表格，到第一個空白的 Weekly 為止。"""
+    header_row, positions = locate_header(xls, sheet_name, TREND_SCAN_ROWS, TREND_COLUMNS, TREND_COLUMNS)
+    labels = sorted(positions, key=positions.get)
+    df = xls.parse(sheet_name, usecols=[positions[c] for c in labels], skiprows=header_row)
+    df.columns = [TREND_COLUMNS[c] for c in labels]
+    df = df[df["Week"].notna().cummin()].copy()
+    df["Week"] = df["Week"].astype(str).str.strip()
+    df["Date"] = pd.to_datetime(df["Week"] + "-1", format="%GW%V-%u", errors="coerce")
+    df["RT count"] = pd.to_numeric(df["RT count"]).astype("float32")
+    df["Qty"] = pd.to_numeric(df["Qty"], downcast="integer")
+    return apply_schema(df[["Week", "Date", "First Pass Yield", "Overall Yield", "RT count", "Qty"]])
+
+
+def _combine(frames: dict[str, pd.DataFrame]) -> pd.DataFrame:
+    """各分頁合併成一個 DataFrame，前面加上 Sheet 欄；合併後重新套用型態
+    （category 的類別不同，Lot# 在不同分頁可能是數字或文字）。"""
+    if not frames:
+        return pd.DataFrame({"Sheet": pd.Categorical([])})
+    df = pd.concat(frames, names=["Sheet", None]).reset_index(level="Sheet").reset_index(drop=True)
+    df = sheet_schema(df)
+    df["Sheet"] = df["Sheet"].astype("category")
+    return apply_schema(df)
+
+
+def read_status_workbook(path: str, reader: Optional[str] = None) -> StatusWeek:
+    """讀取一份週報：有 control table 表頭的分頁是明細，有 Weekly 表頭的是週趨勢，其他分頁略過。"""
+    lots, trend = {}, {}
+    with open_reader(path, reader) as xls:
+        for sheet in xls.sheet_names:
+            try:
+                raw = parse_product_sheet(xls, sheet)
+            except ValueError:  # 沒有 control table 表頭，改試 Weekly 表頭
+                pass
+            else:
+                # prepare 的錯誤是資料問題，不能當成「不是明細分頁」略過
+                lots[sheet] = prepare(raw)
+                continue
+            try:
+                trend[sheet] = parse_trend_sheet(xls, sheet)
+            except ValueError as e:
+                print(f"[略過分頁] {os.path.basename(path)} / {sheet}，{e}")
+    return StatusWeek(week_label(path), path, _combine(lots), _combine(trend))
+
+
+def status_files(folder: str, pattern: str = STATUS_GLOB) -> list[str]:
+    """資料夾中符合 pattern 的週報（略過 Excel 的 ~$ 暫存檔），依週次排序。"""
+    names = [n for n in os.listdir(folder) if fnmatch.fnmatch(n, pattern) and not n.startswith("~$")]
+    paths = [os.path.join(folder, n) for n in names]
+    return sorted(paths, key=lambda p: (week_label(p), p))
+
+
+def _cached_week(path: str, content_hash: str, cache: ParseCache) -> Optional[StatusWeek]:
+    lots = cache.get_frame(content_hash, LOTS_KEY, STATUS_CACHE_OPTIONS)
+    trend = cache.get_frame(content_hash, TREND_KEY, STATUS_CACHE_OPTIONS)
+    if lots is None or trend is None:
+        return None
+    return StatusWeek(week_label(path), path, lots, trend)
+
+
+def load_status_folder(folder: str, cache: Optional[ParseCache] = None, jobs: int = 1,
+                       reader: Optional[str] = None, pattern: str = STATUS_GLOB) -> dict[str, StatusWeek]:
+    """讀取資料夾中的所有週報，回傳 {週次: StatusWeek}，依週次排序。
+
+    有 cache 時內容沒變的週報直接讀快取，只解析新增或修改過的檔案；
+    jobs > 1 時這些檔案在子行程中平行解析。無法讀取的週報印出錯誤後略過。
+    同一週有兩份檔案時丟出 ValueError。
+    """
+    paths = status_files(folder, pattern)
+    seen = {}
+    for path in paths:
+        week = week_label(path)
+        if week in seen:
+            raise ValueError(f"{week} 有兩份週報: {os.path.basename(seen[week])}、{os.path.basename(path)}")
+        seen[week] = path
+
+    weeks, todo = {}, []
+    for path in paths:
+        content_hash = file_hash(path) if cache is not None else None
+        cached = _cached_week(path, content_hash, cache) if cache is not None else None
+        if cached is not None:
+            weeks[cached.week] = cached
+        else:
+            todo.append((path, content_hash))
+    print(f"[週報] {folder}：{len(paths)} 份，快取 {len(paths) - len(todo)} 份，解析 {len(todo)} 份")
+
+    if jobs <= 1 or len(todo) <= 1:
+        results = []
+        for path, _ in todo:
+            try:
+                results.append(read_status_workbook(path, reader))
+            except Exception as e:
+                results.append(e)
+    else:
+        with ProcessPoolExecutor(max_workers=min(jobs, len(todo))) as pool:
+            futures = [pool.submit(read_status_workbook, path, reader) for path, _ in todo]
+            results = []
+            for future in futures:
+                try:
+                    results.append(future.result())
+                except Exception as e:  # 包含子行程異常結束（例如 BrokenProcessPool）
+                    results.append(e)
+
+    for (path, content_hash), result in zip(todo, results):
+        if isinstance(result, Exception):
+            print(f"❌ 無法讀取 {path}: {result}")
+            traceback.print_exception(result)
+            continue
+        if cache is not None:
+            cache.put_frame(content_hash, LOTS_KEY, STATUS_CACHE_OPTIONS, result.lots)
+            cache.put_frame(content_hash, TREND_KEY, STATUS_CACHE_OPTIONS, result.trend)
+        weeks[result.week] = result
+    return dict(sorted(weeks.items()))
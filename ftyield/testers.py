@@ -0,0 +1,105 @@
+"""Tester 層級的 yield 分析
+
+Tester（E 欄，例如 TAG23）只填在每個 lot 的 FT 列，清理後的資料 (df_cleaned)
+每列正好是一個 lot，所以直接在已轉換型態的資料上以一次 groupby 統計：
+
+- Lots、Tested Qty 合計
+- 以 Tested Qty 加權的 First Pass Yield、Overall Yield（schema.lot_weights，空白時改用
+  Lot_Size/Qty，與週 / 月彙總相同）
+- RT rate 平均與分布（RT 0、RT 1、RT 2、RT ≥3 的 lot 數）
+
+Tester 名稱手動輸入，同一台常寫成 DX-10 / dx10 / DX10，統計前先轉大寫並去掉
+空白、-、_（tester_name）；FT 列沒有填 Tester 的 lot 歸在「未知」。
+
+每個產品輸出一個「Tester」分頁；tester_heatmap 把站點所有產品的結果排成
+Tester × 產品/站別 的 First Pass Yield 表格，writer 以色階標示（熱度圖）。
+"""
+
+from __future__ import annotations
+
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .schema import lot_weights, to_float64, weighted_ratio
+from .writer import HEATMAP_INDEX, write_workbook
+
+RT_BUCKETS = ("RT 0", "RT 1", "RT 2", "RT ≥3")
+UNKNOWN_TESTER = "未知"
+HEATMAP_SHEET = "Tester_heatmap"
+TESTER_COLUMNS = ["Station", "Tester", "Lots", "Tested Qty", "First Pass Yield", "Overall Yield", "平均 RT rate",
+                  *RT_BUCKETS]
+
+
+def tester_name(tester: pd.Series) -> pd.Series:
+    """DX-10、dx10、DX 10 → DX10；空值 → UNKNOWN_TESTER。"""
+    tester = tester.astype(object)
+    names = tester.where(tester.notna(), "").astype(str).str.upper().str.replace(r"[\s\-_]", "", regex=True)
+    return names.where(names != "", UNKNOWN_TESTER)
+
+
+def tester_sums(df_cleaned: pd.DataFrame) -> pd.DataFrame:
+    """各 FT 站別 × Tester 的 lot 數、Tested Qty、加權 yield 與 RT rate 合計（index 為 Station、Tester）。
+
+    分成好幾段計算的結果接在一起後仍可交給 tester_table（增量處理時只計算新的 lot）。
+    """
+    if "Tester" not in df_cleaned.columns:
+        df_cleaned = df_cleaned.iloc[:0].assign(Tester=pd.Series(dtype=object))
+    qty = lot_weights(df_cleaned)
+    rt = df_cleaned["RT rate"].astype(float)
+    bucket = np.minimum(rt.to_numpy(), len(RT_BUCKETS) - 1)
+    frame = pd.DataFrame({
+        "Station": df_cleaned["Station"].astype(str),
+        "Tester": tester_name(df_cleaned["Tester"]),
+        "Lots": 1,
+        "Tested Qty": qty,
+        "_first_pass": to_float64(df_cleaned["First Pass Yield"]) * qty,
+        "_overall": to_float64(df_cleaned["Overall Yield"]) * qty,
+        "_rt": rt,
+        **{name: bucket == i for i, name in enumerate(RT_BUCKETS)},
+    })
+    return frame.groupby(["Station", "Tester"], sort=True).sum()
+
+
+def tester_table(sums: pd.DataFrame) -> pd.DataFrame:
+    """tester_sums → 各 FT 站別 × Tester 一列的統計（見模組說明）。"""
+    if sums.empty:
+        return pd.DataFrame(columns=TESTER_COLUMNS)
+    sums = sums.groupby(level=["Station", "Tester"], sort=True).sum()
+    stats = pd.DataFrame({
+        "Lots": sums["Lots"].astype("int64"),
+        "Tested Qty": sums["Tested Qty"].astype("int64"),
+        "First Pass Yield": weighted_ratio(sums["_first_pass"], sums["Tested Qty"]),
+        "Overall Yield": weighted_ratio(sums["_overall"], sums["Tested Qty"]),
+        "平均 RT rate": sums["_rt"] / sums["Lots"],
+        **{name: sums[name].astype("int64") for name in RT_BUCKETS},
+    })
+    return stats.reset_index()[TESTER_COLUMNS]
+
+
+def tester_stats(df_cleaned: pd.DataFrame) -> pd.DataFrame:
+    """各 FT 站別 × Tester 一列的統計（見模組說明）；沒有 Tester 欄時回傳空表。"""
+    return tester_table(tester_sums(df_cleaned))
+
+
+def tester_heatmap(tables: dict[str, pd.DataFrame], value: str = "First Pass Yield") -> pd.DataFrame:
+    """{產品前綴: tester_stats} → Tester × 「產品 站別」的 value 表格（第一欄為 HEATMAP_INDEX）。"""
+    frames = [t.assign(Product=f"{prefix} ") for prefix, t in tables.items() if len(t)]
+    if not frames:
+        return pd.DataFrame(columns=[HEATMAP_INDEX])
+    stats = pd.concat(frames, ignore_index=True)
+    stats["Column"] = stats["Product"] + stats["Station"]
+    heatmap = stats.pivot(index="Tester", columns="Column", values=value)
+    heatmap = heatmap[list(dict.fromkeys(stats["Column"]))]  # 欄位依產品順序
+    heatmap.index.name = HEATMAP_INDEX
+    heatmap.columns.name = None
+    return heatmap.reset_index()
+
+
+def write_tester_heatmap(tables: dict[str, pd.DataFrame], output_file: str,
+                         engine: Optional[str] = None) -> pd.DataFrame:
+    """把 tester_heatmap 單獨寫成一個 workbook（HEATMAP_SHEET 分頁），回傳熱度圖表格。"""
+    heatmap = tester_heatmap(tables)
+    write_workbook(output_file, {HEATMAP_SHEET: heatmap}, None, None, engine)
+    return heatmap
@@ -0,0 +1,92 @@
+"""由 bin 數量驗算 First Pass Yield / Overall Yield
+
+control table 的 yield 欄位是手動或巨集填入的數值，報表只讀這兩欄、從來不檢查。
+這裡以 Bin1~Bin6、Loss、Damage、Tested Qty（COUNT_COLUMNS）重新計算：
+
+  First Pass Yield = FT 列 Bin1 / FT 列 Tested Qty
+  Overall Yield    = Total 列 Bin1 / FT 列 Tested Qty
+  Tested Qty       = FT 列 Bin1~Bin6 + Loss + Damage
+
+lot 結構由 LotTable 提供，所有 lot 一次以 NumPy 陣列計算。分頁中的 yield 四捨五入到
+小數 4 位，差距超過 YIELD_TOLERANCE 或 Tested Qty 與 bin 合計不符的 lot 列入差異報告。
+"""
+
+from __future__ import annotations
+
+import os
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from .lots import LotTable
+from .pipeline import COUNT_COLUMNS, lot_table
+from .schema import numbers, parse_dates
+
+YIELD_TOLERANCE = 1e-4
+BIN_COLUMNS = COUNT_COLUMNS[:-1]
+
+
+def _counts(values: np.ndarray) -> pd.arrays.IntegerArray:
+    """bin 數量（float，空白為 NaN）→ Int64。"""
+    return pd.array(np.round(values)).astype("Int64")
+
+
+def check_yields(raw: pd.DataFrame, lots: Optional[LotTable] = None,
+                 tolerance: float = YIELD_TOLERANCE) -> pd.DataFrame:
+    """每個 lot×站別一列：分頁中的 yield、由 bin 數量計算的 yield 與問題說明（沒有問題為空字串）。
+
+    raw 為 parse_product_sheet(..., KEEP_COLUMNS + COUNT_COLUMNS) 讀取的原始分頁。
+    """
+    raw = raw.reset_index(drop=True)
+    if lots is None:
+        lots = lot_table(raw)
+    ft, total, closed = lots.ft_row, np.maximum(lots.total_row, 0), lots.closed
+
+    bin1, tested = numbers(raw, "Bin1"), numbers(raw, "Tested Qty")
+    bin_total = np.nansum(np.column_stack([numbers(raw, c) for c in BIN_COLUMNS]), axis=1)
+    with np.errstate(divide="ignore", invalid="ignore"):
+        fpy = np.where(tested[ft] > 0, bin1[ft] / tested[ft], np.nan)
+        overall = np.where(closed & (tested[ft] > 0), bin1[total] / tested[ft], np.nan)
+    sheet_fpy = numbers(raw, "First Pass Yield")[ft]
+    sheet_overall = numbers(raw, "Overall Yield")[ft]
+
+    # NaN 比較為 False：缺少數值的 lot 不列為不符
+    bad_fpy = np.abs(fpy - sheet_fpy) > tolerance
+    bad_overall = np.abs(overall - sheet_overall) > tolerance
+    bad_total = ~np.isnan(tested[ft]) & (bin_total[ft] != tested[ft])
+    flags = pd.DataFrame({"First Pass Yield": bad_fpy, "Overall Yield": bad_overall,
+                          "Tested Qty ≠ bin 合計": bad_total})
+    problems = flags.dot(flags.columns + "、").str.rstrip("、")
+
+    # Lot# 保留 sheet_schema 的型態（Int64 不會變成 5700020.0），Date 與 pipeline 一樣轉成 datetime
+    return pd.DataFrame({
+        "Lot#": raw["Lot#"].iloc[ft].reset_index(drop=True),
+        "Station": lots.station,
+        "Date": parse_dates(raw["Date"].iloc[ft].reset_index(drop=True)) if "Date" in raw.columns else None,
+        "Tested Qty": _counts(tested[ft]),
+        "Bin 合計": _counts(bin_total[ft]),
+        "First Pass Yield": sheet_fpy,
+        "First Pass Yield (bin)": fpy,
+        "Overall Yield": sheet_overall,
+        "Overall Yield (bin)": overall,
+        "問題": problems.to_numpy(),
+    })
+
+
+def discrepancies(check: pd.DataFrame) -> pd.DataFrame:
+    """check_yields 結果中有問題的 lot。"""
+    return check[check["問題"] != ""]
+
+
+def write_check_report(reports: list[tuple[str, str, pd.DataFrame]], output_file: str) -> pd.DataFrame:
+    """把各產品的差異合併成一個報告（前面加上 Site、Sheet 欄）；.csv 以外的副檔名寫成 xlsx。"""
+    frames = [df.assign(Site=site, Sheet=sheet) for site, sheet, df in reports if len(df)]
+    columns = ["Site", "Sheet", *(frames[0].columns.drop(["Site", "Sheet"]) if frames else [])]
+    report = pd.concat(frames, ignore_index=True)[columns] if frames else pd.DataFrame(columns=columns)
+    os.makedirs(os.path.dirname(os.path.abspath(output_file)), exist_ok=True)
+    if output_file.lower().endswith(".csv"):
+        report.to_csv(output_file, index=False, encoding="utf-8-sig")  # Excel 開啟時中文不會變亂碼
+    else:
+        report.to_excel(output_file, index=False, sheet_name="Yield check")
+    return report
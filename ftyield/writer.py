@@ -0,0 +1,396 @@
+"""FT yield trend workbook 輸出
+
+兩種寫法，輸出相同的分頁、欄寬、0.98 標準線與 Yield / RT rate 組合圖
+（柏拉圖分頁則是 Fail Qty 柱狀圖 + Cum % 累計折線，見 pareto.py；Tester 熱度圖
+分頁則是紅－黃－綠色階，見 testers.py）：
+
+- openpyxl：pd.ExcelWriter 寫完資料後再 load_workbook 重開，補欄寬與圖表，存檔兩次
+- xlsxwriter：constant_memory 模式逐列串流寫入，欄寬、標準線與圖表在同一次
+  寫入完成，不需要重新解析輸出檔
+
+XlsxWriter 為選用套件，沒有安裝時自動使用 openpyxl。
+"""
+
+from __future__ import annotations
+
+import math
+from typing import Optional
+
+import pandas as pd
+from openpyxl import load_workbook
+from openpyxl.chart import LineChart, BarChart, Reference, Series
+from openpyxl.chart.axis import ChartLines
+from openpyxl.drawing.line import LineProperties
+from openpyxl.drawing.colors import ColorChoice
+from openpyxl.chart.shapes import GraphicalProperties
+from openpyxl.formatting.rule import ColorScaleRule
+from openpyxl.utils import get_column_letter
+
+try:
+    import xlsxwriter
+except ImportError:  # pragma: no cover - 依環境而定
+    xlsxwriter = None
+
+ENGINES = ("openpyxl", "xlsxwriter")
+DEFAULT_ENGINE = "xlsxwriter" if xlsxwriter is not None else "openpyxl"
+
+# 圖表位置與大小（與原腳本相同：K5，24 x 12 cm）
+CHART_ANCHOR = "K5"
+CHART_WIDTH_CM = 24
+CHART_HEIGHT_CM = 12
+# 趨勢圖 X 軸欄位的候選（依序取第一個存在的欄位）
+TREND_X_COLUMNS = ("Lot#", "Week", "Month")
+# 柏拉圖分頁的前四欄（pareto.pareto_table），圖表放在表格下方
+PARETO_COLUMNS = ("Bin", "Fail Qty", "Yield loss", "Cum %")
+# Tester 熱度圖分頁的第一欄（testers.tester_heatmap），其餘儲存格加上色階
+HEATMAP_INDEX = "Tester / First Pass Yield"
+# 色階：最低值紅、中位數黃、最高值綠
+HEATMAP_COLORS = ("F8696B", "FFEB84", "63BE7B")
+
+
+def trend_x_column(df: pd.DataFrame) -> Optional[str]:
+    """趨勢圖的 X 軸欄位：FT 分頁為 Lot#，每週 / 每月彙總分頁為 Week / Month（見 rollup.py）。"""
+    headers = [str(c) for c in df.columns]
+    return next((c for c in TREND_X_COLUMNS if c in headers), None)
+
+
+def has_trend_chart(df: pd.DataFrame) -> bool:
+    """只處理包含 Lot#（或 Week / Month）欄位的分頁（略過 Summary Sheet）。"""
+    return trend_x_column(df) is not None
+
+
+def has_pareto_chart(df: pd.DataFrame) -> bool:
+    return tuple(str(c) for c in df.columns[:len(PARETO_COLUMNS)]) == PARETO_COLUMNS
+
+
+def _pareto_anchor(df: pd.DataFrame) -> str:
+    return f"A{len(df) + 3}"
+
+
+def has_heatmap(df: pd.DataFrame) -> bool:
+    return len(df.columns) > 1 and len(df) > 0 and str(df.columns[0]) == HEATMAP_INDEX
+
+
+def _heatmap_range(df: pd.DataFrame) -> str:
+    return f"B2:{get_column_letter(len(df.columns))}{len(df) + 1}"
+
+
+def add_trend_chart(ws, max_rt_rate, target: float) -> None:
+    """為一個 FT 分頁加上 First Pass / Overall Yield 折線、標準線與 RT rate 柱狀圖。"""
+    raw_headers = [str(cell.value) for cell in ws[1]]
+
+    def find_col_exact(name):
+        if name in raw_headers:
+            return raw_headers.index(name) + 1
+        print(f"❌ 找不到欄位: {name}")
+        print("[欄位名稱清單]", raw_headers)
+        raise ValueError(f"請確認欄位名稱設定！")
+
+    x_name = next((c for c in TREND_X_COLUMNS if c in raw_headers), "Lot#")
+    lot_col = find_col_exact(x_name)
+    first_pass_col = find_col_exact("First Pass Yield")
+    overall_col = find_col_exact("Overall Yield")
+    rt_rate_col = find_col_exact("RT rate")
+    last_row = ws.max_row
+
+    # 折線圖
+    combo_chart = LineChart()
+    combo_chart.title = ""
+    combo_chart.x_axis.title = x_name
+    combo_chart.y_axis.title = "Yield (%)"
+
+    x_values = Reference(ws, min_col=lot_col, min_row=2, max_row=last_row)
+
+    for col_index in [first_pass_col, overall_col]:
+        y_values = Reference(ws, min_col=col_index, min_row=1, max_row=last_row)
+        combo_chart.add_data(y_values, titles_from_data=True)
+
+    # 讓折線圖恢復稜角（不平滑）
+    for s in combo_chart.series:
+        s.smooth = False
+
+    combo_chart.set_categories(x_values)
+    # 讓每個 Lot# 都顯示在 X 軸
+    combo_chart.x_axis.tickLblSkip = 1
+
+    # 加標準線
+    for i in range(2, last_row + 1):
+        ws.cell(row=i, column=overall_col + 2, value=target)
+
+    std_line = Reference(ws, min_col=overall_col + 2, min_row=2, max_row=last_row)
+    std_series = Series(std_line, title=f"標準線 ({target})")
+    std_series.graphicalProperties.line.solidFill = "808080"
+    std_series.graphicalProperties.line.dashStyle = "sysDash"
+    combo_chart.append(std_series)
+
+    # 柱狀圖 RT rate
+    bar_chart = BarChart()
+    bar_chart.y_axis.title = "RT rate"
+    bar_chart.y_axis.axId = 200
+    bar_chart.y_axis.majorGridlines = None
+
+    y_values = Reference(ws, min_col=rt_rate_col, min_row=1, max_row=last_row)
+    bar_chart.add_data(y_values, titles_from_data=True)
+    bar_chart.set_categories(x_values)
+
+    combo_chart.y_axis.crosses = "max"
+    combo_chart += bar_chart
+
+    bar_chart.y_axis.scaling.min = 0
+    if pd.notna(max_rt_rate) and max_rt_rate > 0:
+        bar_chart.y_axis.scaling.max = max_rt_rate * 2.0
+
+    # 淡化格線
+    gray_gridlines = ChartLines()
+    gray_gridlines.spPr = GraphicalProperties()
+    gray_gridlines.spPr.ln = LineProperties(solidFill=ColorChoice(prstClr="ltGray"))
+    combo_chart.y_axis.majorGridlines = gray_gridlines
+
+    # 放大圖表
+    combo_chart.width = CHART_WIDTH_CM
+    combo_chart.height = CHART_HEIGHT_CM
+
+    combo_chart.legend.position = "t"
+    combo_chart.legend.layout = None
+    combo_chart.legend.overlay = False
+
+    # 插入圖表
+    ws.add_chart(combo_chart, CHART_ANCHOR)
+
+
+def add_pareto_chart(ws, df: pd.DataFrame) -> None:
+    """柏拉圖：Fail Qty 柱狀圖 + Cum % 累計折線（副座標軸 0~100%）。"""
+    last_row = len(df) + 1
+    bar_chart = BarChart()
+    bar_chart.add_data(Reference(ws, min_col=2, min_row=1, max_row=last_row), titles_from_data=True)
+    bar_chart.set_categories(Reference(ws, min_col=1, min_row=2, max_row=last_row))
+    bar_chart.x_axis.title = "Bin"
+    bar_chart.y_axis.title = "Fail Qty"
+    bar_chart.y_axis.scaling.min = 0
+
+    line_chart = LineChart()
+    line_chart.add_data(Reference(ws, min_col=4, min_row=1, max_row=last_row), titles_from_data=True)
+    line_chart.series[0].smooth = False
+    line_chart.y_axis.axId = 200
+    line_chart.y_axis.title = "Cum %"
+    line_chart.y_axis.number_format = "0%"
+    line_chart.y_axis.scaling.min = 0
+    line_chart.y_axis.scaling.max = 1
+    line_chart.y_axis.majorGridlines = None
+    line_chart.y_axis.crosses = "max"
+    bar_chart += line_chart
+
+    bar_chart.width = CHART_WIDTH_CM
+    bar_chart.height = CHART_HEIGHT_CM
+    bar_chart.legend.position = "t"
+    ws.add_chart(bar_chart, _pareto_anchor(df))
+
+
+def _sheet_option(value, name: str):
+    """max_rt_rate / target 可以是所有分頁共用的值，或 {分頁名稱: 值}（站點合併檔中各產品不同）。"""
+    return value.get(name) if isinstance(value, dict) else value
+
+
+def write_workbook_openpyxl(output_file: str, sheets: dict[str, pd.DataFrame],
+                            max_rt_rate, target) -> None:
+    """pd.ExcelWriter 寫資料，再用 load_workbook 重開設定欄寬、加入圖表。"""
+    with pd.ExcelWriter(output_file, engine="openpyxl",
+                        date_format="yyyy.mm.dd", datetime_format="yyyy.mm.dd") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+
+    wb = load_workbook(output_file)
+    for name, df in sheets.items():
+        ws = wb[name]
+        # 7️⃣ 調整 Excel 欄寬（由 DataFrame 算好，不逐格掃描）
+        for col, width in enumerate(column_widths(df), start=1):
+            ws.column_dimensions[get_column_letter(col)].width = width
+        # 9️⃣ 加入圖表
+        if has_trend_chart(df):
+            add_trend_chart(ws, _sheet_option(max_rt_rate, name), _sheet_option(target, name))
+        elif has_pareto_chart(df):
+            add_pareto_chart(ws, df)
+        elif has_heatmap(df):
+            low, mid, high = HEATMAP_COLORS
+            ws.conditional_formatting.add(_heatmap_range(df), ColorScaleRule(
+                start_type="min", start_color=low, mid_type="percentile", mid_value=50,
+                mid_color=mid, end_type="max", end_color=high))
+
+    wb.save(output_file)
+
+
+def _cell_value(value):
+    """把 pandas / numpy 的值轉成 XlsxWriter 可以直接寫入的 Python 值，空值回傳 None。"""
+    if value is None or value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    if isinstance(value, pd.Timestamp):
+        return value.to_pydatetime()
+    return value
+
+
+def column_widths(df: pd.DataFrame) -> list[float]:
+    """由 DataFrame 直接算出欄寬：表頭與各欄字串長度的最大值 + 2。
+
+    每欄只做一次 astype(str).str.len().max()，不必在輸出後逐格掃描。
+    原本逐格版本會略過 0、空字串等 falsy 值，但它們的長度不會超過表頭，結果相同。
+    """
+    widths = []
+    for col in df.columns:
+        max_length = df[col].astype(str).str.len().max() if len(df) else None
+        header_length = len(str(col))
+        if pd.isna(max_length) or max_length < header_length:
+            max_length = header_length
+        widths.append(int(max_length) + 2)
+    return widths
+
+
+def _add_trend_chart_xlsxwriter(wb, ws, name: str, df: pd.DataFrame, max_rt_rate, target: float) -> None:
+    """XlsxWriter 版的組合圖：Yield 折線 + 標準線，RT rate 柱狀圖放在副座標軸。"""
+    headers = [str(c) for c in df.columns]
+    x_name = trend_x_column(df) or "Lot#"
+    for required in (x_name, "First Pass Yield", "Overall Yield", "RT rate"):
+        if required not in headers:
+            print(f"❌ 找不到欄位: {required}")
+            print("[欄位名稱清單]", headers)
+            raise ValueError(f"請確認欄位名稱設定！")
+    lot_col = headers.index(x_name)
+    overall_col = headers.index("Overall Yield")
+    rt_rate_col = headers.index("RT rate")
+    last_row = len(df)
+    categories = [name, 1, lot_col, last_row, lot_col]
+
+    combo_chart = wb.add_chart({"type": "line"})
+    for col_name in ("First Pass Yield", "Overall Yield"):
+        col = headers.index(col_name)
+        combo_chart.add_series({
+            "name": [name, 0, col],
+            "categories": categories,
+            "values": [name, 1, col, last_row, col],
+            "smooth": False,
+        })
+
+    # 加標準線（資料在 Overall Yield 右邊第二欄，寫入資料列時一起寫好）
+    combo_chart.add_series({
+        "name": f"標準線 ({target})",
+        "categories": categories,
+        "values": [name, 1, overall_col + 2, last_row, overall_col + 2],
+        "line": {"color": "#808080", "dash_type": "square_dot"},
+    })
+
+    # 柱狀圖 RT rate
+    bar_chart = wb.add_chart({"type": "column"})
+    bar_chart.add_series({
+        "name": [name, 0, rt_rate_col],
+        "categories": categories,
+        "values": [name, 1, rt_rate_col, last_row, rt_rate_col],
+        "y2_axis": True,
+    })
+    y2_axis = {"name": "RT rate", "min": 0, "major_gridlines": {"visible": False}}
+    if pd.notna(max_rt_rate) and max_rt_rate > 0:
+        y2_axis["max"] = float(max_rt_rate) * 2.0
+    bar_chart.set_y2_axis(y2_axis)
+    combo_chart.combine(bar_chart)
+
+    combo_chart.set_title({"none": True})
+    combo_chart.set_x_axis({"name": x_name, "interval_unit": 1})
+    # 淡化格線
+    combo_chart.set_y_axis({
+        "name": "Yield (%)",
+        "major_gridlines": {"visible": True, "line": {"color": "#C0C0C0"}},
+    })
+    combo_chart.set_legend({"position": "top"})
+    # 放大圖表（cm → 96 dpi 像素）
+    combo_chart.set_size({
+        "width": round(CHART_WIDTH_CM / 2.54 * 96),
+        "height": round(CHART_HEIGHT_CM / 2.54 * 96),
+    })
+    ws.insert_chart(CHART_ANCHOR, combo_chart)
+
+
+def _add_pareto_chart_xlsxwriter(wb, ws, name: str, df: pd.DataFrame) -> None:
+    """XlsxWriter 版的柏拉圖：Fail Qty 柱狀圖 + Cum % 折線放在副座標軸。"""
+    last_row = len(df)
+    categories = [name, 1, 0, last_row, 0]
+    bar_chart = wb.add_chart({"type": "column"})
+    bar_chart.add_series({"name": [name, 0, 1], "categories": categories, "values": [name, 1, 1, last_row, 1]})
+    line_chart = wb.add_chart({"type": "line"})
+    line_chart.add_series({"name": [name, 0, 3], "categories": categories,
+                           "values": [name, 1, 3, last_row, 3], "y2_axis": True, "smooth": False})
+    line_chart.set_y2_axis({"name": "Cum %", "min": 0, "max": 1, "num_format": "0%",
+                            "major_gridlines": {"visible": False}})
+    bar_chart.combine(line_chart)
+
+    bar_chart.set_title({"none": True})
+    bar_chart.set_x_axis({"name": "Bin"})
+    bar_chart.set_y_axis({"name": "Fail Qty", "min": 0,
+                          "major_gridlines": {"visible": True, "line": {"color": "#C0C0C0"}}})
+    bar_chart.set_legend({"position": "top"})
+    bar_chart.set_size({
+        "width": round(CHART_WIDTH_CM / 2.54 * 96),
+        "height": round(CHART_HEIGHT_CM / 2.54 * 96),
+    })
+    ws.insert_chart(_pareto_anchor(df), bar_chart)
+
+
+def write_workbook_xlsxwriter(output_file: str, sheets: dict[str, pd.DataFrame],
+                              max_rt_rate, target) -> None:
+    """XlsxWriter constant_memory 模式一次寫完資料、欄寬、標準線與圖表。"""
+    wb = xlsxwriter.Workbook(output_file, {"constant_memory": True})
+    header_format = wb.add_format({"bold": True, "border": 1, "align": "center", "valign": "top"})
+    date_format = wb.add_format({"num_format": "yyyy.mm.dd"})
+    try:
+        for name, df in sheets.items():
+            ws = wb.add_worksheet(name)
+            sheet_target = _sheet_option(target, name)
+            chart = has_trend_chart(df)
+            target_col = [str(c) for c in df.columns].index("Overall Yield") + 2 if chart else None
+
+            # 7️⃣ 欄寬要在寫入資料列之前設定
+            for col, width in enumerate(column_widths(df)):
+                ws.set_column(col, col, width)
+
+            formats = [date_format if pd.api.types.is_datetime64_any_dtype(dtype) else None
+                       for dtype in df.dtypes]
+            for col, header in enumerate(df.columns):
+                ws.write(0, col, str(header), header_format)
+            for row, values in enumerate(df.itertuples(index=False, name=None), start=1):
+                for col, value in enumerate(values):
+                    value = _cell_value(value)
+                    if value is not None:
+                        ws.write(row, col, value, formats[col])
+                if target_col is not None:
+                    ws.write_number(row, target_col, sheet_target)
+
+            # 9️⃣ 加入圖表
+            if chart:
+                _add_trend_chart_xlsxwriter(wb, ws, name, df, _sheet_option(max_rt_rate, name), sheet_target)
+            elif has_pareto_chart(df):
+                _add_pareto_chart_xlsxwriter(wb, ws, name, df)
+            elif has_heatmap(df):
+                low, mid, high = HEATMAP_COLORS
+                ws.conditional_format(_heatmap_range(df), {
+                    "type": "3_color_scale",
+                    "min_color": f"#{low}", "mid_color": f"#{mid}", "max_color": f"#{high}"})
+    finally:
+        wb.close()
+
+
+def write_workbook(output_file: str, sheets: dict[str, pd.DataFrame], max_rt_rate,
+                   target, engine: Optional[str] = None) -> None:
+    """依 engine 輸出 workbook；sheets 為 {分頁名稱: DataFrame}，含 Lot#（或 Week / Month）欄位的分頁會加上趨勢圖，
+    柏拉圖表格（PARETO_COLUMNS 開頭）的分頁加上柏拉圖，HEATMAP_INDEX 開頭的分頁加上色階。
+
+    max_rt_rate、target 為單一值時所有分頁共用；多個產品寫進同一個檔案時
+    傳入 {分頁名稱: 值}。
+    """
+    engine = engine or DEFAULT_ENGINE
+    if engine == "xlsxwriter":
+        if xlsxwriter is None:
+            raise ValueError("engine='xlsxwriter' 需要先安裝 XlsxWriter")
+        write_workbook_xlsxwriter(output_file, sheets, max_rt_rate, target)
+    elif engine == "openpyxl":
+        write_workbook_openpyxl(output_file, sheets, max_rt_rate, target)
+    else:
+        raise ValueError(f"engine 必須是 {ENGINES} 之一: {engine}")
@@ -0,0 +1,142 @@
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from ftyield import batch
+from ftyield.batch import read_all_sites, run_sites
+from ftyield.config import Product, Site, load_config, parse_config, select_sites
+from ftyield.pipeline import sheet_prefix
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_bundled_config_lists_every_site():
+    sites = load_config(ROOT / "ftyield.toml")
+    assert list(sites) == ["矽格北興", "矽格湖口", "鴻谷"]
+    assert sites["鴻谷"].products[0] == Product("QAH648B 64MCM(QFN)", "QAH648B_QFN64_yield_trend.xlsx", 0.98)
+    assert Path(sites["矽格北興"].input_path) == ROOT / "矽格北興-93k" / "Sunplus_Yield_control_table.xlsx"
+
+
+def test_parse_config_defaults_and_overrides():
+    sites = parse_config({
+        "defaults": {"target": 0.97},
+        "sites": {"A": {"products": [
+            {"sheet": "QAL642E LFBGA 487B"},
+            {"sheet": "QAL642C LFBGA 487B", "output": "c.xlsx", "target": 0.99},
+        ]}},
+    }, "/data")
+    a = sites["A"]
+    assert a.dir == "/data/A"
+    assert a.input == "Sunplus_Yield_control_table.xlsx"
+    assert a.products == (
+        Product("QAL642E LFBGA 487B", "QAL642E_LFBGA_487B_FT_yield_trend.xlsx", 0.97),
+        Product("QAL642C LFBGA 487B", "c.xlsx", 0.99),
+    )
+
+
+def test_select_sites_by_name_or_dir():
+    sites = load_config(ROOT / "ftyield.toml")
+    assert [s.name for s in select_sites(sites, ["矽格北興-93k", "鴻谷"])] == ["矽格北興", "鴻谷"]
+    assert len(select_sites(sites, None)) == 3
+    with pytest.raises(ValueError):
+        select_sites(sites, ["不存在"])
+
+
+def test_run_sites_shares_workbook_and_reports_errors(tmp_path):
+    shutil.copy(ROOT / "Sunplus_Yield_control_table.xlsx", tmp_path)
+    site = Site("demo", str(tmp_path), "Sunplus_Yield_control_table.xlsx", (
+        Product("QAL642E LFBGA 487B", "QAL642E_FT_yield_trend.xlsx"),
+        Product("沒有這個分頁", "missing.xlsx"),
+    ))
+    results = run_sites([site])
+    assert [r.ok for r in results] == [True, False]
+    assert (tmp_path / "QAL642E_FT_yield_trend.xlsx").exists()
+    assert not (tmp_path / "missing.xlsx").exists()
+    assert results[0].testers is not None and len(results[0].testers)
+    assert os.path.exists(site.tester_heatmap_path)
+
+
+def test_run_sites_process_pool(tmp_path):
+    shutil.copy(ROOT / "Sunplus_Yield_control_table.xlsx", tmp_path)
+    site = Site("demo", str(tmp_path), "Sunplus_Yield_control_table.xlsx", (
+        Product("QAL642E LFBGA 487B", "e.xlsx"),
+        Product("沒有這個分頁", "missing.xlsx"),
+        Product("QAL642C LFBGA 487B", "c.xlsx"),
+    ))
+    results = run_sites([site], jobs=2)
+    assert [(r.sheet, r.ok) for r in results] == [
+        ("QAL642E LFBGA 487B", True), ("沒有這個分頁", False), ("QAL642C LFBGA 487B", True),
+    ]
+    assert (tmp_path / "e.xlsx").exists() and (tmp_path / "c.xlsx").exists()
+
+
+def test_sheet_prefix():
+    assert sheet_prefix("QAL642C_FT_yield_trend.xlsx") == "QAL642C"
+    assert sheet_prefix("QAH648B_QFN64_yield_trend.xlsx") == "QAH648B_QFN64"
+    assert sheet_prefix("QUI658C_yield_trend.xlsx") == "QUI658C"
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "xlsxwriter"])
+def test_run_sites_merged_writes_one_workbook(tmp_path, engine):
+    shutil.copy(ROOT / "Sunplus_Yield_control_table.xlsx", tmp_path)
+    site = Site("demo", str(tmp_path), "Sunplus_Yield_control_table.xlsx", (
+        Product("QAL642E LFBGA 487B", "QAL642E_FT_yield_trend.xlsx", 0.95),
+        Product("沒有這個分頁", "missing.xlsx"),
+        Product("QAL642C LFBGA 487B", "QAL642C_FT_yield_trend.xlsx"),
+    ))
+    results = run_sites([site], engine=engine, merged=True)
+    assert [r.ok for r in results] == [True, False, True]
+    assert {r.output for r in results} == {site.merged_path}
+    assert not (tmp_path / "QAL642E_FT_yield_trend.xlsx").exists()
+
+    # 與各產品各自輸出的檔案內容相同
+    run_sites([site], engine=engine)
+    wb = load_workbook(site.merged_path)
+    assert wb.sheetnames[:7] == ["QAL642E_FT1", "QAL642E_FT1_Pareto", "QAL642E_FT2", "QAL642E_FT2_Pareto",
+                                 "QAL642E_FT3", "QAL642E_FT3_Pareto", "QAL642E_Summary"]
+    assert "QAL642C_Summary" in wb.sheetnames
+    assert "QAL642C_Tester" in wb.sheetnames and wb.sheetnames[-1] == "Tester_heatmap"
+    assert len(wb["QAL642C_FT1"]._charts) == 1
+    assert len(wb["QAL642C_FT1_Pareto"]._charts) == 1
+    for prefix in ("QAL642E", "QAL642C"):
+        for name, df in pd.read_excel(tmp_path / f"{prefix}_FT_yield_trend.xlsx", sheet_name=None).items():
+            pd.testing.assert_frame_equal(pd.read_excel(site.merged_path, sheet_name=f"{prefix}_{name}"), df)
+
+
+def test_parse_config_reader():
+    sites = parse_config({"defaults": {"reader": "xml"}, "sites": {"A": {}, "B": {"reader": "pandas"}}})
+    assert (sites["A"].reader, sites["B"].reader) == ("xml", "pandas")
+    assert parse_config({"sites": {"A": {}}})["A"].reader == "auto"
+    with pytest.raises(ValueError):
+        parse_config({"sites": {"A": {"reader": "excel"}}})
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_identical_control_tables_parsed_once(tmp_path, monkeypatch, capsys, jobs):
+    for name in ("a", "b"):
+        (tmp_path / name).mkdir()
+        shutil.copy(ROOT / "Sunplus_Yield_control_table.xlsx", tmp_path / name)
+    shutil.copy(ROOT / "鴻谷" / "Sunplus_Yield_control_table.xlsx", tmp_path / "c.xlsx")
+    sites = [
+        Site("a", str(tmp_path / "a"), "Sunplus_Yield_control_table.xlsx", (Product("QAL642E LFBGA 487B", "e.xlsx"),)),
+        Site("b", str(tmp_path / "b"), "Sunplus_Yield_control_table.xlsx", (
+            Product("QAL642C LFBGA 487B", "c.xlsx"), Product("QAL642E LFBGA 487B", "e.xlsx"))),
+        Site("c", str(tmp_path), "c.xlsx", (Product("QAH648B 64MCM(QFN)", "q.xlsx"),)),
+    ]
+    opened = []
+    if jobs == 1:  # 平行時 read_sheets 要送進子行程，不能換成 lambda
+        real_read_sheets = batch.read_sheets
+        monkeypatch.setattr(batch, "read_sheets", lambda path, *args: opened.append(path) or real_read_sheets(path, *args))
+
+    site_frames = read_all_sites(sites, jobs=jobs)
+    assert "3 個站點共 2 份不同的 control table" in capsys.readouterr().out
+    if jobs == 1:
+        assert opened == [sites[0].input_path, sites[2].input_path]
+    (a, frames_a), (b, frames_b), (c, frames_c) = site_frames
+    assert frames_a["QAL642E LFBGA 487B"] is frames_b["QAL642E LFBGA 487B"]
+    assert list(frames_b) == ["QAL642C LFBGA 487B", "QAL642E LFBGA 487B"]
+    assert "Station" in frames_c["QAH648B 64MCM(QFN)"].columns
@@ -0,0 +1,124 @@
+import os
+import shutil
+from pathlib import Path
+
+import pandas as pd
+
+from ftyield.cache import CachedWorkbook, ParseCache, file_hash
+from ftyield.batch import READ_COLUMNS
+from ftyield.pipeline import prepare, prepare_cached, read_product_sheets
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_cached_read_skips_excel(tmp_path, monkeypatch):
+    table = tmp_path / "Sunplus_Yield_control_table.xlsx"
+    shutil.copy(ROOT / "鴻谷" / "Sunplus_Yield_control_table.xlsx", table)
+    cache = ParseCache(str(tmp_path / "cache"))
+    expected = read_product_sheets(str(table))
+
+    first = read_product_sheets(str(table), cache=cache)
+    assert os.listdir(tmp_path / "cache")
+
+    # 內容沒變時不可以再開啟 workbook
+    def fail(*args, **kwargs):
+        raise AssertionError("不應該重新解析 xlsx")
+    monkeypatch.setattr(pd, "ExcelFile", fail)
+    second = read_product_sheets(str(table), cache=cache)
+
+    assert list(first) == list(second) == list(expected)
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(first[name], df)
+        pd.testing.assert_frame_equal(second[name], df)
+
+
+def test_cache_key_follows_content(tmp_path):
+    a = tmp_path / "a.xlsx"
+    b = tmp_path / "b.xlsx"
+    shutil.copy(ROOT / "Sunplus_Yield_control_table.xlsx", a)
+    shutil.copy(ROOT / "Sunplus_Yield_control_table.xlsx", b)
+    assert file_hash(str(a)) == file_hash(str(b))
+    shutil.copy(ROOT / "鴻谷" / "Sunplus_Yield_control_table.xlsx", b)
+    assert file_hash(str(a)) != file_hash(str(b))
+
+
+def test_parquet_only_and_mixed_columns_not_cached(tmp_path, capsys):
+    cache = ParseCache(str(tmp_path))
+    typed = pd.DataFrame({"Lot#": ["A1", "A2"], "Overall Yield": [0.99, 0.97]})
+    mixed = pd.DataFrame({"Lot#": ["Lot#", 5700019], "Overall Yield": ["Overall Yield", 0.97]})
+    assert cache.put_frame("h", "typed", "", typed).endswith(".parquet")
+    assert cache.put_frame("h", "mixed", "", mixed) is None
+    assert "無法存成 Parquet" in capsys.readouterr().out
+    pd.testing.assert_frame_equal(cache.get_frame("h", "typed", ""), typed)
+    assert cache.get_frame("h", "mixed", "") is None
+    assert cache.get_frame("h", "typed", "other options") is None
+
+
+def test_real_sheets_round_trip_through_parquet(tmp_path, capsys):
+    table = tmp_path / "Sunplus_Yield_control_table.xlsx"
+    shutil.copy(ROOT / "矽格北興-93k" / "Sunplus_Yield_control_table.xlsx", table)
+    cache = ParseCache(str(tmp_path / "cache"))
+    expected = read_product_sheets(str(table), columns=READ_COLUMNS)
+    cached = read_product_sheets(str(table), cache=cache, columns=READ_COLUMNS)
+    assert "無法存成 Parquet" not in capsys.readouterr().out
+    assert {os.path.splitext(n)[1] for n in os.listdir(tmp_path / "cache")} <= {".parquet", ".json"}
+    frames = [n for n in os.listdir(tmp_path / "cache") if n.endswith(".parquet")]
+    assert len(frames) == len(expected)
+    again = read_product_sheets(str(table), cache=cache, columns=READ_COLUMNS)
+    for name, df in expected.items():
+        pd.testing.assert_frame_equal(cached[name], df)
+        pd.testing.assert_frame_equal(again[name], df)
+
+
+def test_lru_eviction_by_total_size(tmp_path):
+    cache = ParseCache(str(tmp_path), max_bytes=10 ** 9)
+    df = pd.DataFrame({"x": range(1000)})
+    paths = [cache.put_frame("h", f"s{i}", "", df) for i in range(3)]
+    for i, path in enumerate(paths):
+        os.utime(path, (1000 + i, 1000 + i))
+    cache.get_frame("h", "s0", "")  # s0 變成最近使用
+
+    cache.max_bytes = cache.size() - 1
+    assert cache.evict() == [paths[1]]
+    assert cache.get_frame("h", "s0", "") is not None
+    assert cache.get_frame("h", "s2", "") is not None
+
+
+def test_cached_workbook_sheet_names(tmp_path):
+    cache = ParseCache(str(tmp_path / "cache"))
+    with CachedWorkbook(str(ROOT / "Sunplus_Yield_control_table.xlsx"), cache) as book:
+        names = book.sheet_names
+    with CachedWorkbook(str(ROOT / "Sunplus_Yield_control_table.xlsx"), cache) as book:
+        assert book.sheet_names == names
+        assert book._xls is None
+
+
+def test_prepare_cached_round_trips_typed_frame(tmp_path):
+    cache = ParseCache(str(tmp_path))
+    raw = read_product_sheets(str(ROOT / "矽格北興-93k" / "Sunplus_Yield_control_table.xlsx"),
+                              ["QAY465G LQFP 128L"], columns=READ_COLUMNS)["QAY465G LQFP 128L"]
+    expected = prepare(raw)
+    pd.testing.assert_frame_equal(prepare_cached(raw, cache), expected)
+    assert [n for n in os.listdir(tmp_path) if n.endswith(".parquet")]
+    pd.testing.assert_frame_equal(prepare_cached(raw, cache), expected)
+
+
+def test_evict_skips_temp_files_and_vanished_entries(tmp_path, monkeypatch):
+    cache = ParseCache(str(tmp_path), max_bytes=10 ** 9)
+    df = pd.DataFrame({"x": range(1000)})
+    paths = [cache.put_frame("h", f"s{i}", "", df) for i in range(2)]
+    other = tmp_path / "other.parquet.12345.tmp"  # 其他行程寫到一半的暫存檔
+    other.write_bytes(b"x" * 100000)
+    assert not list(tmp_path.glob(f"*.{os.getpid()}.tmp"))
+
+    real_remove = os.remove
+
+    def racing_remove(path):
+        if path == paths[0]:
+            real_remove(path)  # 另一個行程先刪掉了
+        real_remove(path)
+
+    monkeypatch.setattr(os, "remove", racing_remove)
+    cache.max_bytes = 0
+    assert cache.evict() == [paths[1]]
+    assert other.exists()
@@ -0,0 +1,63 @@
+from pathlib import Path
+
+import pytest
+
+from ftyield.__main__ import main
+from ftyield.config import Product, load_config
+from ftyield.discovery import discover_products, expand_site, list_sheets, match_sheets, parse_sheet_name
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.mark.parametrize("sheet, device, variant", [
+    ("QAL642E LFBGA 487B", "QAL642E", "LFBGA487"),
+    ("QAH648B 64MCM(QFN)", "QAH648B", "QFN64"),
+    ("QAH648B 88MCM(QFN)", "QAH648B", "QFN88"),
+    ("QFH633B 128MCM(EP", "QFH633B", "EP128"),
+    ("QDY515D 128LQFP", "QDY515D", "LQFP128"),
+    ("QFH649A EP-LQFP 128L_AUTO", "QFH649A", "EP-LQFP128"),
+    ("QFH649A E-PAD LQFP 128L", "QFH649A", "E-PAD-LQFP128"),
+    ("Q642FTx", "Q642FTx", ""),
+])
+def test_parse_sheet_name(sheet, device, variant):
+    product = parse_sheet_name(sheet)
+    assert (product.device, product.variant) == (device, variant)
+
+
+def test_list_sheets_xlsx_and_xls():
+    assert list_sheets(str(ROOT / "Sunplus_Yield_control_table.xlsx"))[-3:] == ["工作表1", "工作表2", "工作表3"]
+    # 矽格湖口-D10 的 control table 是舊版 .xls
+    assert list_sheets(str(ROOT / "矽格湖口-D10" / "Sunplus_Yield_control_table.xlsx"))[0] == "QUI658C LQFP 128L"
+
+
+def test_match_sheets_skips_scratch_and_applies_globs():
+    sheets = ["QFH610B LFBGA 442B", "QFH610B AHSBGA 442B", "QAL642E LFBGA 487B", "工作表1", "Sheet2"]
+    assert match_sheets(sheets) == sheets[:3]
+    assert match_sheets(sheets, ["QFH610B*"]) == sheets[:2]
+    assert match_sheets(sheets, ["*487B", "*AHSBGA*"]) == ["QFH610B AHSBGA 442B", "QAL642E LFBGA 487B"]
+
+
+def test_discover_products_index():
+    products = discover_products(str(ROOT / "鴻谷" / "Sunplus_Yield_control_table.xlsx"), ["QAH648*"])
+    assert [(p.device, p.variant) for p in products] == [
+        ("QAH648B", "QFN64"), ("QAH648A", "QFN88"), ("QAH648A", "QFN64"), ("QAH648B", "QFN88")]
+
+
+def test_expand_site_keeps_configured_outputs():
+    site = load_config(ROOT / "ftyield.toml")["矽格北興"]
+    expanded = expand_site(site, ["QFH610B*"])
+    assert expanded.products == (
+        Product("QFH610B LFBGA 442B", "QFH610B_LFBGA_442B_FT_yield_trend.xlsx", site.target),
+        Product("QFH610B AHSBGA 442B", "QFH610B_FT_yield_trend.xlsx"),
+    )
+
+
+def test_run_product_glob(tmp_path, capsys):
+    (tmp_path / "site").mkdir()
+    (tmp_path / "site" / "Sunplus_Yield_control_table.xlsx").write_bytes(
+        (ROOT / "Sunplus_Yield_control_table.xlsx").read_bytes())
+    (tmp_path / "ftyield.toml").write_text('[sites."demo"]\ndir = "site"\n', encoding="utf-8")
+    assert main(["run", "-c", str(tmp_path / "ftyield.toml"), "-p", "QAL642*", "--no-cache"]) == 0
+    assert sorted(p.name for p in (tmp_path / "site").glob("*_yield_trend.xlsx")) == [
+        "QAL642C_LFBGA_487B_FT_yield_trend.xlsx", "QAL642E_LFBGA_487B_FT_yield_trend.xlsx"]
+    assert "完成 2 / 2 個產品" in capsys.readouterr().out
@@ -0,0 +1,112 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from ftyield import testers
+from ftyield.batch import READ_COLUMNS
+from ftyield.incremental import HistoryStore, high_water_mark, prepare_derived, prepare_incremental
+from ftyield.pareto import bin_counts, pareto_from_counts, pareto_sheets
+from ftyield.pipeline import lot_table, prepare, read_product_sheets
+from ftyield.rollup import rollup_from_sums, rollup_sums, rollup_table
+from ftyield.validate import check_yields
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+@pytest.fixture(scope="module")
+def raw():
+    return read_product_sheets(str(ROOT / "矽格北興-93k" / "Sunplus_Yield_control_table.xlsx"),
+                               ["QAL642C LFBGA 487B"], columns=READ_COLUMNS)["QAL642C LFBGA 487B"]
+
+
+def test_high_water_mark_stops_after_last_total(raw):
+    hwm = high_water_mark(raw)
+    assert raw["Station"].iloc[hwm - 1] == "Total"
+    assert "Total" not in set(raw["Station"].iloc[hwm:])
+    assert high_water_mark(raw.iloc[:0]) == 0
+
+
+@pytest.mark.parametrize("cut", [0.3, 0.7])
+def test_appended_lots_match_full_run(tmp_path, raw, cut):
+    store = HistoryStore(str(tmp_path))
+    # 第一次執行時表格只有前面一部分（最後一個 lot 可能還沒有 Total）
+    rows = int(len(raw) * cut)
+    pd.testing.assert_frame_equal(prepare_incremental(raw.iloc[:rows], store, "k"), prepare(raw.iloc[:rows]))
+
+    seen = []
+    result = prepare_incremental(raw, store, "k", snapshot=lambda df, step: seen.append((step, len(df))))
+    pd.testing.assert_frame_equal(result, prepare(raw))
+    # 只轉換 high-water mark 之後的列
+    assert dict(seen)["read"] == len(raw) - high_water_mark(raw.iloc[:rows])
+
+    # 沒有新資料時直接使用歷史
+    pd.testing.assert_frame_equal(prepare_incremental(raw, store, "k"), prepare(raw))
+
+
+def test_edited_history_triggers_rebuild(tmp_path, raw):
+    store = HistoryStore(str(tmp_path))
+    prepare_incremental(raw, store, "k")
+
+    edited = raw.copy()
+    row = edited.index[(edited["Station"] == "Total").to_numpy()][-1]
+    edited.loc[row, "Overall Yield"] = 0.5
+    seen = []
+    result = prepare_incremental(edited, store, "k", snapshot=lambda df, step: seen.append((step, len(df))))
+    pd.testing.assert_frame_equal(result, prepare(edited))
+    assert dict(seen)["read"] == len(edited)
+
+
+def test_edit_far_before_high_water_mark_triggers_rebuild(tmp_path, raw):
+    store = HistoryStore(str(tmp_path))
+    prepare_incremental(raw, store, "k")
+
+    edited = raw.copy()
+    row = edited.index[(edited["Station"] == "Total").to_numpy()][0]
+    assert high_water_mark(raw) - row > 64
+    edited.loc[row, "Overall Yield"] = 0.5
+    seen = []
+    prepare_incremental(edited, store, "k", snapshot=lambda df, step: seen.append((step, len(df))))
+    assert dict(seen)["read"] == len(edited)
+
+
+def _derive(segment, cleaned):
+    lots = lot_table(segment)
+    return {"check": check_yields(segment, lots), "bins": bin_counts(segment, lots),
+            "testers": testers.tester_sums(cleaned), "week": rollup_sums(cleaned, "week")}
+
+
+def test_derived_stats_only_for_new_lots_match_full_run(tmp_path, raw):
+    store = HistoryStore(str(tmp_path))
+    prepare_derived(raw.iloc[:int(len(raw) * 0.6)], store, "k", _derive)
+
+    segments = []
+    df_cleaned, parts = prepare_derived(raw, store, "k", lambda s, c: segments.append(len(s)) or _derive(s, c))
+    # 空區段確認保存的項目，之後只有新增的列
+    assert sum(segments) == len(raw) - high_water_mark(raw.iloc[:int(len(raw) * 0.6)])
+    pd.testing.assert_frame_equal(df_cleaned, prepare(raw))
+    pd.testing.assert_frame_equal(parts["check"].reset_index(drop=True), check_yields(raw))
+    full = pareto_sheets(raw)
+    merged = pareto_from_counts(parts["bins"])
+    assert merged.keys() == full.keys()
+    for station in full:
+        pd.testing.assert_frame_equal(merged[station], full[station])
+    pd.testing.assert_frame_equal(testers.tester_table(parts["testers"]), testers.tester_stats(df_cleaned))
+    weekly = rollup_from_sums(parts["week"], "week")
+    for station, table in rollup_table(df_cleaned, "week").items():
+        pd.testing.assert_frame_equal(weekly[station], table)
+
+
+def test_state_records_last_lot_as_text(tmp_path, raw, capsys):
+    store = HistoryStore(str(tmp_path))
+    prepare_incremental(raw, store, "k")
+    meta, history, _ = store.load("k")
+    assert meta["last_lot"] == str(history["Lot#"].iloc[-1]) and not meta["last_lot"].endswith(".0")
+    assert meta["last_date"] == str(history["Date"].iloc[-1])
+    prepare_incremental(raw, store, "k")
+    assert f"上次 Lot# {meta['last_lot']}，" in capsys.readouterr().out
+
+    # 只有數字的 Lot# 欄從 Excel 讀成 float（鴻谷的分頁）
+    numeric = raw.assign(**{"Lot#": pd.to_numeric(raw["Lot#"]).astype(float)})
+    prepare_incremental(numeric, store, "float", full=True)
+    assert store.load("float")[0]["last_lot"] == meta["last_lot"]
@@ -0,0 +1,45 @@
+import numpy as np
+import pandas as pd
+
+from ftyield.lots import LotTable
+
+STATIONS = [
+    "R1", "Total",                  # 第一個 FT 之前
+    "FT1", "R1", "R3", "R2", "Total",
+    "FT2", "R1",                    # 沒有 Total 就進入下一個 lot
+    "FT1", "Total", "R4", "Total",  # Total 之後的列不屬於 lot
+    "FT3", "R2",                    # 最後一組沒有 Total
+]
+
+
+def test_lot_offsets():
+    lots = LotTable.from_stations(pd.Series(STATIONS))
+    assert len(lots) == 4
+    assert lots.ft_row.tolist() == [2, 7, 9, 13]
+    assert lots.total_row.tolist() == [6, -1, 10, -1]
+    assert lots.rows(0) == slice(2, 7) and lots.rows(1) == slice(7, 9) and lots.rows(3) == slice(13, 15)
+    assert lots.retests(0).tolist() == [3, 4, 5]
+    assert lots.retests(2).tolist() == []  # Total 之後的 R4 不算
+    assert lots.rt_rate().tolist() == [3, 1, 0, 2]
+    assert lots.row_lot().tolist() == [-1, -1, 0, 0, 0, 0, 0, 1, 1, 2, 2, -1, -1, 3, 3]
+    assert lots.high_water_mark() == 11
+    assert lots.broadcast(lots.rt_rate()).tolist()[:12] == [pd.NA] * 2 + [3] * 5 + [pd.NA] * 2 + [0, 0, pd.NA]
+
+
+def test_to_frame_joins_ft_rows():
+    df = pd.DataFrame({"Lot#": [f"L{i}" for i in range(len(STATIONS))], "Station": STATIONS})
+    frame = LotTable.from_stations(df["Station"]).to_frame(df)
+    assert frame["Lot#"].tolist() == ["L2", "L7", "L9", "L13"]
+    assert frame["Station"].tolist() == ["FT1", "FT2", "FT1", "FT3"]
+    assert frame["Total row"].tolist() == [6, pd.NA, 10, pd.NA]
+    assert frame["Retests"].tolist() == [3, 1, 0, 1]
+
+
+def test_100k_lot_history_is_small():
+    retests = np.random.default_rng(0).integers(0, 4, 100_000)
+    stations = [s for i, n in enumerate(retests)
+                for s in [f"FT{i % 3 + 1}", *(f"R{k}" for k in range(1, n + 1)), "Total"]]
+    lots = LotTable.from_stations(pd.Series(stations))
+    assert len(lots) == 100_000
+    assert lots.rt_rate().tolist() == retests.tolist()
+    assert lots.memory_bytes() < 10 << 20
@@ -0,0 +1,121 @@
+import shutil
+import zipfile
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from ftyield.__main__ import main
+from ftyield.merge import file_prefix, merge_workbooks, merged_sheet_name, site_trend_files
+from ftyield.pipeline import read_product_sheets, run_product
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_merged_sheet_name_matches_merged_1():
+    assert file_prefix("鴻谷/QAH648B_QFN64_yield_trend.xlsx") == "QAH648B_QFN64"
+    assert merged_sheet_name("QAH648B_QFN64", "FT1") == "QAH648B_QFN64_FT1"
+    assert len(merged_sheet_name("A" * 30, "Summary")) == 31
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "xlsxwriter"])
+def test_merge_pipeline_outputs(tmp_path, engine):
+    frames = read_product_sheets(str(ROOT / "Sunplus_Yield_control_table.xlsx"),
+                                 ["QAL642C LFBGA 487B", "QAL642E LFBGA 487B"])
+    files = []
+    for sheet, prefix in zip(frames, ["QAL642C_FT", "QAL642E_FT"]):
+        files.append(tmp_path / f"{prefix}_yield_trend.xlsx")
+        run_product(frames[sheet], str(files[-1]), engine=engine)
+
+    output = tmp_path / "site_yield_trend.xlsx"
+    merged = merge_workbooks([str(f) for f in files], str(output))
+
+    wb = load_workbook(output)
+    assert wb.sheetnames == merged
+    assert "QAL642C_FT_Summary" in merged and "QAL642E_FT_FT1" in merged
+    assert len(wb["QAL642E_FT_FT1"]._charts) == 1
+    with zipfile.ZipFile(output) as zf:
+        charts = [zf.read(n).decode() for n in zf.namelist() if n.startswith("xl/charts/")]
+    assert any("'QAL642E_FT_FT1'!" in c for c in charts)
+    assert not any("'FT1'!" in c for c in charts)
+
+    for f in files:
+        for name, df in pd.read_excel(f, sheet_name=None).items():
+            pd.testing.assert_frame_equal(
+                pd.read_excel(output, sheet_name=merged_sheet_name(file_prefix(str(f)), name)), df)
+
+
+def test_merge_excel_saved_workbook(tmp_path):
+    # Excel 另存的檔案使用 sharedStrings 與較完整的 styles.xml
+    src = tmp_path / "鴻谷_yield_trend.xlsx"
+    shutil.copy(ROOT / "鴻谷" / "鴻谷_yield_trend.xlsx", src)
+    output = tmp_path / "out.xlsx"
+    merged = merge_workbooks([str(src)], str(output))
+
+    for name, df in pd.read_excel(src, sheet_name=None).items():
+        pd.testing.assert_frame_equal(pd.read_excel(output, sheet_name=merged_sheet_name("鴻谷", name)), df)
+    assert len(load_workbook(output)[merged[0]]._charts) == 1
+
+
+def test_merge_rejects_duplicate_names(tmp_path):
+    src = ROOT / "鴻谷" / "QFH633B_FT_yield_trend.xlsx"
+    output = tmp_path / "out.xlsx"
+    with pytest.raises(ValueError):
+        merge_workbooks([str(src), str(src)], str(output))
+    assert not output.exists()
+
+
+def test_merge_cli_site(tmp_path):
+    site = tmp_path / "鴻谷"
+    site.mkdir()
+    for name in ("QAH648B_QFN64_yield_trend.xlsx", "QFH633B_FT_yield_trend.xlsx", "鴻谷_yield_trend.xlsx"):
+        shutil.copy(ROOT / "鴻谷" / name, site / name)
+    config = tmp_path / "ftyield.toml"
+    config.write_text('[sites."鴻谷"]\nproducts = []\n', encoding="utf-8")
+
+    assert site_trend_files(str(site), str(site / "鴻谷_yield_trend.xlsx")) == [
+        str(site / "QAH648B_QFN64_yield_trend.xlsx"), str(site / "QFH633B_FT_yield_trend.xlsx")]
+    assert main(["merge", "--config", str(config), "--site", "鴻谷"]) == 0
+    assert load_workbook(site / "鴻谷_yield_trend.xlsx").sheetnames == [
+        "QAH648B_QFN64_FT1", "QAH648B_QFN64_FT2", "QFH633B_FT_FT1"]
+
+    # -o 指定其他路徑時，站點資料夾中舊的 鴻谷_yield_trend.xlsx 不能當成來源
+    other = tmp_path / "other.xlsx"
+    assert main(["merge", "--config", str(config), "--site", "鴻谷", "-o", str(other)]) == 0
+    assert load_workbook(other).sheetnames == ["QAH648B_QFN64_FT1", "QAH648B_QFN64_FT2", "QFH633B_FT_FT1"]
+
+
+def test_merge_keeps_dxfs_named_styles_and_defined_names(tmp_path, capsys):
+    from openpyxl import Workbook
+    from openpyxl.formatting.rule import CellIsRule
+    from openpyxl.styles import Font, NamedStyle, PatternFill
+    from openpyxl.workbook.defined_name import DefinedName
+
+    files = []
+    for prefix, color in (("A", "FFFF0000"), ("B", "FF00FF00")):
+        wb = Workbook()
+        ws = wb.active
+        ws.title = "FT1"
+        ws.append([0.5, 0.99])
+        ws.conditional_formatting.add("A1:B1", CellIsRule(operator="lessThan", formula=["0.98"],
+                                                          fill=PatternFill("solid", bgColor=color)))
+        style = NamedStyle(name=f"{prefix}_title", font=Font(bold=True, size=14))
+        ws["A1"].style = style
+        ws.print_area = "A1:B1"
+        wb.defined_names[f"{prefix}_data"] = DefinedName(f"{prefix}_data", attr_text="'FT1'!$A$1:$B$1")
+        files.append(tmp_path / f"{prefix}_yield_trend.xlsx")
+        wb.save(files[-1])
+
+    output = tmp_path / "out.xlsx"
+    merge_workbooks([str(f) for f in files], str(output))
+    assert "[略過" not in capsys.readouterr().out
+
+    wb = load_workbook(output)
+    for prefix, color in (("A", "FFFF0000"), ("B", "FF00FF00")):
+        ws = wb[f"{prefix}_FT1"]
+        rule = next(iter(ws.conditional_formatting)).rules[0]
+        assert rule.dxf.fill.bgColor.rgb == color
+        assert ws["A1"].style == f"{prefix}_title" and ws["A1"].font.b
+        assert ws.print_area == f"'{prefix}_FT1'!$A$1:$B$1"
+        assert wb.defined_names[f"{prefix}_data"].attr_text == f"'{prefix}_FT1'!$A$1:$B$1"
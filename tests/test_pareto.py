@@ -0,0 +1,51 @@
+import zipfile
+
+import pandas as pd
+import pytest
+
+from ftyield.pareto import bin_counts, pareto_sheets
+from ftyield.pipeline import report_sheets
+from ftyield.writer import write_workbook
+
+
+def row(station, date=None, tested=None, **bins):
+    return {"Lot#": None, "Date": date, "PGM Name": "2al642f1c3_pqc", "Station": station,
+            "Tested Qty": tested, **{b: bins.get(b, 0) for b in ("Bin1", "Bin2", "Bin3", "Bin4", "Bin5", "Bin6", "Loss", "Damage")}}
+
+
+RAW = pd.DataFrame([
+    row("FT", "2024.02.19", 100, Bin1=90, Bin3=10), row("R1"), row("Total", Bin1=94, Bin3=5, Bin5=1),
+    row("FT", "2024.02.27", 200, Bin1=180, Bin2=20), row("Total", Bin1=190, Bin2=8, Bin3=2),
+    row("FT", "2024.02.27", 50, Bin1=40, Bin2=10),  # 沒有 Total：不計入
+])
+
+
+def test_bin_counts_single_groupby():
+    counts = bin_counts(RAW)
+    assert counts.index.tolist() == [("FT1", "2024W08"), ("FT1", "2024W09")]
+    assert counts["Tested Qty"].tolist() == [100, 200]
+    assert counts["Bin3"].tolist() == [5, 2] and counts["Bin2"].tolist() == [0, 8]
+
+
+def test_pareto_table_ranks_fail_bins():
+    table = pareto_sheets(RAW)["FT1"]
+    assert table.columns.tolist()[:6] == ["Bin", "Fail Qty", "Yield loss", "Cum %", "2024W08", "2024W09"]
+    assert table["Bin"].tolist()[:3] == ["Bin2", "Bin3", "Bin5"]
+    assert table["Fail Qty"].tolist()[:3] == [8, 7, 1]
+    assert table["Yield loss"].iloc[0] == pytest.approx(8 / 300)
+    assert table["Cum %"].tolist()[:3] == pytest.approx([0.5, 15 / 16, 1.0])
+    assert table.loc[1, ["2024W08", "2024W09"]].tolist() == [5, 2]
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "xlsxwriter"])
+def test_pareto_sheet_next_to_ft_sheet_with_chart(tmp_path, engine):
+    df_cleaned = pd.DataFrame({"Lot#": [1], "Station": ["FT1"], "First Pass Yield": [0.9],
+                               "Overall Yield": [0.94], "RT rate": [1]})
+    sheets = report_sheets(df_cleaned, pareto_sheets(RAW))
+    assert list(sheets) == ["FT1", "FT1_Pareto", "Summary"]
+    output = tmp_path / "out.xlsx"
+    write_workbook(str(output), sheets, 1, 0.98, engine)
+    with zipfile.ZipFile(output) as zf:
+        charts = [zf.read(n).decode("utf-8") for n in zf.namelist() if n.startswith("xl/charts/chart")]
+    assert len(charts) == 2
+    assert any("barChart" in c and "lineChart" in c and "FT1_Pareto'!$B$2" in c.replace("FT1_Pareto!", "FT1_Pareto'!") for c in charts)
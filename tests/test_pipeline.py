@@ -0,0 +1,100 @@
+import re
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import Workbook, load_workbook
+
+from ftyield import COLUMNS_TO_KEEP, KEEP_COLUMNS, modify_station, read_product_sheets, run_product, output_name
+from ftyield.pipeline import locate_header
+from ftyield.schema import sheet_schema
+
+CONTROL_TABLE = Path(__file__).resolve().parent.parent / "Sunplus_Yield_control_table.xlsx"
+
+
+def test_read_product_sheets_skips_scratch_sheets():
+    frames = read_product_sheets(CONTROL_TABLE)
+    assert "QAL642E LFBGA 487B" in frames
+    assert "QAK654B FCCSP 525B" in frames
+    assert not any(name.startswith("工作表") for name in frames)
+
+
+def test_read_product_sheets_selected():
+    frames = read_product_sheets(CONTROL_TABLE, ["QAL642C LFBGA 487B"])
+    assert list(frames) == ["QAL642C LFBGA 487B"]
+    assert "Station" in frames["QAL642C LFBGA 487B"].columns
+
+
+def test_output_name():
+    assert output_name("QAL642E LFBGA 487B") == "QAL642E_LFBGA_487B_FT_yield_trend.xlsx"
+    assert output_name("QAH648B 64MCM(QFN)") == "QAH648B_64MCM_QFN_FT_yield_trend.xlsx"
+
+
+def test_run_product_writes_ft_sheets_and_charts(tmp_path):
+    df = read_product_sheets(CONTROL_TABLE, ["QAL642E LFBGA 487B"])["QAL642E LFBGA 487B"]
+    output_file = tmp_path / "out.xlsx"
+    df_cleaned = run_product(df, output_file)
+
+    wb = load_workbook(output_file)
+    assert wb.sheetnames == ["FT1", "FT2", "FT3", "Summary"]
+    assert len(wb["FT1"]._charts) == 1
+    assert wb["FT1"].max_row == (df_cleaned["Station"] == "FT1").sum() + 1
+
+
+def test_modify_station_uses_first_f_number():
+    df = pd.DataFrame({
+        "Station": ["FT", "R1", "FT", "FT", "Total"],
+        "PGM Name": ["2ak654f1b1_xc011", "2ak654f1b1_xc011", "2al642f12e5_f3", "no_number", None],
+    })
+    assert modify_station(df)["Station"].tolist() == ["FT1", "R1", "FT12", "FT", "Total"]
+
+
+def test_modify_station_matches_row_apply():
+    def modify_ft(station, pgm_name):
+        if station == "FT":
+            match = re.search(r"f(\d+)", pgm_name)
+            if match:
+                return f"FT{match.group(1)}"
+        return station
+
+    for df in read_product_sheets(CONTROL_TABLE).values():
+        expected = df.apply(lambda row: modify_ft(row["Station"], row["PGM Name"]), axis=1)
+        assert modify_station(df.copy())["Station"].tolist() == expected.tolist()
+
+
+def test_header_projection_matches_fixed_columns():
+    with pd.ExcelFile(CONTROL_TABLE) as xls:
+        expected = xls.parse("QAL642E LFBGA 487B", usecols=COLUMNS_TO_KEEP, skiprows=1)
+    df = read_product_sheets(CONTROL_TABLE, ["QAL642E LFBGA 487B"])["QAL642E LFBGA 487B"]
+    # 欄位選取相同；型態由 sheet_schema 統一
+    pd.testing.assert_frame_equal(df, sheet_schema(expected))
+
+
+def test_header_located_after_extra_banner_and_shifted_columns(tmp_path):
+    # 多兩列標題、最左邊多一欄：固定的 B~T + skiprows=1 會讀錯欄位
+    expected = read_product_sheets(CONTROL_TABLE, ["QAL642E LFBGA 487B"])["QAL642E LFBGA 487B"]
+    src = load_workbook(CONTROL_TABLE)["QAL642E LFBGA 487B"]
+    wb = Workbook()
+    ws = wb.active
+    ws.title = "shifted"
+    ws.append(["Sunplus Daily Production Yield Control Table"])
+    ws.append([])
+    for row in src.iter_rows(min_row=2, values_only=True):
+        ws.append([None, *row])
+    path = tmp_path / "shifted.xlsx"
+    wb.save(path)
+
+    with pd.ExcelFile(path) as xls:
+        header_row, positions = locate_header(xls, "shifted")
+    assert header_row == 2
+    assert positions["Lot#"] == 2 and positions["Overall Yield"] == 20
+    df = read_product_sheets(path, ["shifted"])["shifted"]
+    assert list(df.columns) == list(KEEP_COLUMNS)
+    pd.testing.assert_frame_equal(df, expected)
+
+
+def test_missing_header_raises(tmp_path):
+    path = tmp_path / "no_header.xlsx"
+    pd.DataFrame({"Lot#": [1], "Station": ["FT"]}).to_excel(path, index=False)
+    with pytest.raises(ValueError, match="找不到表頭"):
+        read_product_sheets(path, ["Sheet1"])
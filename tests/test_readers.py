@@ -0,0 +1,92 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from ftyield.pipeline import COLUMNS_TO_KEEP
+from ftyield import readers
+from ftyield.readers import READERS, column_index, has_calamine, open_reader, parse_usecols, select_reader
+
+ROOT = Path(__file__).resolve().parent.parent
+TABLES = [
+    ROOT / "Sunplus_Yield_control_table.xlsx",
+    ROOT / "矽格北興-93k" / "Sunplus_Yield_control_table.xlsx",
+    ROOT / "鴻谷" / "Sunplus_Yield_control_table.xlsx",
+]
+STREAM_READERS = [r for r in READERS if r != "pandas" and (r != "calamine" or has_calamine())]
+# 掃描表頭用的 header=None / nrows；calamine 由 pandas 自己處理（結尾空白列的判斷與 openpyxl 引擎不同）
+PEEK_KWARGS = dict.fromkeys(("openpyxl", "xml"), (
+    {"header": None, "nrows": 10},
+    {"usecols": [1, 6], "skiprows": 3, "nrows": 5},
+))
+
+
+def _parse(book, sheet, **kwargs):
+    try:
+        return book.parse(sheet, **kwargs)
+    except ValueError as e:
+        return type(e)
+
+
+def test_parse_usecols():
+    assert column_index("A") == 0 and column_index("T") == 19 and column_index("AA") == 26
+    assert parse_usecols(COLUMNS_TO_KEEP) == [1, 2, 3, 5, 6, 18, 19]
+    assert parse_usecols("A:C, F") == [0, 1, 2, 5]
+    assert parse_usecols(None) is None
+
+
+def test_rows_to_frame_rejects_other_header_rows():
+    with pytest.raises(ValueError, match="header"):
+        readers.rows_to_frame([["a"], [1]], header=1)
+
+
+@pytest.mark.parametrize("reader", STREAM_READERS)
+@pytest.mark.parametrize("path", TABLES, ids=lambda p: p.parent.name)
+def test_reader_matches_read_excel(reader, path):
+    with pd.ExcelFile(path) as expected, open_reader(str(path), reader) as book:
+        assert book.sheet_names == expected.sheet_names
+        for sheet in expected.sheet_names:
+            pd.testing.assert_frame_equal(_parse(book, sheet, usecols=COLUMNS_TO_KEEP, skiprows=1),
+                                          expected.parse(sheet, usecols=COLUMNS_TO_KEEP, skiprows=1))
+
+
+@pytest.mark.parametrize("reader", STREAM_READERS)
+def test_reader_matches_read_excel_on_irregular_sheets(reader):
+    # 週報的分頁比 T 欄窄、表頭有空白與重複名稱，也要與 pd.read_excel 一致
+    path = ROOT / "New product FT status W08.xlsx"
+    with pd.ExcelFile(path) as expected, open_reader(str(path), reader) as book:
+        peek = PEEK_KWARGS.get(select_reader(str(path), reader), ())
+        for sheet in expected.sheet_names:
+            for kwargs in ({"usecols": COLUMNS_TO_KEEP, "skiprows": 1}, {}, *peek):
+                got, want = _parse(book, sheet, **kwargs), _parse(expected, sheet, **kwargs)
+                if isinstance(want, type):
+                    assert got is want
+                else:
+                    pd.testing.assert_frame_equal(got, want)
+
+
+def test_xls_falls_back_to_pandas():
+    xls = str(ROOT / "矽格湖口-D10" / "Sunplus_Yield_control_table.xlsx")
+    for reader in ("openpyxl", "xml"):
+        assert select_reader(xls, reader) == "pandas"
+    with open_reader(xls, "xml") as book:
+        assert isinstance(book, pd.ExcelFile)
+    with pytest.raises(ValueError):
+        open_reader(str(TABLES[0]), "nope")
+
+
+def test_auto_reader_selection(tmp_path, monkeypatch):
+    xls = str(ROOT / "矽格湖口-D10" / "Sunplus_Yield_control_table.xlsx")
+    small = tmp_path / "small.xlsx"
+    pd.DataFrame({"a": [1]}).to_excel(small, index=False)
+
+    monkeypatch.setattr(readers, "has_calamine", lambda: True)
+    assert select_reader(str(TABLES[0]), "auto") == "calamine"
+    assert select_reader(xls, "auto") == "calamine"
+
+    monkeypatch.setattr(readers, "has_calamine", lambda: False)
+    assert select_reader(str(TABLES[0]), "auto") == "xml"
+    assert select_reader(str(small), "auto") == "pandas"
+    assert select_reader(xls, "auto") == "pandas"
+    with pytest.raises(ValueError):
+        select_reader(str(TABLES[0]), "calamine")
@@ -0,0 +1,75 @@
+import zipfile
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ftyield.__main__ import main
+from ftyield.pipeline import KEEP_COLUMNS, prepare, read_product_sheets, report_sheets
+from ftyield.rollup import rollup_sheets, rollup_table
+from ftyield.writer import write_workbook
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def lot(date, tested, fpy, overall, rt, station="FT1"):
+    return {"Lot#": "L", "Lot_Size/Qty": 1000, "Date": pd.Timestamp(date), "PGM Name": "p", "Station": station,
+            "Tested Qty": tested, "First Pass Yield": fpy, "Overall Yield": overall, "RT rate": rt}
+
+
+DF_CLEANED = pd.DataFrame([
+    lot("2024-02-19", 100, 0.90, 0.95, 1), lot("2024-02-25", 300, 0.98, 0.99, 4),  # 同一個 ISO 週 (W08)
+    lot("2024-02-26", None, 0.80, 0.90, 2),  # W09，沒有 Tested Qty 時用 Lot_Size/Qty
+    lot("2024-12-30", 200, 0.95, 0.97, 0, "FT2"),  # ISO 2025W01
+]).astype({"First Pass Yield": "float32", "Overall Yield": "float32", "RT rate": "Int8"})
+
+
+def test_weekly_rollup_weighted_by_tested_qty():
+    tables = rollup_table(DF_CLEANED, "week")
+    ft1 = tables["FT1"]
+    assert ft1.columns.tolist() == ["Week", "Lots", "Tested Qty", "First Pass Yield", "Overall Yield", "RT rate"]
+    assert ft1["Week"].tolist() == ["2024W08", "2024W09"]
+    assert ft1["Lots"].tolist() == [2, 1] and ft1["Tested Qty"].tolist() == [400, 1000]
+    assert ft1["First Pass Yield"].iloc[0] == pytest.approx((0.90 * 100 + 0.98 * 300) / 400)
+    assert ft1["RT rate"].tolist() == [4, 2]
+    assert tables["FT2"]["Week"].tolist() == ["2025W01"]
+
+
+def test_monthly_rollup_and_sheet_order():
+    assert rollup_table(DF_CLEANED, "month")["FT1"]["Month"].tolist() == ["2024-02"]
+    sheets = report_sheets(DF_CLEANED, rollups=rollup_sheets(DF_CLEANED, ["week", "month"]))
+    assert list(sheets)[:4] == ["FT1", "FT1_Week", "FT1_Month", "FT2"]
+    assert "Tested Qty" not in sheets["FT1"].columns
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "xlsxwriter"])
+def test_rollup_sheet_gets_trend_chart(tmp_path, engine):
+    sheets = {"FT1_Week": rollup_table(DF_CLEANED, "week")["FT1"]}
+    output = tmp_path / "out.xlsx"
+    write_workbook(str(output), sheets, 4, 0.98, engine)
+    with zipfile.ZipFile(output) as zf:
+        charts = [zf.read(n).decode("utf-8") for n in zf.namelist() if n.startswith("xl/charts/chart")]
+    assert len(charts) == 1
+    assert "Week" in charts[0] and "$A$2:$A$3" in charts[0]
+    assert pd.read_excel(output).iloc[:, 6].tolist() == [0.98, 0.98]  # 標準線
+
+
+def test_rollup_without_quantities_or_with_zero_qty():
+    no_qty = DF_CLEANED.drop(columns=["Lot_Size/Qty"]).assign(**{"Tested Qty": [0, 0, None, 200]})
+    tables = rollup_table(no_qty, "week")
+    ft1 = tables["FT1"]
+    assert ft1["Tested Qty"].tolist() == [0, 0] and ft1["Lots"].tolist() == [2, 1]
+    assert np.isnan(ft1["First Pass Yield"]).all() and np.isnan(ft1["Overall Yield"]).all()
+    assert tables["FT2"]["First Pass Yield"].tolist() == pytest.approx([0.95])
+
+
+def test_report_command_weights_rollup_by_tested_qty(tmp_path):
+    source = ROOT / "Sunplus_Yield_control_table.xlsx"
+    sheet = "QAL642E LFBGA 487B"
+    assert main(["report", "-i", str(source), "-s", sheet, "-o", str(tmp_path), "--rollup", "month", "--no-cache"]) == 0
+    output = next(tmp_path.glob("*.xlsx"))
+    monthly = pd.read_excel(output, sheet_name="FT1_Month")
+    raw = read_product_sheets(str(source), [sheet], columns=KEEP_COLUMNS + ("Tested Qty",))[sheet]
+    expected = rollup_table(prepare(raw), "month")["FT1"]
+    assert monthly["Tested Qty"].tolist() == expected["Tested Qty"].tolist()
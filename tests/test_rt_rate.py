@@ -0,0 +1,64 @@
+import re
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from ftyield import compute_rt_rate, modify_station, read_product_sheets
+
+ROOT = Path(__file__).resolve().parent.parent
+CONTROL_TABLES = [
+    ROOT / "Sunplus_Yield_control_table.xlsx",
+    ROOT / "矽格北興-93k" / "Sunplus_Yield_control_table.xlsx",
+    ROOT / "鴻谷" / "Sunplus_Yield_control_table.xlsx",
+]
+
+
+def rt_rate_loop(df):
+    """yield-tc.py 步驟 4️⃣ 的逐列版本，作為對照。"""
+    df["RT rate"] = None
+    rt_rate = None
+    rt_start_idx = None
+
+    for idx in df.index:
+        station = str(df.at[idx, "Station"])
+
+        if station.startswith("FT"):
+            rt_rate = 0
+            rt_start_idx = idx
+
+        elif re.match(r"R(\d+)", station):
+            r_value = int(re.match(r"R(\d+)", station).group(1))
+            rt_rate = r_value if rt_rate is None else max(rt_rate, r_value)
+
+        elif station == "Total" and rt_start_idx is not None:
+            df.loc[rt_start_idx:idx, "RT rate"] = rt_rate
+            rt_rate = None
+            rt_start_idx = None
+
+    return df
+
+
+def assert_same_rt_rate(df):
+    expected = rt_rate_loop(df.copy())["RT rate"]
+    actual = compute_rt_rate(df.copy())["RT rate"]
+    pd.testing.assert_series_equal(actual.astype("Float64"), expected.astype("Float64"))
+
+
+def test_edge_cases():
+    df = pd.DataFrame({"Station": [
+        "R1", "Total",                  # 第一個 FT 之前
+        "FT1", "R1", "R3", "R2", "Total",
+        "FT2", "R1",                    # 沒有 Total 就進入下一個 lot
+        "FT1", "Total", "R4", "Total",  # Total 之後的列不屬於 lot
+        "Station", None,
+        "FT3", "R2",                    # 最後一組沒有 Total
+    ]})
+    assert_same_rt_rate(df)
+    assert compute_rt_rate(df.copy())["RT rate"].tolist()[2:7] == [3] * 5
+
+
+@pytest.mark.parametrize("path", CONTROL_TABLES, ids=lambda p: p.parent.name)
+def test_matches_loop_on_bundled_sheets(path):
+    for sheet_name, df in read_product_sheets(path).items():
+        assert_same_rt_rate(modify_station(df))
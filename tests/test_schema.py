@@ -0,0 +1,47 @@
+from pathlib import Path
+
+import pandas as pd
+
+from ftyield import prepare, read_product_sheets
+from ftyield.schema import apply_schema, export_frame, memory_mb, parse_dates
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def test_prepare_returns_typed_columns():
+    df = read_product_sheets(ROOT / "Sunplus_Yield_control_table.xlsx", ["QAL642E LFBGA 487B"])["QAL642E LFBGA 487B"]
+    typed = prepare(df)
+    dtypes = typed.dtypes.astype(str).to_dict()
+    assert dtypes["Date"].startswith("datetime64")
+    assert dtypes["Station"] == dtypes["PGM Name"] == "category"
+    assert dtypes["First Pass Yield"] == dtypes["Overall Yield"] == "float32"
+    assert dtypes["RT rate"] == "Int8"
+    assert memory_mb(typed) < memory_mb(typed.astype(object))
+    # 再套用一次結果不變
+    pd.testing.assert_frame_equal(apply_schema(typed), typed)
+
+
+def test_parse_dates_string_and_excel_dates():
+    assert parse_dates(pd.Series(["2024.08.31", " 2025.01.02"])).tolist() == [
+        pd.Timestamp("2024-08-31"), pd.Timestamp("2025-01-02")]
+    mixed = pd.Series(["2024.08.31", pd.Timestamp("2024-09-01")], dtype=object)
+    assert parse_dates(mixed).tolist() == [pd.Timestamp("2024-08-31"), pd.Timestamp("2024-09-01")]
+    already = pd.Series(pd.to_datetime(["2024-08-31"]))
+    assert parse_dates(already) is already
+
+
+def test_export_frame_restores_float64_values():
+    df = apply_schema(pd.DataFrame({"Overall Yield": [0.9826, 0.8462, 1.0], "Station": ["FT1"] * 3}))
+    out = export_frame(df)
+    assert out["Overall Yield"].dtype == "float64"
+    assert out["Overall Yield"].tolist() == [0.9826, 0.8462, 1.0]
+
+
+def test_prepare_on_schema_sees_same_rows_before_and_after():
+    df = read_product_sheets(ROOT / "Sunplus_Yield_control_table.xlsx", ["QAL642E LFBGA 487B"])["QAL642E LFBGA 487B"]
+    seen = []
+    typed = prepare(df, on_schema=lambda before, after: seen.append((before, after)))
+    (before, after), = seen
+    assert after is typed
+    assert before.index.equals(typed.index) and list(before.columns) == list(typed.columns)
+    assert memory_mb(after) < memory_mb(before)
@@ -0,0 +1,39 @@
+from pathlib import Path
+
+import pandas as pd
+import pytest
+
+from ftyield import prepare, read_product_sheets
+from ftyield.snapshots import snapshot_writer, write_snapshot
+
+CONTROL_TABLE = Path(__file__).resolve().parent.parent / "Sunplus_Yield_control_table.xlsx"
+
+
+def test_prepare_writes_no_snapshots_by_default(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    df = read_product_sheets(CONTROL_TABLE, ["QAL642E LFBGA 487B"])["QAL642E LFBGA 487B"]
+    prepare(df)
+    assert list(tmp_path.iterdir()) == []
+
+
+def test_prepare_writes_a_to_e_snapshots(tmp_path):
+    df = read_product_sheets(CONTROL_TABLE, ["QAL642E LFBGA 487B"])["QAL642E LFBGA 487B"]
+    prepare(df, snapshot_writer(str(tmp_path), xlsx=True))
+    stems = sorted({p.stem for p in tmp_path.iterdir()})
+    assert stems == [f"yield_trend_{c}" for c in "abcde"]
+    assert (tmp_path / "yield_trend_e.xlsx").exists()
+
+
+def test_write_snapshot_roundtrip(tmp_path):
+    df = pd.DataFrame({"Lot#": [5700021, "Lot#"], "Overall Yield": [0.9792, None]})
+    path = write_snapshot(df, "snap", str(tmp_path))
+    if path.endswith(".parquet"):
+        back = pd.read_parquet(path)
+        assert back["Lot#"].tolist() == ["5700021", "Lot#"]
+    else:
+        pd.testing.assert_frame_equal(pd.read_pickle(path), df)
+
+
+def test_write_snapshot_rejects_unknown_format(tmp_path):
+    with pytest.raises(ValueError):
+        write_snapshot(pd.DataFrame(), "snap", str(tmp_path), fmt="csv")
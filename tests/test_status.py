@@ -0,0 +1,79 @@
+import shutil
+from pathlib import Path
+
+import openpyxl
+import pandas as pd
+import pytest
+
+from ftyield import status
+from ftyield.__main__ import main
+from ftyield.cache import ParseCache
+from ftyield.status import load_status_folder, read_status_workbook, week_label
+
+ROOT = Path(__file__).resolve().parent.parent
+W08 = ROOT / "New product FT status W08.xlsx"
+
+
+def test_week_label():
+    assert week_label("週報/New product FT status W08.xlsx") == "W08"
+    assert week_label("New product FT status W8 (1).xlsx") == "W08"
+    with pytest.raises(ValueError):
+        week_label("New product FT status.xlsx")
+
+
+def test_read_status_workbook_typed_lots_and_trend():
+    week = read_status_workbook(str(W08))
+    assert week.week == "W08"
+    assert set(week.lots["Sheet"]) == {"Q649_c", "Q648-88", "Q648-64", "Q642FTx", "Q642FT1_c", "Q642FT2_c", "Q642FT3_c"}
+    dtypes = week.lots.dtypes.astype(str).to_dict()
+    assert dtypes["Date"].startswith("datetime64")
+    assert dtypes["Station"] == dtypes["Sheet"] == "category"
+    assert dtypes["Overall Yield"] == "float32" and dtypes["RT rate"] == "Int8"
+
+    q649 = week.trend[week.trend["Sheet"] == "Q649"]
+    assert len(q649) == 26
+    first = q649.iloc[0]
+    assert (first["Week"], first["Date"], first["Qty"]) == ("2023W17", pd.Timestamp("2023-04-24"), 15412)
+    assert first["First Pass Yield"] == pytest.approx(0.9424, abs=1e-6)
+
+
+def test_load_status_folder_parses_only_new_weeks(tmp_path, monkeypatch, capsys):
+    folder = tmp_path / "weekly"
+    folder.mkdir()
+    shutil.copy(W08, folder / W08.name)
+    cache = ParseCache(str(tmp_path / "cache"))
+    assert list(load_status_folder(str(folder), cache)) == ["W08"]
+
+    # 下一週的週報：內容不同的 W09
+    wb = openpyxl.load_workbook(W08)
+    wb["Q649"].append(["2024W09", 0.95, 0.99, 2, 1000])
+    wb.save(folder / "New product FT status W09.xlsx")
+    (folder / "~$New product FT status W09.xlsx").write_bytes(b"")
+
+    parsed = []
+    real_read = status.read_status_workbook
+    monkeypatch.setattr(status, "read_status_workbook", lambda path, *args: parsed.append(path) or real_read(path, *args))
+    weeks = load_status_folder(str(folder), cache)
+    assert [Path(p).name for p in parsed] == ["New product FT status W09.xlsx"]
+    assert list(weeks) == ["W08", "W09"]
+    assert "2024W09" in set(weeks["W09"].trend["Week"]) - set(weeks["W08"].trend["Week"])
+    pd.testing.assert_frame_equal(weeks["W08"].lots, read_status_workbook(str(W08)).lots)
+    assert "快取 1 份，解析 1 份" in capsys.readouterr().out
+
+
+def test_status_cli_parallel(tmp_path, capsys):
+    for week in ("W07", "W08"):
+        shutil.copy(W08, tmp_path / f"New product FT status {week}.xlsx")
+    assert main(["status", str(tmp_path), "-j", "2", "--no-cache"]) == 0
+    out = capsys.readouterr().out
+    assert "解析 2 份" in out
+    assert " W07  明細   213 列 / 7 分頁" in out and "（最新 2024W08）" in out
+
+
+def test_prepare_errors_are_not_hidden_as_trend_sheets(monkeypatch):
+    def broken(df, *args, **kwargs):
+        raise ValueError("壞掉的資料")
+
+    monkeypatch.setattr(status, "prepare", broken)
+    with pytest.raises(ValueError, match="壞掉的資料"):
+        read_status_workbook(str(W08))
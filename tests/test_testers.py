@@ -0,0 +1,73 @@
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from ftyield.pipeline import prepare, report_sheets
+from ftyield import testers
+from ftyield.rollup import rollup_table
+
+
+def lot(tester, qty, fpy, overall, rt, station="FT1"):
+    return {"Lot#": "L", "Lot_Size/Qty": qty, "Date": pd.Timestamp("2024-02-19"), "PGM Name": "p",
+            "Station": station, "Tester": tester, "First Pass Yield": fpy, "Overall Yield": overall, "RT rate": rt}
+
+
+DF_CLEANED = pd.DataFrame([
+    lot("DX-10", 100, 0.90, 0.95, 0), lot("dx10", 300, 0.98, 0.99, 2),
+    lot("TAG23", 200, 0.80, 0.90, 5), lot(None, 50, 0.70, 0.80, 1), lot("TAG23", 100, 0.95, 0.97, 1, "FT2"),
+])
+
+
+def test_tester_stats_qty_weighted():
+    stats = testers.tester_stats(DF_CLEANED).set_index(["Station", "Tester"])
+    assert stats.index.tolist() == [("FT1", "DX10"), ("FT1", "TAG23"), ("FT1", "未知"), ("FT2", "TAG23")]
+    dx10 = stats.loc[("FT1", "DX10")]
+    assert (dx10["Lots"], dx10["Tested Qty"]) == (2, 400)  # 沒有 Tested Qty 欄時用 Lot_Size/Qty
+    assert dx10["First Pass Yield"] == pytest.approx((0.90 * 100 + 0.98 * 300) / 400)
+    assert dx10["平均 RT rate"] == 1
+    assert stats.loc[("FT1", "DX10"), ["RT 0", "RT 1", "RT 2", "RT ≥3"]].tolist() == [1, 0, 1, 0]
+    assert stats.loc[("FT1", "TAG23"), "RT ≥3"] == 1
+
+
+def test_prepare_keeps_lots_without_tester_and_ft_sheet_layout():
+    raw = pd.DataFrame([
+        {"Lot#": "A", "Lot_Size/Qty": 10, "Date": "2024.02.19", "Tester": None, "PGM Name": "x_f1",
+         "Station": "FT", "First Pass Yield": 0.9, "Overall Yield": 0.95},
+        {"Lot#": None, "Lot_Size/Qty": None, "Date": None, "Tester": None, "PGM Name": None,
+         "Station": "Total", "First Pass Yield": None, "Overall Yield": None},
+    ])
+    df_cleaned = prepare(raw)
+    assert len(df_cleaned) == 1
+    sheets = report_sheets(df_cleaned)
+    assert list(sheets) == ["FT1", "Summary", "Tester"]
+    assert "Tester" not in sheets["FT1"].columns
+    assert sheets["Tester"]["Tester"].tolist() == ["未知"]
+
+
+@pytest.mark.parametrize("engine", ["openpyxl", "xlsxwriter"])
+def test_tester_heatmap_with_color_scale(tmp_path, engine):
+    tables = {"QAL642C": testers.tester_stats(DF_CLEANED), "QAL642E": testers.tester_stats(DF_CLEANED.iloc[:2])}
+    heatmap = testers.tester_heatmap(tables)
+    assert heatmap.columns.tolist() == ["Tester / First Pass Yield", "QAL642C FT1", "QAL642C FT2", "QAL642E FT1"]
+    assert heatmap["Tester / First Pass Yield"].tolist() == ["DX10", "TAG23", "未知"]
+    assert pd.isna(heatmap.loc[1, "QAL642E FT1"])
+
+    output = tmp_path / "heatmap.xlsx"
+    testers.write_tester_heatmap(tables, str(output), engine)
+    ws = load_workbook(output)[testers.HEATMAP_SHEET]
+    ranges = [str(cf.sqref) for cf in ws.conditional_formatting]
+    assert ranges == ["B2:D4"]
+
+
+def test_tester_and_rollup_use_same_weights():
+    df = DF_CLEANED.assign(**{"Tested Qty": [300, 100, None, 0, 0]})
+    stats = testers.tester_stats(df).set_index(["Station", "Tester"])
+    weekly = rollup_table(df, "week")
+    ft1 = stats.loc["FT1"]
+    # 空白的 Tested Qty 用 Lot_Size/Qty（TAG23 200），0 不計入加權
+    assert ft1["Tested Qty"].sum() == weekly["FT1"]["Tested Qty"].iloc[0] == 600
+    assert ft1.loc["DX10", "First Pass Yield"] == pytest.approx((0.90 * 300 + 0.98 * 100) / 400)
+    total = (ft1["First Pass Yield"].fillna(0) * ft1["Tested Qty"]).sum() / ft1["Tested Qty"].sum()
+    assert weekly["FT1"]["First Pass Yield"].iloc[0] == pytest.approx(total)
+    assert pd.isna(stats.loc[("FT2", "TAG23"), "First Pass Yield"])
+    assert pd.isna(weekly["FT2"]["First Pass Yield"].iloc[0])
@@ -0,0 +1,61 @@
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from ftyield.__main__ import main
+from ftyield.validate import check_yields, discrepancies
+
+ROOT = Path(__file__).resolve().parent.parent
+
+
+def lot(station, bins, tested, fpy=None, overall=None):
+    return {"Lot#": "L1" if station.startswith("FT") else None, "PGM Name": "2al642f1c3_pqc",
+            "Station": station, **dict(zip(["Bin1", "Bin2", "Bin3", "Loss"], bins)),
+            "Tested Qty": tested, "First Pass Yield": fpy, "Overall Yield": overall}
+
+
+def test_check_yields_flags_each_problem():
+    raw = pd.DataFrame([
+        lot("FT", [262, 24, 3, 0], 289, 0.9066, 0.9792), lot("R1", [20, 5, 2, 0], 27), lot("Total", [283, 3, 3, 0], None),
+        lot("FT", [401, 40, 48, 0], 489, 0.8400, 0.9550), lot("R1", [66, 0, 22, 0], 88), lot("Total", [467, 0, 22, 0], None),
+        lot("FT", [420, 30, 40, 0], 491, 0.8554, 0.9700), lot("Total", [486, 0, 4, 0], None),
+        lot("FT", [100, 0, 0, 0], 100, 1.0, 0.5),  # 沒有 Total：不驗算 Overall Yield
+    ])
+    check = check_yields(raw)
+    assert check["Station"].tolist() == ["FT1"] * 4
+    assert check["問題"].tolist() == ["", "First Pass Yield", "Overall Yield、Tested Qty ≠ bin 合計", ""]
+    assert check.loc[0, "Overall Yield (bin)"] == pytest.approx(283 / 289)
+    assert np.isnan(check.loc[3, "Overall Yield (bin)"])
+    assert discrepancies(check).index.tolist() == [1, 2]
+
+
+def test_run_writes_check_report(tmp_path, capsys):
+    (tmp_path / "site").mkdir()
+    (tmp_path / "site" / "Sunplus_Yield_control_table.xlsx").write_bytes(
+        (ROOT / "Sunplus_Yield_control_table.xlsx").read_bytes())
+    (tmp_path / "ftyield.toml").write_text('[sites."demo"]\ndir = "site"\n', encoding="utf-8")
+    report = tmp_path / "check.csv"
+    assert main(["run", "-c", str(tmp_path / "ftyield.toml"), "-p", "QAL642*", "--no-cache",
+                 "--check-report", str(report)]) == 0
+    assert "[驗算] demo / QAL642E LFBGA 487B：1 / 54 個 lot 與 bin 數量不符" in capsys.readouterr().out
+    df = pd.read_csv(report, encoding="utf-8-sig")
+    assert df.columns[:4].tolist() == ["Site", "Sheet", "Lot#", "Station"]
+    assert set(df["Sheet"]) == {"QAL642C LFBGA 487B", "QAL642E LFBGA 487B"}
+    text = pd.read_csv(report, encoding="utf-8-sig", dtype=str)
+    assert text["Lot#"].str.fullmatch(r"[\w-]+").all() and not text["Lot#"].str.endswith(".0").any()
+    assert text["Date"].dropna().str.fullmatch(r"\d{4}-\d{2}-\d{2}").all()
+    assert not text["Tested Qty"].dropna().str.contains(r"\.").any()
+
+
+def test_check_yields_keeps_lot_numbers_and_parses_dates():
+    raw = pd.DataFrame([
+        {**lot("FT", [262, 24, 3, 0], 289, 0.9066, 0.9792), "Lot#": 5700020, "Date": "2024.07.21"},
+        {**lot("Total", [283, 3, 3, 0], None), "Date": None},
+        {**lot("FT", [100, 0, 0, 0], 100, 1.0, 1.0), "Lot#": 6200005, "Date": pd.Timestamp("2025-03-12")},
+    ]).astype({"Lot#": "Int64"})
+    check = check_yields(raw)
+    assert check["Lot#"].tolist() == [5700020, 6200005] and str(check["Lot#"].dtype) == "Int64"
+    assert check["Date"].tolist() == [pd.Timestamp("2024-07-21"), pd.Timestamp("2025-03-12")]
+    assert str(check["Tested Qty"].dtype) == "Int64" and check["Tested Qty"].tolist() == [289, 100]
@@ -0,0 +1,68 @@
+from datetime import datetime
+from pathlib import Path
+
+import pandas as pd
+import pytest
+from openpyxl import load_workbook
+
+from ftyield import prepare, read_product_sheets, write_report
+from ftyield.pipeline import report_sheets
+from ftyield.writer import column_widths
+
+CONTROL_TABLE = Path(__file__).resolve().parent.parent / "Sunplus_Yield_control_table.xlsx"
+
+
+@pytest.fixture(scope="module")
+def df_cleaned():
+    df = read_product_sheets(CONTROL_TABLE, ["QAL642E LFBGA 487B"])["QAL642E LFBGA 487B"]
+    return prepare(df)
+
+
+def sheet_values(path):
+    wb = load_workbook(path)
+    return {name: list(wb[name].iter_rows(values_only=True)) for name in wb.sheetnames}
+
+
+def test_xlsxwriter_matches_openpyxl(tmp_path, df_cleaned):
+    pytest.importorskip("xlsxwriter")
+    write_report(df_cleaned, tmp_path / "a.xlsx", engine="openpyxl")
+    write_report(df_cleaned, tmp_path / "b.xlsx", engine="xlsxwriter")
+    assert sheet_values(tmp_path / "a.xlsx") == sheet_values(tmp_path / "b.xlsx")
+
+
+def test_xlsxwriter_single_pass_chart_and_target_line(tmp_path, df_cleaned):
+    pytest.importorskip("xlsxwriter")
+    output_file = tmp_path / "b.xlsx"
+    write_report(df_cleaned, output_file, target=0.97, engine="xlsxwriter")
+
+    wb = load_workbook(output_file)
+    ws = wb["FT1"]
+    assert len(ws._charts) == 1
+    assert len(wb["Summary"]._charts) == 0
+    headers = [c.value for c in ws[1]]
+    target_col = headers.index("Overall Yield") + 3
+    assert {ws.cell(row=r, column=target_col).value for r in range(2, ws.max_row + 1)} == {0.97}
+    assert ws.column_dimensions["D"].width > ws.column_dimensions["A"].width
+
+
+def test_unknown_engine(tmp_path, df_cleaned):
+    with pytest.raises(ValueError):
+        write_report(df_cleaned, tmp_path / "c.xlsx", engine="xlwings")
+
+
+def _display(value) -> str:
+    # Date 欄是日期儲存格，顯示格式為 yyyy.mm.dd
+    return value.strftime("%Y.%m.%d") if isinstance(value, datetime) else str(value)
+
+
+def test_column_widths_match_cell_scan(tmp_path, df_cleaned):
+    sheets = {name: report_sheets(df_cleaned)[name] for name in ("FT1", "Summary")}
+    with pd.ExcelWriter(tmp_path / "plain.xlsx", engine="openpyxl") as writer:
+        for name, df in sheets.items():
+            df.to_excel(writer, sheet_name=name, index=False)
+
+    wb = load_workbook(tmp_path / "plain.xlsx")
+    for name, df in sheets.items():
+        scanned = [max((len(_display(cell.value)) for cell in col if cell.value), default=10) + 2
+                   for col in wb[name].columns]
+        assert column_widths(df) == scanned
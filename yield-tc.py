@@ -1,3 +1,4 @@
+import argparse
 import pandas as pd
 import re
 import traceback
@@ -7,6 +8,7 @@ from openpyxl.chart.axis import ChartLines
 from openpyxl.drawing.line import LineProperties
 from openpyxl.drawing.colors import ColorChoice
 from openpyxl.chart.shapes import GraphicalProperties
+from ftyield.snapshots import add_snapshot_arguments, snapshot_from_args
 
 # 設定檔案名稱
 input_file = 'Sunplus_Yield_control_table.xlsx'
@@ -14,14 +16,21 @@ output_file = 'yield_trend_6.xlsx'
 sheet_name = 'QAL642E LFBGA 487B'
 columns_to_keep = "B, C, D, F, G, S, T"
 
+# 加上 --debug-snapshots 才輸出 yield_trend_a..e 中間資料（預設 Parquet）
+parser = argparse.ArgumentParser(description=f"{sheet_name} FT yield trend")
+add_snapshot_arguments(parser)
+snapshot = snapshot_from_args(parser.parse_args(), ".")
+
 try:
     # 1️⃣ 讀取 Excel，篩選特定欄位（用欄位位置），跳過第一列
     df = pd.read_excel(input_file, sheet_name=sheet_name, usecols=columns_to_keep, skiprows=1)
-    df.to_excel('yield_trend_a.xlsx')
+    if snapshot:
+        snapshot(df, "read")
 
     # 2️⃣ 新增 RT rate 欄位
     df["RT rate"] = None
-    df.to_excel('yield_trend_b.xlsx')
+    if snapshot:
+        snapshot(df, "rt_column")
 
     # ...已移除空值與型態檢查...
 
@@ -34,7 +43,8 @@ try:
         return station
 
     df["Station"] = df.apply(lambda row: modify_ft(row["Station"], row["PGM Name"]), axis=1)
-    df.to_excel('yield_trend_c.xlsx')
+    if snapshot:
+        snapshot(df, "station")
 
     # 4️⃣ 計算 RT rate（修正：避免 None 與 int 比較）
     rt_rate = None
@@ -61,11 +71,13 @@ try:
             rt_rate = None
             rt_start_idx = None
 
-    df.to_excel('yield_trend_d.xlsx')
+    if snapshot:
+        snapshot(df, "rt_rate")
 
     # 5️⃣ 刪除包含 NaN 的列
     df_cleaned = df.dropna()
-    df_cleaned.to_excel('yield_trend_e.xlsx')
+    if snapshot:
+        snapshot(df_cleaned, "cleaned")
 
     # 6️⃣ 分類 FT1, FT2, FT3 到不同 Sheet，並收集統計資料
     stats = []